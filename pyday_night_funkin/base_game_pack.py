@@ -12,13 +12,14 @@ import re
 import typing as t
 
 from pyglet.math import Vec2
-from schema import Schema, SchemaError, And, Or, Optional
 
+from pyday_night_funkin.chart import COMPILED_CHART_SUFFIX, Chart, chart_checksum, compile_chart
 from pyday_night_funkin.content_pack import ContentPack, LevelData, WeekData
+from pyday_night_funkin.core import asset_archive
 from pyday_night_funkin.core.asset_system import (
-	AssetProvider, AssetRouter, AssetRouterEntry, JSONAssetProvider, LibrarySpecPattern,
+	AssetProvider, AssetRouter, AssetRouterEntry, LibrarySpecPattern, OptionlessAssetProvider,
 	PostLoadProcessor,
-	load_image, load_json, load_pyobj, load_sound
+	load_image, load_pyobj, load_sound
 )
 from pyday_night_funkin.core.animation import FrameCollection
 from pyday_night_funkin.character import (
@@ -35,60 +36,6 @@ if t.TYPE_CHECKING:
 	from pyday_night_funkin.note import Note
 
 
-class SeqValidator:
-	"""
-	Validator for the `schema` library that will only allow lists or
-	tuples where each item matches the schema in the corresponding
-	blueprint. Validates into a tuple.
-	"""
-
-	def __init__(self, *types: t.Any) -> None:
-		self.schemas = tuple(x if isinstance(x, Schema) else Schema(x) for x in types)
-
-	def validate(self, v: t.Any) -> tuple:
-		if not isinstance(v, (list, tuple)):
-			raise SchemaError("Value is not a tuple or list.")
-		if len(v) != len(self.schemas):
-			raise SchemaError(f"Stored sequence of unexpected length: {len(v)}")
-
-		return tuple(s.validate(x) for s, x in zip(self.schemas, v))
-
-
-SONG_SCHEMA = Schema(
-	{
-		"song": {
-			"song": str,
-			"notes": [And(
-				Schema({
-					"lengthInSteps": int,
-					Optional("bpm"): Or(int, float),
-					Optional("changeBPM"): bool,
-					"mustHitSection": bool,
-					"sectionNotes": [SeqValidator(Or(int, float), int, Or(int, float))],
-					Optional("altAnim"): bool,
-					# Keys I've seen that are ignored:
-					# typeOfSection.
-					Optional(str): object,
-				}),
-				lambda d: ("changeBPM" in d) <= ("bpm" in d),
-			)],
-			"bpm": Or(int, float),
-			"needsVoices": bool,
-			"player1": str,
-			"player2": str,
-			"speed": Or(int, float),
-			# Keys I've seen that are ignored:
-			# sections, sectionLengths, validScore.
-			Optional(str): object,
-		},
-	},
-	# Sometimes a very scuffed version of ["song"] also exists at the
-	# root level. how you end up with that spaghetti bs and sleep calmly
-	# knowing it's out in the world is beyond me
-	ignore_extra_keys = True,
-)
-
-
 def fetch_character_icons(character: str) -> tuple[TextureRegion, TextureRegion]:
 	"""
 	Loads a 300x150 image of two character icons and returns its two
@@ -117,10 +64,10 @@ def fetch_week_header(name: str) -> Texture:
 	return load_image(load_pyobj("PATH_WEEK_HEADERS") / name)
 
 
-def fetch_song(song_name: str, difficulty: Difficulty) -> tuple[Source, Source | None, dict]:
+def fetch_song(song_name: str, difficulty: Difficulty) -> tuple[Source, Source | None, Chart]:
 	"""
 	Loads song data for a standard FNF song.
-	Will load a three-tuple of (Source, Source | None, dict); being
+	Will load a three-tuple of (Source, Source | None, Chart); being
 	the instrumental source, the voice source and the song data.
 	"""
 	data = load_song_data(song_name, difficulty)
@@ -133,28 +80,74 @@ def fetch_song(song_name: str, difficulty: Difficulty) -> tuple[Source, Source |
 	return (inst, voic, data)
 
 
+class ChartAssetProvider(OptionlessAssetProvider[Chart]):
+	"""
+	Loads json charts into compact ``Chart``s.
+	If a compiled chart next to the json chart or in the disk cache was
+	compiled from the very same json, it is loaded instead, skipping
+	the json's parsing and validation.
+	"""
+
+	DISK_CACHE_VERSION = 1
+
+	def load(self, path: str) -> Chart:
+		raw = asset_archive.read_asset(path)
+		checksum = chart_checksum(raw)
+
+		compiled_path = str(Path(path).with_suffix(COMPILED_CHART_SUFFIX))
+		if asset_archive.stat_asset(compiled_path) is not None:
+			chart = Chart.from_bytes(asset_archive.read_asset(compiled_path), checksum)
+			if chart is not None:
+				return chart
+
+		disk_cache = self._asm.disk_cache
+		if disk_cache is not None:
+			if (mm := disk_cache.get("chart", self.DISK_CACHE_VERSION, path)) is not None:
+				with mm:
+					chart = Chart.from_bytes(mm, checksum)
+				if chart is not None:
+					return chart
+
+		compiled = self._asm.run_cpu_bound(compile_chart, bytes(raw))
+		if disk_cache is not None:
+			disk_cache.put("chart", self.DISK_CACHE_VERSION, path, compiled)
+
+		return Chart.from_bytes(compiled)
+
+	def get_estimated_asset_size(self, item: Chart) -> int:
+		return item.get_size()
+
+
 class SongDataAssetProvider(AssetProvider):
-	def load(self, song_name: str, difficulty: Difficulty) -> dict:
+	def load(self, song_name: str, difficulty: Difficulty) -> Chart:
 		chart_path = (
 			load_pyobj("PATH_DATA") /
 			song_name /
 			f"{song_name}{difficulty.to_song_json_suffix()}.json"
 		)
-		raw = load_json(chart_path, cache=False)
-
-		return SONG_SCHEMA.validate(raw)["song"]
+		return load_chart(chart_path, cache=False)
 
 	def create_cache_key(self, song_name: str, difficulty: Difficulty) -> t.Hashable:
 		return (song_name, difficulty)
 
-	def get_estimated_asset_size(self, item) -> int:
-		return JSONAssetProvider.get_estimated_asset_size(self, item)
+	def get_estimated_asset_size(self, item: Chart) -> int:
+		return item.get_size()
 
 
+_g_load_chart = None
 _g_load_song_data = None
 
 
-def load_song_data(song_name: str, difficulty: Difficulty, *, cache: bool = True) -> dict:
+def load_chart(path: str | Path, *, cache: bool = True) -> Chart:
+	"""
+	Loads and validates the json chart at the given path.
+	"""
+	if _g_load_chart is None:
+		raise RuntimeError("blegh")
+	return _g_load_chart(path, cache=cache)
+
+
+def load_song_data(song_name: str, difficulty: Difficulty, *, cache: bool = True) -> Chart:
 	"""
 	Loads and validates the standard FNF chart of the given
 	difficutly for the given song.
@@ -614,10 +607,11 @@ def load(game: Game) -> ContentPack:
 	Loads everything required to run the base game into the asset
 	system and returns the base game's content pack.
 	"""
-	global _g_load_song_data
+	global _g_load_chart, _g_load_song_data
 
 	asset_dir = Path.cwd() / "assets"
 
+	_g_load_chart = game.assets.register_asset_provider("_pnf_chart", ChartAssetProvider)
 	_g_load_song_data = game.assets.register_complex_asset_provider(
 		"_pnf_song_data", SongDataAssetProvider
 	)
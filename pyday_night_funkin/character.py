@@ -12,7 +12,7 @@ import typing as t
 from pyglet.math import Vec2
 
 from pyday_night_funkin.core.asset_system import (
-	AssetRequest, LoadingRequest, load_frames, load_text
+	AssetRequest, AssetRequestPriority, LoadingRequest, load_frames, load_text
 )
 from pyday_night_funkin.core.pnf_sprite import PNFSprite
 from pyday_night_funkin.enums import AnimationTag
@@ -436,7 +436,8 @@ class BaseGameCharacterKernel(CharacterKernel[Character]):
 			{
 				"frames": [AssetRequest((p,))],
 				"text": [AssetRequest((p2,), may_fail=True)],
-			}
+			},
+			priority = AssetRequestPriority.HIGH,
 		)
 		if self._char_data.game_over_fallback is not None:
 			lreq.add_subrequest(
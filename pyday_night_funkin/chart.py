@@ -0,0 +1,396 @@
+"""
+Song chart validation and the compact chart format.
+Deliberately free of pyglet imports, so it can be run in the asset
+system's worker processes.
+
+Can be run as a script to convert json charts into compiled charts
+that are stored next to them and loaded instead of them as long as the
+json chart stays unchanged:
+``python -m pyday_night_funkin.chart assets/preload/data/*/*.json``
+"""
+
+import argparse
+from array import array
+from collections.abc import Mapping
+import hashlib
+import json
+from pathlib import Path
+import struct
+import sys
+import typing as t
+
+from schema import Schema, SchemaError, And, Or, Optional
+
+
+class SeqValidator:
+	"""
+	Validator for the `schema` library that will only allow lists or
+	tuples where each item matches the schema in the corresponding
+	blueprint. Validates into a tuple.
+	"""
+
+	def __init__(self, *types: t.Any) -> None:
+		self.schemas = tuple(x if isinstance(x, Schema) else Schema(x) for x in types)
+
+	def validate(self, v: t.Any) -> tuple:
+		if not isinstance(v, (list, tuple)):
+			raise SchemaError("Value is not a tuple or list.")
+		if len(v) != len(self.schemas):
+			raise SchemaError(f"Stored sequence of unexpected length: {len(v)}")
+
+		return tuple(s.validate(x) for s, x in zip(self.schemas, v))
+
+
+SONG_SCHEMA = Schema(
+	{
+		"song": {
+			"song": str,
+			"notes": [And(
+				Schema({
+					"lengthInSteps": int,
+					Optional("bpm"): Or(int, float),
+					Optional("changeBPM"): bool,
+					"mustHitSection": bool,
+					"sectionNotes": [SeqValidator(Or(int, float), int, Or(int, float))],
+					Optional("altAnim"): bool,
+					# Keys I've seen that are ignored:
+					# typeOfSection.
+					Optional(str): object,
+				}),
+				lambda d: ("changeBPM" in d) <= ("bpm" in d),
+			)],
+			"bpm": Or(int, float),
+			"needsVoices": bool,
+			"player1": str,
+			"player2": str,
+			"speed": Or(int, float),
+			# Keys I've seen that are ignored:
+			# sections, sectionLengths, validScore.
+			Optional(str): object,
+		},
+	},
+	# Sometimes a very scuffed version of ["song"] also exists at the
+	# root level. how you end up with that spaghetti bs and sleep calmly
+	# knowing it's out in the world is beyond me
+	ignore_extra_keys = True,
+)
+
+
+def validate_song_data(raw: t.Dict) -> t.Dict:
+	"""
+	Validates a song chart's json data against ``SONG_SCHEMA`` and
+	returns its ``"song"`` part.
+	"""
+	return SONG_SCHEMA.validate(raw)["song"]
+
+
+COMPILED_CHART_SUFFIX = ".pnfc"
+
+_CHART_MAGIC = b"PNFC"
+_CHART_VERSION = 1
+# Magic, version, sha1 of the source json, header length, section count, note count and bpm
+# event count.
+_CHART_PREAMBLE = struct.Struct("<4sH20sIIII")
+
+_SECTION_MUST_HIT = 1
+_SECTION_ALT_ANIM = 2
+_SECTION_CHANGE_BPM = 4
+_SECTION_HAS_CHANGE_BPM = 8
+
+# Keys from the json's "song" part that are kept in the compiled chart's header.
+_HEADER_KEYS = ("song", "bpm", "needsVoices", "player1", "player2", "speed")
+
+
+class ChartSection(Mapping):
+	"""
+	Read-only view of a section of a ``Chart``, which behaves like the
+	section's dict in the json chart would.
+	"""
+
+	__slots__ = ("_chart", "_index")
+
+	def __init__(self, chart: "Chart", index: int) -> None:
+		self._chart = chart
+		self._index = index
+
+	def _keys(self) -> t.List[str]:
+		flags = self._chart._section_flags[self._index]
+		keys = ["lengthInSteps", "mustHitSection", "sectionNotes"]
+		if flags & _SECTION_ALT_ANIM:
+			keys.append("altAnim")
+		if flags & _SECTION_HAS_CHANGE_BPM:
+			keys.append("changeBPM")
+		if self._index in self._chart._bpm_events:
+			keys.append("bpm")
+		return keys
+
+	def __getitem__(self, key: str) -> t.Any:
+		chart = self._chart
+		i = self._index
+		flags = chart._section_flags[i]
+		if key == "lengthInSteps":
+			return chart._section_lengths[i]
+		elif key == "mustHitSection":
+			return bool(flags & _SECTION_MUST_HIT)
+		elif key == "sectionNotes":
+			return chart.get_section_notes(i)
+		elif key == "altAnim" and flags & _SECTION_ALT_ANIM:
+			return True
+		elif key == "changeBPM" and flags & _SECTION_HAS_CHANGE_BPM:
+			return bool(flags & _SECTION_CHANGE_BPM)
+		elif key == "bpm" and i in chart._bpm_events:
+			return chart._bpm_events[i]
+		raise KeyError(key)
+
+	def __iter__(self) -> t.Iterator[str]:
+		return iter(self._keys())
+
+	def __len__(self) -> int:
+		return len(self._keys())
+
+
+class Chart(Mapping):
+	"""
+	A song chart stored in a few typed arrays instead of a tree of
+	dicts and lists, which takes up a fraction of the memory.
+	Behaves like the ``"song"`` part of a json chart (as returned by
+	``validate_song_data``), sections being created on access.
+	"""
+
+	def __init__(
+		self,
+		header: t.Dict[str, t.Any],
+		section_lengths: array,
+		section_flags: array,
+		section_note_offsets: array,
+		note_times: array,
+		note_lanes: array,
+		note_sustains: array,
+		bpm_events: t.Dict[int, float],
+	) -> None:
+		self._header = header
+		self._section_lengths = section_lengths
+		self._section_flags = section_flags
+		self._section_note_offsets = section_note_offsets
+		"""
+		Index of each section's first note in the note arrays, with
+		one more entry containing the total note count.
+		"""
+		self._note_times = note_times
+		self._note_lanes = note_lanes
+		self._note_sustains = note_sustains
+		self._bpm_events = bpm_events
+		"""Maps indices of sections that contain a bpm to it."""
+		self._sections: t.Optional[t.Tuple[ChartSection, ...]] = None
+
+	@property
+	def section_count(self) -> int:
+		return len(self._section_lengths)
+
+	def get_section(self, index: int) -> ChartSection:
+		if not 0 <= index < len(self._section_lengths):
+			raise IndexError("Section index out of range")
+		return ChartSection(self, index)
+
+	def get_section_notes(self, index: int) -> t.List[t.Tuple[float, int, float]]:
+		"""
+		Returns the notes of the given section as (time, lane,
+		sustain length) tuples.
+		"""
+		start = self._section_note_offsets[index]
+		end = self._section_note_offsets[index + 1]
+		return list(zip(
+			self._note_times[start:end], self._note_lanes[start:end], self._note_sustains[start:end]
+		))
+
+	def get_size(self) -> int:
+		"""
+		Returns the approximate amount of memory the chart occupies.
+		"""
+		return sys.getsizeof(self) + sum(
+			sys.getsizeof(a) for a in (
+				self._header, self._section_lengths, self._section_flags,
+				self._section_note_offsets, self._note_times, self._note_lanes,
+				self._note_sustains, self._bpm_events,
+			)
+		) + sum(sys.getsizeof(v) for v in self._header.values())
+
+	def __getitem__(self, key: str) -> t.Any:
+		if key == "notes":
+			if self._sections is None:
+				self._sections = tuple(ChartSection(self, i) for i in range(self.section_count))
+			return self._sections
+		return self._header[key]
+
+	def __iter__(self) -> t.Iterator[str]:
+		yield from self._header
+		yield "notes"
+
+	def __len__(self) -> int:
+		return len(self._header) + 1
+
+	@classmethod
+	def from_song_data(cls, song_data: t.Dict[str, t.Any]) -> "Chart":
+		"""
+		Creates a chart from the validated ``"song"`` part of a json
+		chart.
+		"""
+		header = {k: song_data[k] for k in _HEADER_KEYS}
+		section_lengths = array("i")
+		section_flags = array("B")
+		section_note_offsets = array("I", (0,))
+		note_times = array("d")
+		note_lanes = array("i")
+		note_sustains = array("d")
+		bpm_events = {}
+
+		for i, section in enumerate(song_data["notes"]):
+			flags = _SECTION_MUST_HIT if section["mustHitSection"] else 0
+			if section.get("altAnim", False):
+				flags |= _SECTION_ALT_ANIM
+			if "changeBPM" in section:
+				flags |= _SECTION_HAS_CHANGE_BPM
+				if section["changeBPM"]:
+					flags |= _SECTION_CHANGE_BPM
+			if "bpm" in section:
+				bpm_events[i] = section["bpm"]
+
+			section_lengths.append(section["lengthInSteps"])
+			section_flags.append(flags)
+			for time_, lane, sustain in section["sectionNotes"]:
+				note_times.append(time_)
+				note_lanes.append(lane)
+				note_sustains.append(sustain)
+			section_note_offsets.append(len(note_times))
+
+		return cls(
+			header, section_lengths, section_flags, section_note_offsets, note_times,
+			note_lanes, note_sustains, bpm_events,
+		)
+
+	def to_bytes(self, checksum: bytes) -> bytes:
+		"""
+		Serializes the chart, noting ``checksum`` as the checksum of
+		the json chart it was created from. See ``chart_checksum``.
+		"""
+		header = json.dumps(self._header, separators=(",", ":")).encode("utf-8")
+		bpm_sections = array("I", self._bpm_events.keys())
+		bpm_values = array("d", self._bpm_events.values())
+		arrays = (
+			self._section_lengths, self._section_flags, self._section_note_offsets,
+			self._note_times, self._note_lanes, self._note_sustains, bpm_sections, bpm_values,
+		)
+		if sys.byteorder == "big":
+			arrays = tuple(array(a.typecode, a) for a in arrays)
+			for a in arrays:
+				a.byteswap()
+
+		return b"".join((
+			_CHART_PREAMBLE.pack(
+				_CHART_MAGIC, _CHART_VERSION, checksum, len(header), len(self._section_lengths),
+				len(self._note_times), len(bpm_sections),
+			),
+			header,
+			*(a.tobytes() for a in arrays),
+		))
+
+	@classmethod
+	def from_bytes(
+		cls, data: t.Union[bytes, memoryview], checksum: t.Optional[bytes] = None
+	) -> t.Optional["Chart"]:
+		"""
+		Deserializes a chart created by ``to_bytes``.
+		Returns ``None`` if ``data`` is not a compiled chart of this
+		version or if ``checksum`` is given and does not match the one
+		stored in it.
+		"""
+		# Release the view explicitly, `data` may be a memory map that is about to be closed.
+		with memoryview(data) as view:
+			return cls._from_view(view, checksum)
+
+	@classmethod
+	def _from_view(cls, data: memoryview, checksum: t.Optional[bytes]) -> t.Optional["Chart"]:
+		if len(data) < _CHART_PREAMBLE.size:
+			return None
+
+		magic, version, stored_checksum, header_len, n_sections, n_notes, n_bpm = (
+			_CHART_PREAMBLE.unpack_from(data)
+		)
+		if (
+			magic != _CHART_MAGIC or
+			version != _CHART_VERSION or
+			(checksum is not None and checksum != stored_checksum)
+		):
+			return None
+
+		offset = _CHART_PREAMBLE.size
+		try:
+			header = json.loads(bytes(data[offset:offset + header_len]))
+		except ValueError:
+			return None
+		offset += header_len
+
+		arrays = []
+		for typecode, count in (
+			("i", n_sections), ("B", n_sections), ("I", n_sections + 1),
+			("d", n_notes), ("i", n_notes), ("d", n_notes), ("I", n_bpm), ("d", n_bpm),
+		):
+			a = array(typecode)
+			end = offset + a.itemsize * count
+			if end > len(data):
+				return None
+			a.frombytes(data[offset:end])
+			if sys.byteorder == "big":
+				a.byteswap()
+			arrays.append(a)
+			offset = end
+
+		*section_arrays, bpm_sections, bpm_values = arrays
+		return cls(header, *section_arrays, dict(zip(bpm_sections, bpm_values)))
+
+
+def chart_checksum(raw: t.Union[bytes, memoryview]) -> bytes:
+	"""
+	Returns the checksum compiled charts store of the json chart they
+	were compiled from.
+	"""
+	return hashlib.sha1(raw).digest()
+
+
+def compile_chart(raw: t.Union[bytes, memoryview]) -> bytes:
+	"""
+	Parses and validates a json chart and returns it as a serialized
+	``Chart``.
+	"""
+	return Chart.from_song_data(validate_song_data(json.loads(bytes(raw)))).to_bytes(
+		chart_checksum(raw)
+	)
+
+
+def main() -> int:
+	argparser = argparse.ArgumentParser(
+		description = (
+			f"Compiles json charts into {COMPILED_CHART_SUFFIX} files next to them, which "
+			f"PNF loads instead as long as the json chart stays unchanged."
+		)
+	)
+	argparser.add_argument("charts", nargs="+", type=Path)
+	result = argparser.parse_args()
+
+	failed = 0
+	for path in result.charts:
+		try:
+			compiled = compile_chart(path.read_bytes())
+		except (OSError, ValueError, SchemaError) as e:
+			print(f"Failed compiling {path}: {e}", file=sys.stderr)
+			failed += 1
+			continue
+
+		path.with_suffix(COMPILED_CHART_SUFFIX).write_bytes(compiled)
+
+	print(f"Done. {len(result.charts) - failed} of {len(result.charts)} charts compiled.")
+	return 1 if failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
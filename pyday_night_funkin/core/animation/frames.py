@@ -1,4 +1,6 @@
 
+from array import array
+from bisect import bisect_left
 import typing as t
 
 from pyglet.math import Vec2
@@ -49,11 +51,31 @@ class FrameCollection:
 	A frame collection is really just a list and a dict for storing
 	`AnimationFrame`s in a way that makes sense for the animation
 	system.
+	Frames added from a texture atlas via `add_atlas_frames` are only
+	kept as compact arrays until they are first accessed, which is
+	when their `AnimationFrame` and texture region are created.
 	"""
 
 	def __init__(self) -> None:
-		self.frames: t.List[AnimationFrame] = []
+		self._frames: t.List[t.Optional[AnimationFrame]] = []
+		"""
+		The frames, ``None`` for atlas frames that weren't accessed
+		yet.
+		"""
+		self._names: t.List[t.Optional[str]] = []
+		self._rects = array("i")
+		"""X, y, width and height of each atlas frame's region."""
+		self._frame_rects = array("i")
+		"""Offset x, y and source width and height of each atlas frame."""
+		self._atlas: t.Optional["Texture"] = None
+		self._region_cache: t.Dict[t.Tuple[int, int, int, int], "Texture"] = {}
+		"""Regions of the atlas created so far, as frames may share them."""
 		self._index_map: t.Dict[AnimationFrame, int] = {}
+		self._name_index: t.Optional[t.List[t.Tuple[str, int]]] = None
+		"""
+		Names and indices of all named frames, sorted by name so
+		prefix lookups can bisect it. Built on first use.
+		"""
 
 	def add_frame(
 		self,
@@ -67,8 +89,97 @@ class FrameCollection:
 		it to this `FrameCollection`.
 		"""
 		frame = AnimationFrame(texture, offset, source_size, name)
-		self._index_map[frame] = len(self.frames)
-		self.frames.append(frame)
+		self._index_map[frame] = len(self._frames)
+		self._frames.append(frame)
+		self._names.append(name)
+		self._rects.extend((0, 0, 0, 0))
+		self._frame_rects.extend((0, 0, 0, 0))
+		self._name_index = None
+
+	def add_atlas_frames(
+		self,
+		atlas: "Texture",
+		records: t.Iterable[t.Sequence[t.Any]],
+	) -> None:
+		"""
+		Adds frames cut out of ``atlas`` to this `FrameCollection`.
+		``records`` contains a sequence of name, x, y, width, height
+		and the frame x, y, width and height for each frame, with
+		coordinates being relative to the atlas' top left corner. The
+		frame values may be ``None`` if the frame isn't trimmed.
+		A `FrameCollection` can only take frames from one atlas.
+		"""
+		if self._atlas is not None and self._atlas is not atlas:
+			raise ValueError("FrameCollection already contains frames of another atlas.")
+		self._atlas = atlas
+
+		for name, x, y, w, h, fx, fy, fw, fh in records:
+			self._frames.append(None)
+			self._names.append(name)
+			self._rects.extend((x, y, w, h))
+			if fx is None:
+				self._frame_rects.extend((0, 0, w, h))
+			else:
+				self._frame_rects.extend((-fx, -fy, fw, fh))
+		self._name_index = None
+
+	def _materialize(self, i: int) -> AnimationFrame:
+		x, y, w, h = self._rects[i*4 : i*4 + 4]
+		region_key = (x, y, w, h)
+		if (region := self._region_cache.get(region_key)) is None:
+			atlas = self._atlas
+			region = atlas.get_region(x, atlas.height - h - y, w, h)
+			self._region_cache[region_key] = region
+
+		ox, oy, sw, sh = self._frame_rects[i*4 : i*4 + 4]
+		frame = AnimationFrame(region, Vec2(ox, oy), Vec2(sw, sh), self._names[i])
+		self._frames[i] = frame
+		self._index_map[frame] = i
+		return frame
+
+	@property
+	def frames(self) -> t.List[AnimationFrame]:
+		"""
+		All frames of this `FrameCollection`. Creates the ones that
+		weren't accessed yet, prefer indexing or the prefix methods.
+		"""
+		for i, frame in enumerate(self._frames):
+			if frame is None:
+				self._materialize(i)
+		return self._frames
+
+	def update_from(self, other: "FrameCollection") -> None:
+		"""
+		Makes this `FrameCollection` take on the frames of `other`.
+		Frames that were already accessed and have a frame of the same
+		name at the same index in `other` take on its texture, offset
+		and dimensions, so animations and sprites holding onto them
+		pick up the changes as well.
+		"""
+		old_frames = self._frames
+		old_names = self._names
+
+		self._frames = other._frames.copy()
+		self._names = other._names.copy()
+		self._rects = other._rects[:]
+		self._frame_rects = other._frame_rects[:]
+		self._atlas = other._atlas
+		self._region_cache = other._region_cache.copy()
+		self._name_index = None
+
+		for i, old_frame in enumerate(old_frames):
+			if old_frame is None or i >= len(self._names) or self._names[i] != old_names[i]:
+				continue
+
+			new_frame = self[i]
+			old_frame.texture = new_frame.texture
+			old_frame.offset = new_frame.offset
+			old_frame.source_dimensions = new_frame.source_dimensions
+			self._frames[i] = old_frame
+
+		self._index_map = {
+			frame: i for i, frame in enumerate(self._frames) if frame is not None
+		}
 
 	def index_of(self, frame: AnimationFrame) -> int:
 		"""
@@ -79,15 +190,30 @@ class FrameCollection:
 			raise KeyError("Frame unknown to FrameCollection.")
 		return self._index_map[frame]
 
+	def _find_indices_by_prefix(self, prefix: str) -> t.List[int]:
+		if self._name_index is None:
+			self._name_index = sorted(
+				(name, i) for i, name in enumerate(self._names) if name is not None
+			)
+
+		name_index = self._name_index
+		res = []
+		for j in range(bisect_left(name_index, (prefix, -1)), len(name_index)):
+			name, i = name_index[j]
+			if not name.startswith(prefix):
+				break
+			res.append(i)
+
+		# Keep them in collection order
+		res.sort()
+		return res
+
 	def collect_by_prefix(self, prefix: str) -> t.List[t.Tuple[AnimationFrame, int]]:
 		"""
 		Returns all `AnimationFrame`s whose name starts with the given
 		prefix, as well as their frame designation in a list of tuples.
 		"""
-		prefix_candidates = [
-			frame for frame in self.frames
-			if frame.name is not None and frame.name.startswith(prefix)
-		]
+		prefix_candidates = [self[i] for i in self._find_indices_by_prefix(prefix)]
 		if not prefix_candidates:
 			raise ValueError(f"No frames with prefix {prefix!r} found.")
 
@@ -111,4 +237,9 @@ class FrameCollection:
 		return [f for (f, _) in sorted(self.collect_by_prefix(prefix), key=lambda x: x[1])]
 
 	def __getitem__(self, i: int) -> AnimationFrame:
-		return self.frames[i]
+		if (frame := self._frames[i]) is None:
+			frame = self._materialize(i if i >= 0 else i + len(self._frames))
+		return frame
+
+	def __len__(self) -> int:
+		return len(self._frames)
@@ -0,0 +1,435 @@
+"""
+Read-only access to assets packed into zip archives.
+
+Archives are mounted at their own path: the member ``images/a.png`` of
+``assets.zip`` is reachable as ``assets.zip/images/a.png``. The
+functions in here accept such paths as well as regular ones, so asset
+providers can use them without caring where an asset is stored.
+
+The archive's central directory is read once when it's mounted. The
+file is memory-mapped, so members that are stored uncompressed can be
+handed out without being copied.
+
+Can be run as a script to pack a directory into an archive, storing
+already compressed files and packed textures uncompressed:
+``python -m pyday_night_funkin.core.asset_archive assets assets.zip``
+"""
+
+import argparse
+import io
+import mmap
+import os
+from pathlib import Path
+import posixpath
+import struct
+import sys
+import threading
+import typing as t
+import zipfile
+import zlib
+
+
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_LOCAL_HEADER_MAGIC = b"PK\x03\x04"
+
+_STORED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".ogg", ".mp3", ".pnftex")
+"""
+Extensions of files that compress badly or are meant to be read
+straight out of the mapped archive, and are thus packed uncompressed.
+"""
+
+
+class AssetArchiveError(OSError):
+	pass
+
+
+class MemberReader(io.RawIOBase):
+	"""
+	Read-only binary file over a buffer. Exposes the buffer through
+	``getbuffer`` like ``io.BytesIO`` does, without copying it.
+	"""
+
+	def __init__(self, buffer: t.Union[bytes, memoryview]) -> None:
+		super().__init__()
+		self._buffer = memoryview(buffer)
+		self._pos = 0
+
+	def getbuffer(self) -> memoryview:
+		return self._buffer
+
+	def readable(self) -> bool:
+		return True
+
+	def seekable(self) -> bool:
+		return True
+
+	def tell(self) -> int:
+		return self._pos
+
+	def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+		if whence == io.SEEK_SET:
+			pos = offset
+		elif whence == io.SEEK_CUR:
+			pos = self._pos + offset
+		elif whence == io.SEEK_END:
+			pos = len(self._buffer) + offset
+		else:
+			raise ValueError(f"Invalid whence {whence}")
+
+		if pos < 0:
+			raise ValueError("Negative seek position")
+		self._pos = pos
+		return pos
+
+	def readinto(self, b) -> int:
+		data = self._buffer[self._pos:self._pos + len(b)]
+		n = len(data)
+		b[:n] = data
+		self._pos += n
+		return n
+
+	def readall(self) -> bytes:
+		data = bytes(self._buffer[self._pos:])
+		self._pos = len(self._buffer)
+		return data
+
+
+class AssetArchive:
+	"""
+	A zip archive whose central directory has been read into memory.
+	"""
+
+	def __init__(self, path: t.Union[str, Path]) -> None:
+		self.path = os.path.abspath(path)
+
+		try:
+			self._zip_file = zipfile.ZipFile(self.path)
+		except zipfile.BadZipFile as e:
+			raise AssetArchiveError(f"Not a valid archive: {self.path!r}") from e
+
+		self.mtime_ns = os.stat(self.path).st_mtime_ns
+
+		with open(self.path, "rb") as f:
+			# Copy-on-write, so ctypes objects can be created from stored members. They're
+			# never written to.
+			self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+		self._view = memoryview(self._mmap)
+
+		self._members: t.Dict[str, zipfile.ZipInfo] = {}
+		self._directories: t.Set[str] = set()
+		for info in self._zip_file.infolist():
+			name = info.filename.rstrip("/")
+			if info.is_dir():
+				self._directories.add(name)
+				continue
+
+			self._members[name] = info
+			# Not all archives contain entries for the directories
+			parent = posixpath.dirname(name)
+			while parent and parent not in self._directories:
+				self._directories.add(parent)
+				parent = posixpath.dirname(parent)
+
+		self._data_offsets: t.Dict[str, int] = {}
+
+	def get_names(self) -> t.KeysView[str]:
+		"""
+		Returns the names of all files in the archive.
+		"""
+		return self._members.keys()
+
+	def is_file(self, name: str) -> bool:
+		return name in self._members
+
+	def is_dir(self, name: str) -> bool:
+		return name == "" or name in self._directories
+
+	def get_size(self, name: str) -> int:
+		return self._get_info(name).file_size
+
+	def _get_info(self, name: str) -> zipfile.ZipInfo:
+		if (info := self._members.get(name)) is None:
+			raise FileNotFoundError(f"No member {name!r} in {self.path!r}")
+		return info
+
+	def _get_data_offset(self, info: zipfile.ZipInfo) -> int:
+		if (offset := self._data_offsets.get(info.filename)) is not None:
+			return offset
+
+		# The extra field of the local header may differ from the central directory's.
+		try:
+			magic, *_, name_len, extra_len = _LOCAL_HEADER.unpack_from(
+				self._view, info.header_offset
+			)
+		except struct.error as e:
+			raise AssetArchiveError(f"Truncated archive: {self.path!r}") from e
+		if magic != _LOCAL_HEADER_MAGIC:
+			raise AssetArchiveError(f"Bad local header for {info.filename!r} in {self.path!r}")
+
+		offset = info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+		self._data_offsets[info.filename] = offset
+		return offset
+
+	def read(self, name: str) -> t.Union[bytes, memoryview]:
+		"""
+		Returns the contents of a member. Members stored uncompressed
+		are returned as a writable, copy-on-write view into the mapped
+		archive.
+		"""
+		info = self._get_info(name)
+		if info.flag_bits & 0x1:
+			raise AssetArchiveError(f"Member {name!r} of {self.path!r} is encrypted")
+
+		if info.compress_type == zipfile.ZIP_STORED:
+			start = self._get_data_offset(info)
+			return self._view[start:start + info.file_size]
+
+		if info.compress_type == zipfile.ZIP_DEFLATED:
+			start = self._get_data_offset(info)
+			return zlib.decompress(self._view[start:start + info.compress_size], -15)
+
+		# Leave rarer compression methods to zipfile, which is slower as it has to
+		# serialize access to its file handle.
+		with self._zip_file.open(info) as f:
+			return f.read()
+
+	def close(self) -> None:
+		self._zip_file.close()
+		self._view.release()
+		try:
+			self._mmap.close()
+		except BufferError:
+			# Views are still handed out, the map will be closed once they're gone.
+			pass
+
+
+_mounted_archives: t.Dict[str, AssetArchive] = {}
+_mount_lock = threading.Lock()
+
+
+def mount(path: t.Union[str, Path]) -> AssetArchive:
+	"""
+	Mounts the archive at ``path``, making its members available to the
+	functions of this module. Returns the archive; mounting an archive
+	that is already mounted returns the existing one.
+	"""
+	abs_path = os.path.abspath(path)
+	with _mount_lock:
+		if (archive := _mounted_archives.get(abs_path)) is None:
+			archive = AssetArchive(abs_path)
+			_mounted_archives[abs_path] = archive
+	return archive
+
+
+def unmount(path: t.Union[str, Path]) -> None:
+	"""
+	Unmounts the archive at ``path``, if it is mounted.
+	"""
+	with _mount_lock:
+		archive = _mounted_archives.pop(os.path.abspath(path), None)
+	if archive is not None:
+		archive.close()
+
+
+def _split_path(path: str, root: str) -> t.Optional[str]:
+	if not path.startswith(root) or len(path) == len(root):
+		return None if path != root else ""
+
+	if path[len(root)] not in ("/", os.sep):
+		return None
+
+	member = path[len(root) + 1:]
+	if os.sep != "/":
+		member = member.replace(os.sep, "/")
+	return posixpath.normpath(member)
+
+
+def find(path: t.Union[str, Path]) -> t.Optional[t.Tuple[AssetArchive, str]]:
+	"""
+	If ``path`` points into a mounted archive, returns that archive and
+	the name of the member it refers to. Otherwise, returns ``None``.
+	"""
+	path = str(path)
+	# Just iterating, the amount of mounted archives is small.
+	for root, archive in tuple(_mounted_archives.items()):
+		if (member := _split_path(path, root)) is not None:
+			return archive, member
+	return None
+
+
+def _find_or_mount(path: str) -> t.Optional[t.Tuple[AssetArchive, str]]:
+	"""
+	Like ``find``, but also looks for an archive among the parents of
+	``path`` and mounts it. This allows processes that don't know which
+	archives the main process mounted, such as asset workers, to still
+	read from them.
+	Only called after ``path`` could not be opened regularly.
+	"""
+	if (res := find(path)) is not None:
+		return res
+
+	parent = os.path.dirname(path)
+	while parent and parent != os.path.dirname(parent):
+		if os.path.isfile(parent):
+			if not zipfile.is_zipfile(parent):
+				return None
+			try:
+				archive = mount(parent)
+			except OSError:
+				return None
+			return archive, _split_path(path, archive.path)
+		parent = os.path.dirname(parent)
+
+	return None
+
+
+def read_asset(path: t.Union[str, Path]) -> t.Union[bytes, memoryview]:
+	"""
+	Returns the contents of the file at ``path``, which may point into
+	an archive. Uncompressed archive members are not copied.
+	"""
+	path = str(path)
+	if (res := find(path)) is not None:
+		return res[0].read(res[1])
+
+	try:
+		with open(path, "rb") as f:
+			return f.read()
+	except (FileNotFoundError, NotADirectoryError):
+		if (res := _find_or_mount(path)) is None:
+			raise
+		return res[0].read(res[1])
+
+
+def open_asset(path: t.Union[str, Path]) -> t.BinaryIO:
+	"""
+	Opens the file at ``path``, which may point into an archive, for
+	binary reading.
+	"""
+	path = str(path)
+	if (res := find(path)) is not None:
+		return MemberReader(res[0].read(res[1]))
+
+	try:
+		return open(path, "rb")
+	except (FileNotFoundError, NotADirectoryError):
+		if (res := _find_or_mount(path)) is None:
+			raise
+		return MemberReader(res[0].read(res[1]))
+
+
+def open_text_asset(path: t.Union[str, Path], encoding: str = "utf-8") -> t.TextIO:
+	"""
+	Opens the file at ``path``, which may point into an archive, for
+	text reading.
+	"""
+	f = open_asset(path)
+	if isinstance(f, MemberReader):
+		f = io.BufferedReader(f)
+	return io.TextIOWrapper(f, encoding=encoding)
+
+
+def map_asset(path: t.Union[str, Path]) -> t.Optional[t.Union[mmap.mmap, memoryview, bytearray]]:
+	"""
+	Returns a writable buffer of the file at ``path`` that may be
+	used to create ctypes objects from. Regular files are mapped
+	copy-on-write, as are uncompressed archive members.
+	Returns ``None`` if the file does not exist.
+	Pass the buffer to ``release_buffer`` when done with it.
+	"""
+	path = str(path)
+	if (res := find(path)) is not None:
+		archive, member = res
+		if not archive.is_file(member):
+			return None
+		data = archive.read(member)
+		return data if isinstance(data, memoryview) else bytearray(data)
+
+	try:
+		with open(path, "rb") as f:
+			return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+	except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+		return None
+
+
+def release_buffer(buffer: t.Union[mmap.mmap, memoryview, bytearray]) -> None:
+	"""
+	Releases a buffer returned by ``map_asset``.
+	"""
+	if isinstance(buffer, mmap.mmap):
+		buffer.close()
+	elif isinstance(buffer, memoryview):
+		buffer.release()
+
+
+def is_archived(path: t.Union[str, Path]) -> bool:
+	"""
+	Whether ``path`` points into a mounted archive.
+	"""
+	return find(path) is not None
+
+
+def stat_asset(path: t.Union[str, Path]) -> t.Optional[t.Tuple[int, int]]:
+	"""
+	Returns the modification time in nanoseconds and size of the file
+	at ``path``, or ``None`` if it doesn't exist. Archive members
+	report the archive's modification time.
+	"""
+	if (res := find(path)) is not None:
+		archive, member = res
+		if not archive.is_file(member):
+			return None
+		return archive.mtime_ns, archive.get_size(member)
+
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None
+	return st.st_mtime_ns, st.st_size
+
+
+def pack_directory(directory: Path, archive_path: Path) -> int:
+	"""
+	Packs all files below ``directory`` into a zip archive at
+	``archive_path``. Returns the amount of packed files.
+	"""
+	count = 0
+	tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+	skipped = {os.path.abspath(archive_path), os.path.abspath(tmp_path)}
+	with zipfile.ZipFile(tmp_path, "w") as zf:
+		for root, _, files in os.walk(directory):
+			for file_name in sorted(files):
+				source_path = os.path.join(root, file_name)
+				if os.path.abspath(source_path) in skipped:
+					continue
+				name = os.path.relpath(source_path, directory).replace(os.sep, "/")
+				stored = os.path.splitext(file_name)[1].lower() in _STORED_EXTENSIONS
+				zf.write(
+					source_path,
+					name,
+					zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED,
+				)
+				count += 1
+	os.replace(tmp_path, archive_path)
+	return count
+
+
+def main() -> int:
+	argparser = argparse.ArgumentParser(
+		description = "Packs a directory into an archive PNF can load assets from."
+	)
+	argparser.add_argument("directory", type=Path)
+	argparser.add_argument("archive", type=Path)
+	result = argparser.parse_args()
+
+	if not result.directory.is_dir():
+		print(f"Not a directory: {result.directory}", file=sys.stderr)
+		return 1
+
+	count = pack_directory(result.directory, result.archive)
+	print(f"Done. {count} files packed into {result.archive}.")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Small content-addressed on-disk cache that asset providers can use to
+store the results of expensive decoding work across game launches.
+"""
+
+import hashlib
+import mmap
+import os
+from pathlib import Path
+import shutil
+import threading
+import typing as t
+
+from loguru import logger
+
+from pyday_night_funkin.core import asset_archive
+
+
+DEFAULT_MAX_SIZE = 2**30 # 1GiB
+
+
+class DiskCache:
+	"""
+	Stores blobs on disk, keyed by a namespace, a version number, a
+	source file's path, modification time and size and an optional
+	variant string.
+	Once a source file changes, the entry derived from its old state
+	is simply never hit again. It will be deleted once the cache grows
+	larger than ``max_size`` bytes, which happens to the least
+	recently used entries first.
+	"""
+
+	def __init__(self, directory: t.Union[str, Path], max_size: int = DEFAULT_MAX_SIZE) -> None:
+		self._directory = Path(directory)
+		self._directory.mkdir(parents=True, exist_ok=True)
+
+		self.max_size = max_size
+		"""
+		Size in bytes the cache's entries may take up before the least
+		recently used ones are deleted.
+		"""
+
+		self._tmp_counter = 0
+		self._tmp_counter_lock = threading.Lock()
+
+		self._size: t.Optional[int] = None
+		"""
+		Size of the cache's entries in bytes. ``None`` until the first
+		entry is written, which measures it, so creating the cache does
+		not have to walk its directory.
+		"""
+		self._size_lock = threading.Lock()
+		self._pruning = False
+
+	@property
+	def directory(self) -> Path:
+		return self._directory
+
+	def _get_entry_path(
+		self, namespace: str, version: int, source_path: str, variant: str
+	) -> t.Optional[Path]:
+		if (st := asset_archive.stat_asset(source_path)) is None:
+			return None
+
+		mtime_ns, size = st
+		digest = hashlib.sha1(
+			f"{version}\0{os.path.abspath(source_path)}\0{mtime_ns}\0{size}\0{variant}"
+				.encode("utf-8", "surrogateescape")
+		).hexdigest()
+		return self._directory / namespace / digest
+
+	def get(
+		self,
+		namespace: str,
+		version: int,
+		source_path: str,
+		writable: bool = False,
+		variant: str = "",
+	) -> t.Optional[mmap.mmap]:
+		"""
+		Returns a read-only memory map of the entry stored for the
+		given source file and variant, or ``None`` if no such entry
+		exists.
+		If ``writable`` is given, the map will be a copy-on-write one
+		instead, which is required to create ctypes objects from it.
+		The caller is responsible for closing the map.
+		"""
+		entry_path = self._get_entry_path(namespace, version, source_path, variant)
+		if entry_path is None:
+			return None
+
+		try:
+			with open(entry_path, "rb") as f:
+				mm = mmap.mmap(
+					f.fileno(), 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ
+				)
+		except (OSError, ValueError):
+			# ValueError is raised for empty files, which can't be mapped.
+			return None
+
+		# Pruning goes by modification time, so mark the entry as recently used.
+		try:
+			os.utime(entry_path)
+		except OSError:
+			pass
+
+		return mm
+
+	def put(
+		self,
+		namespace: str,
+		version: int,
+		source_path: str,
+		*chunks: t.Union[bytes, bytearray, memoryview],
+		variant: str = "",
+	) -> None:
+		"""
+		Stores the concatenation of ``chunks`` as the entry for the
+		given source file and variant.
+		Failures are logged and otherwise ignored; the cache is purely
+		an optimization.
+		"""
+		entry_path = self._get_entry_path(namespace, version, source_path, variant)
+		if entry_path is None:
+			return
+
+		with self._tmp_counter_lock:
+			self._tmp_counter += 1
+			tmp_path = entry_path.with_name(
+				f"{entry_path.name}.{os.getpid()}.{self._tmp_counter}.tmp"
+			)
+
+		written = 0
+		try:
+			entry_path.parent.mkdir(parents=True, exist_ok=True)
+			with open(tmp_path, "wb") as f:
+				for chunk in chunks:
+					written += f.write(chunk)
+			# Atomic, so concurrent readers will never see half-written entries.
+			os.replace(tmp_path, entry_path)
+		except OSError as e:
+			logger.warning(f"Failed writing disk cache entry for {source_path!r}: {e}")
+			try:
+				os.remove(tmp_path)
+			except OSError:
+				pass
+			return
+
+		with self._size_lock:
+			if self._pruning:
+				# The running prune may miss this entry. The size is then a little low
+				# until the next prune, which is harmless.
+				return
+			if self._size is not None:
+				# An overwritten entry is counted twice until the next prune, which is harmless.
+				self._size += written
+				if self._size <= self.max_size:
+					return
+			# Either over the limit or the size hasn't been measured yet, which pruning does.
+			self._pruning = True
+
+		try:
+			self.prune()
+		finally:
+			self._pruning = False
+
+	def prune(self) -> None:
+		"""
+		Deletes the least recently used entries until the cache takes
+		up no more than three quarters of ``max_size``, if it exceeds
+		``max_size`` at all.
+		"""
+		entries = []
+		size = 0
+		for ns_dir in self._directory.iterdir():
+			if not ns_dir.is_dir():
+				continue
+			for p in ns_dir.iterdir():
+				try:
+					st = p.stat()
+				except OSError:
+					continue
+				if p.suffix != ".tmp":
+					entries.append((st.st_mtime_ns, st.st_size, p))
+				size += st.st_size
+
+		if size > self.max_size:
+			target = self.max_size * 3 // 4
+			entries.sort(key=lambda x: x[0])
+			pruned = 0
+			for _, entry_size, p in entries:
+				if size <= target:
+					break
+				try:
+					p.unlink()
+				except OSError:
+					continue
+				size -= entry_size
+				pruned += 1
+			logger.info(f"Pruned {pruned} disk cache entries")
+
+		with self._size_lock:
+			self._size = size
+
+	def clear(self) -> None:
+		"""
+		Deletes all entries of this cache.
+		"""
+		for p in self._directory.iterdir():
+			if p.is_dir():
+				shutil.rmtree(p, ignore_errors=True)
+
+		with self._size_lock:
+			self._size = 0
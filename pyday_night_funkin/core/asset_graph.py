@@ -0,0 +1,413 @@
+"""
+Keeps track of how assets were requested, which assets they loaded as
+their dependencies and which assets scenes ended up requesting in
+total, across sessions. It also keeps a snapshot of how much each
+asset was used, which is used to warm up the cache on launch.
+
+The asset system uses this to plan loading requests that fetch all
+assets of a scene in one wide wave, instead of only discovering the
+dependencies of an asset once it has been loaded.
+"""
+
+import enum
+import importlib
+import json
+import os
+from pathlib import Path, PurePath
+import sys
+import threading
+import typing as t
+
+from loguru import logger
+
+
+AssetIdentifier = t.Tuple[str, t.Hashable]
+
+
+_ASSET_GRAPH_VERSION = 3
+
+_USAGE_DECAY = 0.5
+"""
+Factor usage scores of previous sessions are multiplied with whenever
+a new session's usage is recorded.
+"""
+
+_USAGE_MIN_SCORE = 0.1
+"""Usage entries decaying below this score are forgotten."""
+
+
+class AssetNode:
+	"""
+	An asset as it was last loaded.
+	"""
+
+	__slots__ = ("args", "kwargs", "dependencies")
+
+	def __init__(
+		self,
+		args: t.Tuple[t.Any, ...],
+		kwargs: t.Dict[str, t.Any],
+		dependencies: t.Sequence[AssetIdentifier],
+	) -> None:
+		self.args = args
+		"""Arguments the asset type's loader was called with."""
+
+		self.kwargs = kwargs
+		"""Keyword arguments the asset type's loader was called with."""
+
+		self.dependencies = dependencies
+		"""Identifiers of the assets it loaded while being loaded."""
+
+
+class PlannedAsset(t.NamedTuple):
+	"""
+	An asset a loading plan contains.
+	"""
+	identifier: AssetIdentifier
+	args: t.Tuple[t.Any, ...]
+	kwargs: t.Dict[str, t.Any]
+	priority: int
+	"""
+	Priority of the most important asset requested by the plan that
+	(transitively) requires this one.
+	"""
+
+
+class AssetUsage(t.NamedTuple):
+	"""
+	How much an asset was used over the recorded sessions.
+	"""
+	score: float
+	"""
+	Amount of times the asset was requested, with requests from
+	older sessions weighing less.
+	"""
+	size: int
+	"""Most recently estimated memory the asset takes up, in bytes."""
+
+
+class AssetGraph:
+	"""
+	A graph of asset dependencies and the assets loading plans have
+	requested. Thread-safe.
+	"""
+
+	def __init__(self) -> None:
+		self._nodes: t.Dict[AssetIdentifier, AssetNode] = {}
+		self._plans: t.Dict[t.Hashable, t.Dict[AssetIdentifier, int]] = {}
+		"""
+		Maps plan keys to the assets requested under them and the
+		priority they were requested with.
+		"""
+		self._usage: t.Dict[AssetIdentifier, AssetUsage] = {}
+		self._lock = threading.Lock()
+		self._modified = False
+
+	def record_asset(
+		self,
+		identifier: AssetIdentifier,
+		args: t.Tuple[t.Any, ...],
+		kwargs: t.Dict[str, t.Any],
+		dependencies: t.Optional[t.Sequence[AssetIdentifier]] = None,
+	) -> None:
+		"""
+		Records that the asset of the given identifier is created by
+		calling its type's loader with ``args`` and ``kwargs`` and
+		depends on ``dependencies``.
+		Previously recorded dependencies are kept, as dependencies that
+		were already cached when the asset was loaded are not noticed
+		by the asset system.
+		"""
+		with self._lock:
+			if (existing := self._nodes.get(identifier)) is not None:
+				merged = list(existing.dependencies)
+				if dependencies is not None:
+					merged.extend(d for d in dependencies if d not in existing.dependencies)
+				dependencies = merged
+			elif dependencies is None:
+				dependencies = ()
+
+			self._nodes[identifier] = AssetNode(args, kwargs, tuple(dependencies))
+			self._modified = True
+
+	def get_node(self, identifier: AssetIdentifier) -> t.Optional[AssetNode]:
+		"""
+		Returns what is known about the asset of the given identifier,
+		if anything.
+		"""
+		with self._lock:
+			return self._nodes.get(identifier)
+
+	def record_plan(self, key: t.Hashable, requested: t.Dict[AssetIdentifier, int]) -> None:
+		"""
+		Replaces the plan of the given key with the assets in
+		``requested``, mapped to the priority they were requested with.
+		"""
+		with self._lock:
+			self._plans[key] = requested.copy()
+			self._modified = True
+
+	def get_plan(self, key: t.Hashable) -> t.List[PlannedAsset]:
+		"""
+		Returns all assets recorded for the plan of the given key as
+		well as all of their transitive dependencies, with
+		dependencies coming before the assets requiring them.
+		Assets whose loader arguments are unknown are left out.
+		"""
+		with self._lock:
+			requested = self._plans.get(key)
+			if requested is None:
+				return []
+
+			priorities: t.Dict[AssetIdentifier, int] = {}
+			order: t.List[AssetIdentifier] = []
+			# Most important assets first, so less important ones won't need to revisit
+			# their dependencies after them.
+			for root, priority in sorted(requested.items(), key=lambda x: x[1]):
+				if root in priorities:
+					continue
+
+				priorities[root] = priority
+				stack = [(root, False)]
+				while stack:
+					ident, expanded = stack.pop()
+					if expanded:
+						order.append(ident)
+						continue
+
+					stack.append((ident, True))
+					if (node := self._nodes.get(ident)) is None:
+						continue
+
+					for dep in node.dependencies:
+						if dep not in priorities:
+							priorities[dep] = priority
+							stack.append((dep, False))
+
+			res = []
+			for ident in order:
+				if (node := self._nodes.get(ident)) is not None:
+					res.append(PlannedAsset(ident, node.args, node.kwargs, priorities[ident]))
+
+			return res
+
+	def record_usage(self, usage: t.Dict[AssetIdentifier, t.Tuple[int, int]]) -> None:
+		"""
+		Records a session's usage snapshot, mapping identifiers to the
+		amount of times the asset was requested and its estimated size.
+		Scores of previous sessions are decayed.
+		"""
+		with self._lock:
+			new_usage = {}
+			for ident, (score, size) in self._usage.items():
+				if (score := score * _USAGE_DECAY) >= _USAGE_MIN_SCORE:
+					new_usage[ident] = AssetUsage(score, size)
+
+			for ident, (requests, size) in usage.items():
+				prev_score = new_usage[ident].score if ident in new_usage else 0.0
+				new_usage[ident] = AssetUsage(prev_score + requests, size)
+
+			self._usage = new_usage
+			self._modified = True
+
+	def get_warm_up(self, max_assets: int, memory_budget: int) -> t.List[PlannedAsset]:
+		"""
+		Returns up to ``max_assets`` of the most used assets together
+		with their transitive dependencies, as long as their recorded
+		sizes fit into ``memory_budget`` bytes. Dependencies come
+		before the assets requiring them and the most used assets come
+		first. The priority of each asset is the rank of the most used
+		asset that pulled it in.
+		"""
+		with self._lock:
+			ranked = sorted(self._usage.items(), key=lambda x: x[1].score, reverse=True)
+			included: t.Set[AssetIdentifier] = set()
+			res: t.List[PlannedAsset] = []
+			remaining_budget = memory_budget
+			rank = 0
+			for root, usage in ranked:
+				if rank >= max_assets or usage.score <= 0.0:
+					break
+				if root in included or root not in self._nodes:
+					continue
+
+				order: t.List[AssetIdentifier] = []
+				seen = {root}
+				stack = [(root, False)]
+				while stack:
+					ident, expanded = stack.pop()
+					if expanded:
+						order.append(ident)
+						continue
+
+					stack.append((ident, True))
+					for dep in self._nodes[ident].dependencies:
+						if dep not in seen and dep not in included and dep in self._nodes:
+							seen.add(dep)
+							stack.append((dep, False))
+
+				size = sum(self._usage[i].size for i in order if i in self._usage)
+				if size > remaining_budget:
+					continue
+
+				remaining_budget -= size
+				included.update(order)
+				for ident in order:
+					node = self._nodes[ident]
+					res.append(PlannedAsset(ident, node.args, node.kwargs, rank))
+				rank += 1
+
+			return res
+
+	def save(self, path: Path) -> None:
+		"""
+		Writes the graph to ``path`` as JSON if it was modified since
+		it was created or loaded. Assets whose loader arguments or
+		identifiers contain anything but strings, numbers, paths, enum
+		members and tuples of those are left out.
+		"""
+		with self._lock:
+			if not self._modified:
+				return
+
+			nodes = self._nodes.copy()
+			plans = {k: v.copy() for k, v in self._plans.items()}
+			usage = self._usage.copy()
+
+		data = {
+			"version": _ASSET_GRAPH_VERSION,
+			"nodes": _encode_entries(
+				(ident, node.args, node.kwargs, node.dependencies)
+				for ident, node in nodes.items()
+			),
+			"plans": [],
+			"usage": _encode_entries(
+				(ident, score, size) for ident, (score, size) in usage.items()
+			),
+		}
+		for key, requested in plans.items():
+			try:
+				encoded_key = _encode(key)
+			except _UnencodableError:
+				continue
+			data["plans"].append([
+				encoded_key,
+				_encode_entries((ident, int(priority)) for ident, priority in requested.items()),
+			])
+
+		tmp_path = path.with_name(path.name + ".tmp")
+		try:
+			path.parent.mkdir(parents=True, exist_ok=True)
+			with tmp_path.open("w", encoding="utf-8") as f:
+				json.dump(data, f, separators=(",", ":"))
+			os.replace(tmp_path, path)
+		except OSError as e:
+			logger.warning(f"Failed writing asset graph to {path}: {e}")
+			return
+
+		with self._lock:
+			self._modified = False
+
+	@classmethod
+	def load(cls, path: Path) -> "AssetGraph":
+		"""
+		Loads a graph previously written by ``save`` from ``path``.
+		Returns an empty graph if that fails.
+		"""
+		graph = cls()
+		try:
+			with path.open("r", encoding="utf-8") as f:
+				data = json.load(f)
+		except FileNotFoundError:
+			return graph
+		except (OSError, ValueError) as e:
+			logger.warning(f"Failed reading asset graph from {path}: {e}")
+			return graph
+
+		if not isinstance(data, dict) or data.get("version") != _ASSET_GRAPH_VERSION:
+			return graph
+
+		try:
+			for ident, args, kwargs, deps in _decode_entries(data["nodes"]):
+				graph._nodes[ident] = AssetNode(args, dict(kwargs), deps)
+			for key, requested in data["plans"]:
+				graph._plans[_decode(key)] = dict(_decode_entries(requested))
+			for ident, score, size in _decode_entries(data["usage"]):
+				graph._usage[ident] = AssetUsage(score, size)
+		except (KeyError, TypeError, ValueError) as e:
+			logger.warning(f"Ignoring malformed asset graph at {path}: {e}")
+			return cls()
+
+		return graph
+
+
+class _UnencodableError(Exception):
+	pass
+
+
+def _encode(value: t.Any) -> t.Any:
+	"""
+	Turns a value into something JSON can store. Tuples become lists.
+	Dicts, paths and enum members become objects tagged with what they
+	were, dicts holding their key-value pairs as a list.
+	Raises ``_UnencodableError`` for anything else.
+	"""
+	if isinstance(value, enum.Enum):
+		enum_type = type(value)
+		return {"enum": f"{enum_type.__module__}:{enum_type.__qualname__}", "name": value.name}
+	if value is None or isinstance(value, (str, bool, int, float)):
+		return value
+	if isinstance(value, (tuple, list)):
+		return [_encode(v) for v in value]
+	if isinstance(value, dict):
+		return {"dict": [[_encode(k), _encode(v)] for k, v in value.items()]}
+	if isinstance(value, PurePath):
+		return {"path": str(value)}
+
+	raise _UnencodableError(f"Can't store {value!r} in the asset graph")
+
+
+def _decode(value: t.Any) -> t.Any:
+	"""
+	Reverses ``_encode``. Lists become tuples, so decoded values can be
+	used as identifiers. Enums are only looked up in modules of this
+	package, which are imported if needed.
+	"""
+	if isinstance(value, list):
+		return tuple(_decode(v) for v in value)
+	if not isinstance(value, dict):
+		return value
+	if "dict" in value:
+		return {_decode(k): _decode(v) for k, v in value["dict"]}
+	if "path" in value:
+		return Path(value["path"])
+	if "enum" in value:
+		module_name, _, qualname = value["enum"].partition(":")
+		if module_name.partition(".")[0] != __name__.partition(".")[0]:
+			raise ValueError(f"Refusing to look up enum outside of the package: {module_name}")
+		obj = sys.modules.get(module_name) or importlib.import_module(module_name)
+		for name in qualname.split("."):
+			obj = getattr(obj, name)
+		if not isinstance(obj, type) or not issubclass(obj, enum.Enum):
+			raise ValueError(f"{value['enum']} is not an enum")
+		return obj[value["name"]]
+
+	raise ValueError(f"Unknown value in asset graph: {value!r}")
+
+
+def _encode_entries(entries: t.Iterable[t.Tuple[t.Any, ...]]) -> t.List[t.Any]:
+	"""
+	Encodes the given tuples, leaving out all that can't be encoded.
+	"""
+	res = []
+	for entry in entries:
+		try:
+			res.append(_encode(entry))
+		except _UnencodableError:
+			continue
+
+	return res
+
+
+def _decode_entries(entries: t.List[t.Any]) -> t.List[t.Tuple[t.Any, ...]]:
+	return [_decode(entry) for entry in entries]
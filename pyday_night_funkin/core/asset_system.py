@@ -16,23 +16,29 @@ modding scene's lifetime.
 # https://discuss.python.org/t/unpacking-typedicts-for-specifying-more-complex-paramspecs/34234
 
 import abc
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, Future
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait as wait_futures
 import enum
 import fnmatch
 import functools
 import gc
 import glob
+import hashlib
+import heapq
 import inspect
 import json
-from math import exp, tau, sqrt
+import mmap
+import multiprocessing
 import os
 from pathlib import Path
+import posixpath
 import queue
 import re
 import sys
 import threading
 from time import perf_counter, sleep
+import tracemalloc
+import types
 import typing as t
 from xml.etree.ElementTree import ElementTree
 
@@ -40,13 +46,20 @@ from loguru import logger
 from pyglet import clock
 from pyglet import image
 from pyglet.image import AbstractImage, Texture
-from pyglet.math import Vec2
 from pyglet import media
 from pyglet.media.codecs.base import Source, StaticSource
 
 from pyday_night_funkin.core.animation import FrameCollection
-from pyday_night_funkin.core.almost_xml_parser import AlmostXMLParser
+from pyday_night_funkin.core import asset_archive
+from pyday_night_funkin.core.asset_disk_cache import DiskCache
+from pyday_night_funkin.core.asset_graph import AssetGraph
+from pyday_night_funkin.core import asset_watcher
+from pyday_night_funkin.core import asset_workers
+from pyday_night_funkin.core.eviction_policies import (
+	EvictionCandidate, EvictionPolicy, create_eviction_policy
+)
 from pyday_night_funkin.core import ogg_decoder
+from pyday_night_funkin.core import packed_texture
 from pyday_night_funkin.core.texture_atlas import TextureBin
 
 if t.TYPE_CHECKING:
@@ -79,6 +92,15 @@ _BUILTIN_EXTENSION_MAP = {
 }
 
 
+_LIBRARY_MANIFEST_VERSION = 1
+
+
+_DISK_CACHE_ENTRY_NAME = ""
+"""
+Name of the single entry in packed textures written to the disk cache.
+"""
+
+
 def path_to_string(path: t.Union[str, Path]) -> str:
 	"""
 	Possibly stringifies a path.
@@ -88,13 +110,67 @@ def path_to_string(path: t.Union[str, Path]) -> str:
 	return path if isinstance(path, str) else str(path)
 
 
-_SQRT_TAU = sqrt(tau)
-def ndist_1(x: float, sigma: float) -> float:
+_ADDRESS_RE = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def _hash_code(h: t.Any, code: types.CodeType) -> None:
 	"""
-	Normal distribution with standard deviation hardcoded to 1
-	(aka curve peaks at 1.0)
+	Feeds a code object's bytecode, constants and referenced names
+	into the hash object ``h``, including those of nested code objects.
 	"""
-	return exp(-0.5 * ((x - 1.0)/sigma)**2.0) / (sigma * _SQRT_TAU)
+	for const in code.co_consts:
+		if isinstance(const, types.CodeType):
+			_hash_code(h, const)
+		else:
+			h.update(f"{const!r}\0".encode("utf-8", "surrogateescape"))
+	h.update(f"{code.co_names!r}\0".encode("utf-8", "surrogateescape"))
+	h.update(code.co_code)
+
+
+def _get_post_load_processor_digest(
+	processors: t.Sequence[PostLoadProcessor],
+) -> t.Optional[str]:
+	"""
+	Returns a string identifying the given post-load processors across
+	launches, so disk cache entries that have them baked in can't be
+	mistaken for entries created with other ones.
+	Functions are identified by their name, code, the names they
+	reference, their defaults and the contents of their closure;
+	methods also by what they are bound to.
+	Returns ``None`` if any processor has no such stable identity,
+	which is the case if it has no code, such as partials, or if any
+	of these values' ``repr`` contains a memory address. Nothing
+	should then be read from or written to the disk cache.
+	"""
+	if not processors:
+		return ""
+
+	h = hashlib.sha1()
+	for plp in processors:
+		if (code := getattr(plp, "__code__", None)) is None:
+			return None
+
+		cells = []
+		for cell in (plp.__closure__ or ()):
+			try:
+				cells.append(cell.cell_contents)
+			except ValueError:
+				# Empty cell
+				cells.append(None)
+		# Bound methods depend on what they're bound to as well.
+		values = repr(
+			(getattr(plp, "__self__", None), plp.__defaults__, plp.__kwdefaults__, cells)
+		)
+		if _ADDRESS_RE.search(values) is not None:
+			return None
+
+		h.update(
+			f"{plp.__module__}.{plp.__qualname__}\0{values}\0".encode("utf-8", "surrogateescape")
+		)
+		_hash_code(h, code)
+		h.update(b"\0")
+
+	return h.hexdigest()
 
 
 class AssetNotFoundError(KeyError):
@@ -158,6 +234,10 @@ class BaseAssetRouter:
 
 		If the asset does not exist for this asset router, it returns
 		`None`.
+
+		The asset system memoizes routing results by path and asset
+		type until the asset router stack changes, so the result must
+		not depend on ``options`` or change over time.
 		"""
 		raise NotImplementedError()
 
@@ -178,6 +258,7 @@ class BaseAssetRouter:
 	def discover_libraries(
 		self,
 		library_specs: t.Dict[str, t.Tuple[LibrarySpecPattern, ...]],
+		manifest_directory: t.Optional[Path] = None,
 	) -> t.Dict[str, t.Dict[str, t.Sequence[ParameterTuple]]]:
 		"""
 		Possibly discover any of the given libraries.
@@ -186,6 +267,9 @@ class BaseAssetRouter:
 		within and return a dict mapping each found library to a dict
 		mapping asset types to (args, kwargs) 2-length tuples denoting
 		the parameters the type's loader is to be called with.
+		If ``manifest_directory`` is given, the router may store
+		results of expensive scans inside of it for future reuse.
+		May be called from any thread.
 		"""
 		return {}
 
@@ -199,8 +283,15 @@ class BaseAssetRouter:
 		return {}
 
 
+_BACKREFERENCE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+"""
+Finds numbered backreferences and group references in a regex, which
+would change meaning if the regex was combined with others.
+"""
+
+
 class _RouteInfo:
-	__slots__ = ("paths", "regexes")
+	__slots__ = ("paths", "regexes", "_combined_regex", "_combined_regex_entries")
 
 	def __init__(
 		self,
@@ -210,6 +301,47 @@ class _RouteInfo:
 		self.paths = paths
 		self.regexes = regexes
 
+		self._combined_regex: t.Optional[re.Pattern] = None
+		"""
+		All of ``regexes`` as one alternation, each wrapped in a
+		capturing group. ``None`` if they could not be combined, in
+		which case they are tried one by one.
+		"""
+		self._combined_regex_entries: t.Dict[int, AssetRouterEntry] = {}
+		"""Maps the index of each wrapping group to its entry."""
+
+		if len(regexes) > 1 and not any(_BACKREFERENCE_RE.search(r.pattern) for r, _ in regexes):
+			group = 1
+			for regex, entry in regexes:
+				self._combined_regex_entries[group] = entry
+				group += regex.groups + 1
+			try:
+				# Alternatives are tried in order, so the first regex that would match on
+				# its own wins, same as when trying them one by one.
+				self._combined_regex = re.compile(
+					"|".join(f"({r.pattern})" for r, _ in regexes)
+				)
+			except re.error:
+				# Conflicting group names, flags that are only allowed at the start, ...
+				self._combined_regex_entries.clear()
+
+	def match_regex(self, path: str) -> t.Optional[AssetRouterEntry]:
+		"""
+		Returns the entry of the first regex matching ``path``, or
+		``None`` if there is none.
+		"""
+		if self._combined_regex is not None:
+			if (m := self._combined_regex.match(path)) is None:
+				return None
+			# The wrapping group closes last, so it's always the last matched one.
+			return self._combined_regex_entries[m.lastindex]
+
+		for regex, entry in self.regexes:
+			if regex.match(path):
+				return entry
+
+		return None
+
 
 class AssetRouter(BaseAssetRouter):
 	"""
@@ -231,6 +363,8 @@ class AssetRouter(BaseAssetRouter):
 
 		self._library_specs = {} if library_specs is None else library_specs
 
+		self._manifest_lock = threading.Lock()
+
 		_asset_maps: t.Dict[str, _RouteInfo] = {}
 		if per_asset_type_asset_map is not None:
 			for target_type_specifier, orig_router_map in per_asset_type_asset_map.items():
@@ -240,13 +374,9 @@ class AssetRouter(BaseAssetRouter):
 
 		self._asset_maps = _asset_maps
 
-		if unconditional_asset_map is not None:
-			unc = self._process_asset_map(unconditional_asset_map)
-			self._unc_asset_map = unc.paths
-			self._unc_regexes = unc.regexes
-		else:
-			self._unc_asset_map = {}
-			self._unc_regexes = []
+		self._unc_routes = self._process_asset_map(
+			{} if unconditional_asset_map is None else unconditional_asset_map
+		)
 
 	def _process_asset_map(self, router_map: t.Dict[str, AssetRouterEntry]) -> _RouteInfo:
 		regexes: t.List[t.Tuple[re.Pattern, AssetRouterEntry]] = []
@@ -279,22 +409,22 @@ class AssetRouter(BaseAssetRouter):
 	) -> t.Optional[
 		t.Tuple[bool, str, t.Optional[t.Dict[str, t.Any]], t.Optional[PostLoadProcessor]]
 	]:
+		if (entry := self._find_entry(path, asset_type_name)) is not None:
+			return self._process_asset_hit(path, entry)
+		return None
+
+	def _find_entry(self, path: str, asset_type_name: str) -> t.Optional[AssetRouterEntry]:
 		if (at_specific_map := self._asset_maps.get(asset_type_name)):
 			if (entry := at_specific_map.paths.get(path)) is not None:
-				return self._process_asset_hit(path, entry)
-
-			for regex, entry in at_specific_map.regexes:
-				if regex.match(path):
-					return self._process_asset_hit(path, entry)
+				return entry
 
-		if (entry := self._unc_asset_map.get(path)) is not None:
-			return self._process_asset_hit(path, entry)
+			if (entry := at_specific_map.match_regex(path)) is not None:
+				return entry
 
-		for regex, entry in self._unc_regexes:
-			if regex.match(path):
-				return self._process_asset_hit(path, entry)
+		if (entry := self._unc_routes.paths.get(path)) is not None:
+			return entry
 
-		return None
+		return self._unc_routes.match_regex(path)
 
 	def _process_complex_asset_hit(self, path: str, entry: AssetRouterEntry):
 		e_path = entry.path
@@ -329,21 +459,8 @@ class AssetRouter(BaseAssetRouter):
 		# TODO: may intransparently make path a string, document this
 		path = path_to_string(options["path"])
 
-		if (at_specific_map := self._asset_maps.get(asset_type_name)):
-			if (entry := at_specific_map.paths.get(path)) is not None:
-				return self._process_complex_asset_hit(path, entry)
-
-			for regex, entry in at_specific_map.regexes:
-				if regex.match(path):
-					return self._process_complex_asset_hit(path, entry)
-
-		if (entry := self._unc_asset_map.get(path)) is not None:
+		if (entry := self._find_entry(path, asset_type_name)) is not None:
 			return self._process_complex_asset_hit(path, entry)
-
-		for regex, entry in self._unc_regexes:
-			if regex.match(path):
-				return self._process_complex_asset_hit(path, entry)
-
 		return None
 
 	def has_pyobj(self, ident: t.Hashable) -> t.Tuple[bool, t.Any]:
@@ -357,41 +474,164 @@ class AssetRouter(BaseAssetRouter):
 	def discover_libraries(
 		self,
 		library_specs: t.Dict[str, t.Tuple[LibrarySpecPattern, ...]],
+		manifest_directory: t.Optional[Path] = None,
 	) -> t.Dict[str, t.Dict[str, t.Sequence[ParameterTuple]]]:
 		to_discover = {name: v for name, v in self._library_specs.items() if name in library_specs}
+		if not to_discover:
+			return {}
+
+		manifest_path = None
+		manifest = {}
+		if manifest_directory is not None:
+			manifest_path = manifest_directory / (
+				"library_manifest_" +
+				hashlib.sha1(self._dir.encode("utf-8", "surrogateescape")).hexdigest()[:16] +
+				".json"
+			)
+			manifest = self._read_library_manifest(manifest_path)
+
 		res = {}
-		for n, v in to_discover.items():
-			res[n] = self._discover_library(v)
+		changed = False
+		# Scanning is mostly waiting on the file system, so threads do help here.
+		with ThreadPoolExecutor(min(len(to_discover), 4), "LibraryDiscovery") as executor:
+			futures = {
+				name: executor.submit(self._discover_library, patterns, manifest.get(name))
+				for name, patterns in to_discover.items()
+			}
+			for name, fut in futures.items():
+				entry = fut.result()
+				if entry is not manifest.get(name):
+					manifest[name] = entry
+					changed = True
+
+				final_result = defaultdict(list)
+				for file, asset_type_name, _, _ in entry["files"]:
+					final_result[asset_type_name].append(((file,), {}))
+				res[name] = dict(final_result)
+
+		if changed and manifest_path is not None:
+			self._write_library_manifest(manifest_path, manifest)
+
 		return res
 
+	def _read_library_manifest(self, path: Path) -> t.Dict[str, t.Dict[str, t.Any]]:
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+		except FileNotFoundError:
+			return {}
+		except (OSError, ValueError) as e:
+			logger.warning(f"Failed reading library manifest {path}: {e}")
+			return {}
+
+		if data.get("version") != _LIBRARY_MANIFEST_VERSION or data.get("directory") != self._dir:
+			return {}
+
+		return data["libraries"]
+
+	def _write_library_manifest(
+		self, path: Path, libraries: t.Dict[str, t.Dict[str, t.Any]]
+	) -> None:
+		with self._manifest_lock:
+			# Merge with what may have been written by other discoveries in the meantime
+			manifest = self._read_library_manifest(path)
+			manifest.update(libraries)
+
+			tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+			try:
+				path.parent.mkdir(parents=True, exist_ok=True)
+				with open(tmp_path, "w", encoding="utf-8") as f:
+					json.dump(
+						{
+							"version": _LIBRARY_MANIFEST_VERSION,
+							"directory": self._dir,
+							"libraries": manifest,
+						},
+						f,
+					)
+				os.replace(tmp_path, path)
+			except OSError as e:
+				logger.warning(f"Failed writing library manifest {path}: {e}")
+				try:
+					os.remove(tmp_path)
+				except OSError:
+					pass
+
+	@staticmethod
+	def _get_spec_fingerprint(patterns: t.Tuple[LibrarySpecPattern, ...]) -> t.List:
+		return [[p.pattern, list(p.exclude), p.asset_type_name] for p in patterns]
+
+	def _is_manifest_entry_valid(
+		self, patterns: t.Tuple[LibrarySpecPattern, ...], entry: t.Dict[str, t.Any]
+	) -> bool:
+		if entry.get("specs") != self._get_spec_fingerprint(patterns):
+			return False
+
+		dirs = entry.get("dirs")
+		if dirs is None:
+			return False
+
+		for rel_dir, mtime in dirs.items():
+			try:
+				cur_mtime = os.stat(os.path.join(self._dir, rel_dir)).st_mtime_ns
+			except OSError:
+				cur_mtime = None
+			if cur_mtime != mtime:
+				return False
+
+		return True
+
 	def _discover_library(
 		self,
 		patterns: t.Tuple[LibrarySpecPattern, ...],
-	) -> t.Dict[str, t.List[ParameterTuple]]:
-		lib_files: t.List[t.Tuple[str, t.Optional[str]]] = []
+		manifest_entry: t.Optional[t.Dict[str, t.Any]] = None,
+	) -> t.Dict[str, t.Any]:
+		"""
+		Scans for the files of a library and returns a manifest entry
+		describing them.
+		If ``manifest_entry`` is given and still valid, it is returned
+		instead.
+		"""
+		if manifest_entry is not None and self._is_manifest_entry_valid(patterns, manifest_entry):
+			return manifest_entry
+
+		# Directories whose listings the result depends on, mapped to their modification
+		# times. Adding or removing anything in them changes their mtime.
+		# `None` if the result can't be validated like that.
+		dirs: t.Optional[t.Dict[str, t.Optional[int]]] = {}
+
+		lib_files: t.List[t.Tuple[str, t.Optional[str], os.stat_result]] = []
 		for pattern in patterns:
+			if dirs is not None:
+				*dir_parts, _ = pattern.pattern.replace("\\", "/").split("/")
+				if any(glob.has_magic(part) for part in dir_parts):
+					# Would have to track every directory the glob went through
+					dirs = None
+				else:
+					self._record_dir_mtime(os.path.join(self._dir, *dir_parts), dirs)
+
 			# Glob by the pattern
 			paths = glob.glob(os.path.join(self._dir, pattern.pattern))
-			files: t.Set[str] = set()
+			files: t.Dict[str, os.stat_result] = {}
 
 			# Recursively scan all the directories that the glob ended up delivering.
 			# Add the paths relative to self._dir to `files`.
 			for path in paths:
 				if os.path.isdir(path):
-					for rpath in self._scan_dir(path):
-						files.add(os.path.relpath(rpath, self._dir))
+					for rpath, st in self._scan_dir(path, dirs):
+						files[os.path.relpath(rpath, self._dir)] = st
 				elif os.path.isfile(path):
-					files.add(os.path.relpath(path, self._dir))
+					files[os.path.relpath(path, self._dir)] = os.stat(path)
 
 			# Throw out everything matching an exclude pattern
 			for exc in pattern.exclude:
 				for disqualified in fnmatch.filter(files, exc):
-					files.remove(disqualified)
-			lib_files.extend((f, pattern.asset_type_name) for f in files)
+					files.pop(disqualified)
+			lib_files.extend((f, pattern.asset_type_name, st) for f, st in files.items())
 
 		# Guess asset types based on extension or just take the one forced by the pattern
-		final_result = defaultdict(list)
-		for file, asset_type_name in lib_files:
+		manifest_files = []
+		for file, asset_type_name, st in sorted(lib_files, key=lambda x: x[0]):
 			if asset_type_name is None:
 				ext = os.path.splitext(file)[1]
 				if not ext or ext[1:].lower() not in _BUILTIN_EXTENSION_MAP:
@@ -399,20 +639,128 @@ class AssetRouter(BaseAssetRouter):
 
 				asset_type_name = _BUILTIN_EXTENSION_MAP[ext[1:].lower()]
 
-			final_result[asset_type_name].append(((file,), {}))
+			manifest_files.append((file, asset_type_name, st.st_size, st.st_mtime_ns))
+
+		return {
+			"specs": self._get_spec_fingerprint(patterns),
+			"dirs": dirs,
+			"files": manifest_files,
+		}
 
-		return dict(final_result)
+	def _record_dir_mtime(self, path: str, dirs: t.Optional[t.Dict[str, t.Optional[int]]]) -> None:
+		if dirs is None:
+			return
 
-	def _scan_dir(self, p: str) -> t.List[str]:
+		try:
+			mtime = os.stat(path).st_mtime_ns
+		except OSError:
+			mtime = None
+		dirs[os.path.relpath(path, self._dir)] = mtime
+
+	def _scan_dir(
+		self, p: str, dirs: t.Optional[t.Dict[str, t.Optional[int]]] = None
+	) -> t.List[t.Tuple[str, os.stat_result]]:
+		self._record_dir_mtime(p, dirs)
 		res = []
 		for e in os.scandir(p):
 			if e.is_dir():
-				res.extend(self._scan_dir(e.path))
+				res.extend(self._scan_dir(e.path, dirs))
 			elif e.is_file():
-				res.append(e.path)
+				res.append((e.path, e.stat()))
 		return res
 
 
+class ArchiveAssetRouter(AssetRouter):
+	"""
+	An asset router serving assets out of a zip archive instead of a
+	directory. Takes the same arguments as an ``AssetRouter``, the
+	archive's path taking the place of the asset directory.
+	Routed paths point into the archive, which is mounted through the
+	``asset_archive`` module, where asset providers read them from.
+	This includes images and the atlas images of frames, which are
+	routed as ``image_data``.
+	"""
+
+	def __init__(
+		self,
+		archive_path: t.Union[str, Path],
+		unconditional_asset_map: t.Optional[t.Dict[str, AssetRouterEntry]] = None,
+		per_asset_type_asset_map: t.Optional[t.Dict[str, t.Dict[str, AssetRouterEntry]]] = None,
+		pyobj_map: t.Optional[t.Dict[t.Hashable, t.Any]] = None,
+		library_specs: t.Optional[t.Dict[str, t.Tuple[LibrarySpecPattern, ...]]] = None,
+	) -> None:
+		self._archive = asset_archive.mount(archive_path)
+
+		super().__init__(
+			self._archive.path,
+			unconditional_asset_map,
+			per_asset_type_asset_map,
+			pyobj_map,
+			library_specs,
+		)
+
+	def has_asset(
+		self, path: str, asset_type_name: str, options: t.Dict[str, t.Any]
+	) -> t.Optional[
+		t.Tuple[bool, str, t.Optional[t.Dict[str, t.Any]], t.Optional[PostLoadProcessor]]
+	]:
+		if (res := super().has_asset(path, asset_type_name, options)) is not None:
+			return res
+
+		# Unlike a directory, an archive can tell what's in it without any syscalls, so claim
+		# everything it contains.
+		if not os.path.isabs(path) and self._archive.is_file(path.replace("\\", "/")):
+			return (True, self._absolutize_path(path), None, None)
+
+		return None
+
+	def discover_libraries(
+		self,
+		library_specs: t.Dict[str, t.Tuple[LibrarySpecPattern, ...]],
+		manifest_directory: t.Optional[Path] = None,
+	) -> t.Dict[str, t.Dict[str, t.Sequence[ParameterTuple]]]:
+		# The archive's index is in memory already, no point in a manifest.
+		return super().discover_libraries(library_specs, None)
+
+	def _discover_library(
+		self,
+		patterns: t.Tuple[LibrarySpecPattern, ...],
+		manifest_entry: t.Optional[t.Dict[str, t.Any]] = None,
+	) -> t.Dict[str, t.Any]:
+		lib_files: t.List[t.Tuple[str, t.Optional[str]]] = []
+		for pattern in patterns:
+			pattern_parts = pattern.pattern.replace("\\", "/").strip("/").split("/")
+			files = []
+			for name in self._archive.get_names():
+				name_parts = name.split("/")
+				# Like a glob, match component by component. Matched directories include
+				# everything below them.
+				if len(name_parts) >= len(pattern_parts) and all(
+					fnmatch.fnmatchcase(n, p) for n, p in zip(name_parts, pattern_parts)
+				):
+					files.append(name)
+
+			for exc in pattern.exclude:
+				for disqualified in set(fnmatch.filter(files, exc)):
+					files.remove(disqualified)
+			lib_files.extend((f, pattern.asset_type_name) for f in files)
+
+		manifest_files = []
+		for file, asset_type_name in sorted(lib_files, key=lambda x: x[0]):
+			if asset_type_name is None:
+				ext = posixpath.splitext(file)[1]
+				if not ext or ext[1:].lower() not in _BUILTIN_EXTENSION_MAP:
+					continue
+
+				asset_type_name = _BUILTIN_EXTENSION_MAP[ext[1:].lower()]
+
+			manifest_files.append(
+				(file, asset_type_name, self._archive.get_size(file), self._archive.mtime_ns)
+			)
+
+		return {"specs": None, "dirs": None, "files": manifest_files}
+
+
 class LoadResult(t.Generic[T]):
 	__slots__ = (
 		"item",
@@ -482,6 +830,15 @@ class BaseAssetProvider(abc.ABC, t.Generic[T]):
 	def create_cache_key(self, *_a, **_k) -> t.Hashable:  # P.args/kwargs retracted
 		raise NotImplementedError()
 
+	def reload_in_place(self, old: T, new: T) -> bool:
+		"""
+		Called on the main thread when an asset that is still in use
+		was reloaded after its files changed. May change ``old`` to
+		take on the contents of ``new``, so its users see the change.
+		Returns whether that happened.
+		"""
+		return False
+
 
 class AssetProvider(BaseAssetProvider[T]):
 	def __init__(self, asm: "AssetSystemManager") -> None:
@@ -529,8 +886,7 @@ class OptionlessAssetProvider(AssetProvider[T]):
 
 class BytesAssetProvider(OptionlessAssetProvider[bytes]):
 	def load(self, path: str) -> bytes:
-		with open(path, "rb") as f:
-			return f.read()
+		return bytes(asset_archive.read_asset(path))
 
 	def get_estimated_asset_size(self, item: bytes) -> int:
 		try:
@@ -541,7 +897,7 @@ class BytesAssetProvider(OptionlessAssetProvider[bytes]):
 
 class TextAssetProvider(AssetProvider[str]):
 	def load(self, path: str, encoding: str = "utf-8") -> str:
-		with open(path, "r", encoding=encoding) as f:
+		with asset_archive.open_text_asset(path, encoding) as f:
 			return f.read()
 
 	def create_cache_key(self, path: str, encoding: str = "utf-8") -> t.Hashable:
@@ -568,8 +924,7 @@ def _recursive_json_size(item: object) -> int:
 
 class JSONAssetProvider(AssetProvider[t.Dict]):
 	def load(self, path: str, encoding: str = "utf-8") -> str:
-		with open(path, "r", encoding=encoding) as f:
-			return json.load(f)
+		return self._asm.run_cpu_bound(asset_workers.parse_json, path, encoding)
 
 	def create_cache_key(self, path: str, encoding: str = "utf-8") -> t.Hashable:
 		return (path, encoding)
@@ -583,15 +938,7 @@ class JSONAssetProvider(AssetProvider[t.Dict]):
 
 class XMLAssetProvider(OptionlessAssetProvider[ElementTree]):
 	def load(self, path: str) -> ElementTree:
-		et = ElementTree()
-		# NOTE: The xml files contain the encoding inside them, which is mega stupid
-		# since you need the encoding to properly parse them, so like ????
-		# Unless there is some spec that declares that the first line MUST be valid ASCII
-		# and then you have to change the encoding or whatever but i'm not gonna care about
-		# all that and just have this work for utf8.
-		with open(path, "r", encoding="utf-8") as f:
-			et.parse(f, AlmostXMLParser())
-		return et
+		return self._asm.run_cpu_bound(asset_workers.parse_xml, path)
 
 	def get_estimated_asset_size(self, item: ElementTree) -> int:
 		try:
@@ -622,13 +969,17 @@ class SoundAssetProvider(AssetProvider[Source]):
 	) -> Source:
 		if decoder is None:
 			decoder = self._ogg_decoder
-		return media.load(path, streaming=stream, decoder=decoder)
+		# Only archived files need to be handed over as file objects.
+		file = asset_archive.open_asset(path) if asset_archive.is_archived(path) else None
+		return media.load(path, file=file, streaming=stream, decoder=decoder)
 
 	def create_cache_key(
 		self, path: str, stream: bool = False, decoder: t.Optional["MediaDecoder"] = None
 	) -> t.Hashable:
-		if decoder is None:
-			decoder = self._ogg_decoder
+		# The default decoder is keyed as ``None``, keeping the key persistable in the asset
+		# graph.
+		if decoder is self._ogg_decoder:
+			decoder = None
 		return (path, stream, decoder)
 
 	def get_estimated_asset_size(self, item: Source) -> int:
@@ -644,7 +995,8 @@ class SoundAssetProvider(AssetProvider[Source]):
 
 class ImageDataAssetProvider(AssetProvider["ImageData"]):
 	def load(self, path: str) -> "ImageData":
-		return image.load(path)
+		with asset_archive.open_asset(path) as f:
+			return image.load(path, file=f)
 
 	def create_cache_key(self, path: str) -> t.Hashable:
 		return path
@@ -660,6 +1012,8 @@ class ImageDataAssetProvider(AssetProvider["ImageData"]):
 
 
 class ImageAssetProvider(CacheAwareAssetProvider[Texture]):
+	DISK_CACHE_VERSION = 2
+
 	def __init__(self, asm: "AssetSystemManager") -> None:
 		super().__init__(asm)
 
@@ -688,24 +1042,82 @@ class ImageAssetProvider(CacheAwareAssetProvider[Texture]):
 		path: str,
 		atlas_hint: t.Hashable = None,
 	):
-		image_data = load_image_data(path, cache=False)
-
-		# HACK: Private access / implementation-copypaste, but saves conversion work that
-		# would otherwise stall the main thread for like 300ms at worst.
-		target_format_str = image_data.format
-		target_pitch = abs(image_data._current_pitch)
-		# Second parameter always ends up as GL_UNSIGNED_BYTE, probably safe to not worry about it
-		gl_fmt, _ = image_data._get_gl_format_and_type(target_format_str)
-		if gl_fmt is None:
-			target_format_str = {1: 'R', 2: 'RG', 3: 'RGB', 4: 'RGBA'}[len(target_format_str)]
-			gl_fmt, _ = image_data._get_gl_format_and_type(target_format_str)
-
-		new_data = image_data._convert(target_format_str, target_pitch)
-		image_data.set_data(target_format_str, target_pitch, new_data)
-		# HACK: Remove everything between these two "HACK" comments if it causes problems
+		# Images are complex assets, which get no path routing. Route it like the image data
+		# it's made from.
+		path, _, post_load_processors = self._asm._route_asset(
+			path_to_string(path), "image_data", {}
+		)
+		self._asm._note_source_path(path)
+
+		image_data = self._load_packed(path)
+
+		disk_cache = self._asm.disk_cache
+		if image_data is None and disk_cache is not None:
+			image_data = self._load_from_disk_cache(disk_cache, path)
+
+		if image_data is None:
+			image_data = self._decode(path)
+			if disk_cache is not None:
+				# Stored before post-load processing, so entries don't depend on the processors.
+				disk_cache.put(
+					"image",
+					self.DISK_CACHE_VERSION,
+					path,
+					*packed_texture.build_chunks(((_DISK_CACHE_ENTRY_NAME, image_data, None),)),
+				)
+
+		for f in post_load_processors:
+			image_data = f(image_data)
 
 		return (image_data, cache, cache_key, atlas_hint), {}
 
+	def _decode(self, path: str) -> "ImageData":
+		width, height, fmt, pitch, data = self._asm.run_cpu_bound(
+			asset_workers.decode_image, path
+		)
+		return image.ImageData(width, height, fmt, data, pitch)
+
+	def _load_packed(self, path: str) -> t.Optional["ImageData"]:
+		"""
+		Attempts to load the image at the routed ``path`` from a packed
+		texture file created next to it by the ``packed_texture``
+		converter.
+		"""
+		packed_path = packed_texture.get_packed_path(path)
+		try:
+			if (mm := asset_archive.map_asset(packed_path)) is None:
+				return None
+		except (OSError, ValueError) as e:
+			logger.warning(f"Failed mapping packed texture {packed_path!r}: {e}")
+			return None
+
+		return self._image_data_from_packed(mm, os.path.basename(path), path)
+
+	def _load_from_disk_cache(self, disk_cache: DiskCache, path: str) -> t.Optional["ImageData"]:
+		if (mm := disk_cache.get("image", self.DISK_CACHE_VERSION, path, True)) is None:
+			return None
+
+		return self._image_data_from_packed(mm, _DISK_CACHE_ENTRY_NAME, path)
+
+	@staticmethod
+	def _image_data_from_packed(
+		mm: t.Union[mmap.mmap, memoryview, bytearray], entry_name: str, source_path: str
+	) -> t.Optional["ImageData"]:
+		try:
+			entries = packed_texture.read_entries(mm)
+		except packed_texture.PackedTextureError as e:
+			logger.warning(f"Ignoring malformed packed texture for {source_path!r}: {e}")
+			asset_archive.release_buffer(mm)
+			return None
+
+		if (entry := entries.get(entry_name)) is None or not entry.matches_source(source_path):
+			asset_archive.release_buffer(mm)
+			return None
+
+		# The map is not closed here; the image data's ctypes array keeps it alive and it will
+		# be unmapped once that is garbage collected.
+		return packed_texture.image_data_from_buffer(mm, entry)
+
 	def load_create_texture(
 		self,
 		img_data: "ImageData",
@@ -741,6 +1153,14 @@ class ImageAssetProvider(CacheAwareAssetProvider[Texture]):
 			texture, 0, tex_size * (bin_key is None), 0, tex_size * (bin_key is not None)
 		)
 
+	def reload_in_place(self, old: Texture, new: Texture) -> bool:
+		if old.width != new.width or old.height != new.height:
+			return False
+
+		# Works for regions of the atlas textures as well, they offset the blit
+		old.blit_into(new.get_image_data(), 0, 0, 0)
+		return True
+
 	def unload(self, key: t.Hashable, item: Texture) -> None:
 		assert key in self._cache_key_to_bin_key_map
 
@@ -764,13 +1184,73 @@ class ImageAssetProvider(CacheAwareAssetProvider[Texture]):
 
 
 class FramesAssetProvider(AssetProvider[FrameCollection]):
+	DISK_CACHE_VERSION = 1
+
 	def load(self, path: str) -> FrameCollection:
-		# Do not cache the xml, only needed for creating the FrameCollection once.
-		xml = load_xml(path, cache=False)
-		atlas_texture = load_image(Path(path).parent / xml.getroot().attrib["imagePath"])
+		disk_cache = self._asm.disk_cache
+		parsed = None
+		if disk_cache is not None:
+			# The entry is keyed on what the xml would be loaded from and the post-load
+			# processors that would be run on it, as the records are made from their result.
+			xml_path, _, post_load_processors = self._asm._route_asset(
+				path_to_string(path), "xml", {}
+			)
+			if (variant := _get_post_load_processor_digest(post_load_processors)) is None:
+				disk_cache = None
+			elif (parsed := self._load_from_disk_cache(disk_cache, xml_path, variant)) is not None:
+				# The xml isn't loaded, so nothing else notes it.
+				self._asm._note_source_path(xml_path)
+
+		if parsed is None:
+			parsed = self._parse(path)
+			if disk_cache is not None:
+				disk_cache.put(
+					"frames",
+					self.DISK_CACHE_VERSION,
+					xml_path,
+					json.dumps(parsed, separators=(",", ":")).encode("utf-8"),
+					variant=variant,
+				)
 
-		texture_region_cache: t.Dict[t.Tuple[int, int, int, int], "AbstractImage"] = {}
+		image_path, records = parsed
+		atlas_texture = load_image(Path(path).parent / image_path)
+
+		# Regions and frames are only created once animations are built from them, character
+		# sheets contain lots of frames that some songs never play.
 		frame_collection = FrameCollection()
+		frame_collection.add_atlas_frames(atlas_texture, records)
+
+		return frame_collection
+
+	def reload_in_place(self, old: FrameCollection, new: FrameCollection) -> bool:
+		old.update_from(new)
+		return True
+
+	def _load_from_disk_cache(
+		self, disk_cache: DiskCache, path: str, variant: str
+	) -> t.Optional[t.Tuple[str, t.List[t.List[t.Any]]]]:
+		mm = disk_cache.get("frames", self.DISK_CACHE_VERSION, path, variant=variant)
+		if mm is None:
+			return None
+
+		with mm:
+			try:
+				image_path, records = json.loads(mm[:])
+			except ValueError:
+				return None
+
+		return image_path, records
+
+	def _parse(self, path: str) -> t.Tuple[str, t.List[t.List[t.Any]]]:
+		"""
+		Parses a sparrow atlas xml file into its image path and a list
+		of valid frame records, which are lists of name, x, y, width,
+		height and the frame x, y, width and height, of which the
+		latter four may be ``None``.
+		"""
+		# Do not cache the xml, only needed for creating the FrameCollection once.
+		xml = load_xml(path, cache=False)
+		records = []
 
 		for sub_texture in xml.getroot():
 			if sub_texture.tag != "SubTexture":
@@ -805,23 +1285,13 @@ class FramesAssetProvider(AssetProvider[FrameCollection]):
 				)
 				continue
 
-			x, y, w, h = region = tuple(int(e) for e in region)
-			fx, fy, fw, fh = frame_vars = tuple(None if e is None else int(e) for e in frame_vars)
-			if region not in texture_region_cache:
-				texture_region_cache[region] = atlas_texture.get_region(
-					x, atlas_texture.height - h - y, w, h,
-				)
-
-			trimmed = frame_vars[0] is not None
-
-			frame_collection.add_frame(
-				texture_region_cache[region],
-				Vec2(fw, fh) if trimmed else Vec2(w, h),
-				Vec2(-fx, -fy) if trimmed else Vec2(0, 0),
+			records.append([
 				name,
-			)
+				*(int(e) for e in region),
+				*(None if e is None else int(e) for e in frame_vars),
+			])
 
-		return frame_collection
+		return xml.getroot().attrib["imagePath"], records
 
 	def create_cache_key(self, path: str) -> t.Hashable:
 		return path
@@ -832,7 +1302,7 @@ class CacheStats:
 	Cheap dataclass for generic attributes relating to a cache.
 	"""
 
-	__slots__ = ("system_memory_used", "gpu_memory_used", "object_count")
+	__slots__ = ("system_memory_used", "gpu_memory_used", "object_count", "asset_types")
 
 	def __init__(self) -> None:
 		self.system_memory_used: int = 0
@@ -855,11 +1325,18 @@ class CacheStats:
 		The amount of distinct assets present in the cache.
 		"""
 
+		self.asset_types: t.Dict[str, "CacheStats"] = {}
+		"""
+		The stats of each asset type's share of the cache. Only filled
+		in the stats returned by ``AssetSystemManager.get_cache_stats``.
+		"""
+
 	def copy(self) -> "CacheStats":
 		c = CacheStats()
 		c.system_memory_used = self.system_memory_used
 		c.gpu_memory_used = self.gpu_memory_used
 		c.object_count = self.object_count
+		c.asset_types = {k: v.copy() for k, v in self.asset_types.items()}
 		return c
 
 	def __eq__(self, o: object) -> bool:
@@ -872,6 +1349,79 @@ class CacheStats:
 		return NotImplemented
 
 
+class MemoryCalibration:
+	"""
+	Compares the estimated system memory usage of an asset type's
+	cached assets to the memory that was measured while loading them.
+	"""
+
+	__slots__ = ("asset_count", "estimated_size", "measured_size", "max_deviation")
+
+	def __init__(self) -> None:
+		self.asset_count: int = 0
+		"""Amount of cached assets that had their size measured."""
+
+		self.estimated_size: int = 0
+		"""Sum of the estimated system memory sizes of those assets."""
+
+		self.measured_size: int = 0
+		"""Sum of the measured system memory sizes of those assets."""
+
+		self.max_deviation: int = 0
+		"""
+		Largest absolute difference between an asset's estimated and
+		measured size.
+		"""
+
+	@property
+	def ratio(self) -> float:
+		"""
+		Factor that estimates would have to be multiplied with to match
+		the measurements.
+		"""
+		return self.measured_size / self.estimated_size if self.estimated_size else 0.0
+
+
+class _LoadAccounting:
+	__slots__ = ("start", "children")
+
+	def __init__(self, start: int) -> None:
+		self.start = start
+		self.children = 0
+
+
+class _InFlightLoad:
+	"""
+	An asset that is currently being loaded by some thread, which
+	other threads requesting the same asset can wait on.
+	"""
+
+	__slots__ = ("future", "thread_id")
+
+	def __init__(self) -> None:
+		self.future: Future = Future()
+		self.thread_id = threading.get_ident()
+
+
+class AssetRequestPriority(enum.IntEnum):
+	"""
+	Priority of an asset request inside of a ``LoadingProcedure``.
+	Requests of a lower value are started before ones of a higher
+	value.
+	"""
+
+	CRITICAL = 0
+	"""For assets a scene can't do anything without, e.g. song data."""
+
+	HIGH = 1
+	"""For assets central to a scene, such as characters or the HUD."""
+
+	NORMAL = 2
+
+	LOW = 3
+	"""For decorative assets."""
+
+
 class AssetRequest:
 	"""
 	Expresses a request for an asset.
@@ -888,6 +1438,7 @@ class AssetRequest:
 		kwargs: t.Optional[t.Dict[str, t.Any]] = None,
 		completion_tag: t.Optional[str] = None,
 		may_fail: bool = False,
+		priority: t.Optional[AssetRequestPriority] = None,
 	) -> None:
 		"""
 
@@ -905,10 +1456,13 @@ class AssetRequest:
 				This has no effect on actual ``LoadingProcedure``s, but will
 				affect functions that determine whether assets need to be
 				loaded.
+			priority: The request's priority. If ``None``, it will be
+				inherited from the ``LoadingRequest`` it is part of.
 		"""
 		self.args = () if args is None else args
 		self.kwargs = {} if kwargs is None else kwargs
 		self.may_fail = may_fail
+		self.priority = priority
 
 		if completion_tag is not None:
 			sct = completion_tag.split(".")
@@ -929,13 +1483,26 @@ class AssetRequest:
 
 # Yeah this is good class design
 class _ProcessedAssetRequest:
-	def __init__(self, asset_type_name: str, base_request: AssetRequest) -> None:
+	def __init__(
+		self,
+		asset_type_name: str,
+		base_request: AssetRequest,
+		default_priority: t.Optional[AssetRequestPriority] = None,
+	) -> None:
 		self.asset_type_name = asset_type_name
 		self.args = base_request.args
 		self.kwargs = base_request.kwargs
 		self.completion_tag = base_request.completion_tag
 		self.completion_tag_idx = base_request.completion_tag_idx
 		self.may_fail = base_request.may_fail
+		self.priority = (
+			default_priority if base_request.priority is None else base_request.priority
+		)
+		self.planned = False
+		"""
+		Whether this request was added by the loading planner instead
+		of being requested by anyone.
+		"""
 
 
 class LoadingRequest:
@@ -944,15 +1511,27 @@ class LoadingRequest:
 		asset_requests: t.Dict[str, t.Sequence[AssetRequest]],
 		on_load_callbacks: t.Optional[t.Dict[str, t.Callable[..., "LoadingRequest"]]] = None,
 		libraries: t.Optional[t.Sequence[str]] = None,
+		priority: t.Optional[AssetRequestPriority] = None,
 	) -> None:
+		"""
+		``priority`` will be given to all asset requests that do not
+		specify their own, as well as to the libraries.
+		If ``None``, they will receive the priority of the library
+		this request was created for or otherwise
+		``AssetRequestPriority.NORMAL`` once they are scheduled.
+		"""
 		self._asset_requests: t.List[_ProcessedAssetRequest] = []
 
 		self.libraries = () if libraries is None else libraries
 
+		self._library_priorities: t.Dict[str, AssetRequestPriority] = {}
+		if priority is not None:
+			self._library_priorities = {lib_name: priority for lib_name in self.libraries}
+
 		completion_tags: t.DefaultDict[str, t.List[_ProcessedAssetRequest]] = defaultdict(list)
 		for atn, requests in asset_requests.items():
 			for raw_request in requests:
-				request = _ProcessedAssetRequest(atn, raw_request)
+				request = _ProcessedAssetRequest(atn, raw_request, priority)
 				self._asset_requests.append(request)
 
 				if request.completion_tag is None:
@@ -1009,8 +1588,12 @@ class LoadingRequest:
 		r._completion_tags = {tag: l.copy() for tag, l in self._completion_tags.items()}
 		r._on_load_callbacks = {f: l.copy() for f, l in self._on_load_callbacks.items()}
 		r.libraries = list(self.libraries)
+		r._library_priorities = self._library_priorities.copy()
 		return r
 
+	def get_library_priority(self, lib_name: str) -> t.Optional[AssetRequestPriority]:
+		return self._library_priorities.get(lib_name)
+
 	def add_subrequest(self, other: "LoadingRequest") -> None:
 		# Get new asset requests into self._asset_requests
 		# Update self._completion_tags
@@ -1028,6 +1611,10 @@ class LoadingRequest:
 
 		ls = set(self.libraries)
 		self.libraries = list(self.libraries) + [l for l in other.libraries if l not in ls]
+		for lib_name, priority in other._library_priorities.items():
+			existing_priority = self._library_priorities.get(lib_name)
+			if existing_priority is None or priority < existing_priority:
+				self._library_priorities[lib_name] = priority
 
 		self._asset_requests += other._asset_requests
 
@@ -1064,20 +1651,49 @@ class LoadingProcedureProgress:
 
 
 class _AssetRequestProgressInfo:
-	__slots__ = ("future", "asset", "loaded")
+	__slots__ = ("future", "asset", "loaded", "priority", "adopted")
 
-	def __init__(self) -> None:
+	def __init__(self, priority: AssetRequestPriority) -> None:
 		self.future: t.Optional[Future] = None
 		self.asset: t.Any = None
 		self.loaded: bool = False
+		self.priority = priority
+		self.adopted: bool = False
+		"""
+		Whether ``future`` is another thread's in-flight load the
+		procedure is waiting on and has not received the result of yet.
+		Such futures are not the procedure's to cancel.
+		"""
 
 
 class _LibraryRequestProgressInfo:
-	__slots__ = ("future", "loaded")
+	__slots__ = ("future", "loaded", "priority")
 
-	def __init__(self) -> None:
+	def __init__(self, priority: AssetRequestPriority) -> None:
 		self.future: t.Optional[Future] = None
 		self.loaded: bool = False
+		self.priority = priority
+
+
+class _PendingLoadingJob:
+	__slots__ = ("priority", "sequence", "progress_info", "job", "done_callback")
+
+	def __init__(
+		self,
+		priority: AssetRequestPriority,
+		sequence: int,
+		progress_info: t.Union[_AssetRequestProgressInfo, _LibraryRequestProgressInfo],
+		job: t.Callable[[], t.Any],
+		done_callback: t.Callable[[Future], t.Any],
+	) -> None:
+		self.priority = priority
+		self.sequence = sequence
+		self.progress_info = progress_info
+		self.job = job
+		self.done_callback = done_callback
+
+	def __lt__(self, other: "_PendingLoadingJob") -> bool:
+		return (self.priority, self.sequence) < (other.priority, other.sequence)
 
 
 class _OnLoadCallbackInfo:
@@ -1108,14 +1724,38 @@ class LoadingProcedure:
 		executor: ThreadPoolExecutor,
 		asm: "AssetSystemManager",
 		root_request: LoadingRequest,
+		speculative: bool = False,
+		max_running_jobs: int = 8,
+		plan_key: t.Optional[t.Hashable] = None,
 	) -> None:
 		self._executor = executor
 		self._asm = asm
 
-		if not root_request.is_valid_root_request():
-			raise RuntimeError("Not a root request")
+		self.speculative = speculative
+		"""
+		Whether this procedure was started by ``start_speculative_load``
+		and loads assets that may never be needed.
+		"""
 
-		self._request = LoadingRequest({})
+		self.plan_key = plan_key
+		"""
+		Key the assets requested by this procedure are recorded under
+		once it completes, see ``AssetSystemManager.plan_loading_request``.
+		"""
+
+		self._plan_requested: t.Dict[
+			AssetIdentifier, t.Tuple[t.Tuple[t.Any, ...], t.Dict[str, t.Any], int]
+		] = {}
+		"""
+		Maps the identifiers of assets that were requested from this
+		procedure, not counting ones added by the loading planner, to
+		their loader arguments and priority.
+		"""
+
+		if not root_request.is_valid_root_request():
+			raise RuntimeError("Not a root request")
+
+		self._request = LoadingRequest({})
 
 		self._completion_tags: t.Dict[str, _CompletionTagInfo] = {}
 		self._on_load_callbacks: t.Dict[t.Callable[..., t.Any], _OnLoadCallbackInfo] = {}
@@ -1135,6 +1775,21 @@ class LoadingProcedure:
 		self._unreported_libraries: t.List[str] = []
 		self._unreported_asset_requests: t.List[_ProcessedAssetRequest] = []
 
+		self._pending_jobs: t.List[_PendingLoadingJob] = []
+		"""
+		Heap of loading jobs that have not been submitted to the
+		executor yet, ordered by priority and then submission order.
+		"""
+		self._job_sequence = 0
+		self._running_jobs = 0
+		self._max_running_jobs = max_running_jobs
+		"""
+		Jobs are only handed to the executor while less than this many
+		are running, so that a higher priority job submitted later does
+		not end up waiting behind a full executor queue.
+		"""
+		self._job_done_callbacks: t.Dict[Future, t.Callable[[Future], t.Any]] = {}
+
 		# Some notes on this lock:
 		# It needs to be an RLock in the event that a few `on_done_callback`s run
 		# immediately.
@@ -1164,13 +1819,24 @@ class LoadingProcedure:
 		This does not immediately stop all running loading threads.
 		You must wait until calls to ``is_done`` return ``True`` until
 		it is safe to start new ones.
+		Assets that were loaded until then stay in the cache, and the
+		ones still being loaded are finished and cached as well. A new
+		procedure requesting them will pick up those loads instead of
+		starting them over.
 		"""
 		with self._lock:
 			if self._cancelled:
 				return
 
 			self._cancelled = True
+			self._pending_jobs.clear()
 			for f in self._asset_requests.values():
+				if f.adopted:
+					# Not ours to cancel, but its done callback will still call back into the
+					# procedure. See `_on_adopted_future_done`.
+					self._cancelled_pending_return += 1
+					continue
+
 				if f.future is None or f.future.done():
 					continue
 
@@ -1191,6 +1857,10 @@ class LoadingProcedure:
 
 			self._executor.shutdown(wait=False)
 
+		# If no futures were running, nothing will call back into the asset system, so tell
+		# it about the cancellation here.
+		self._asm._forget_loading_procedure_if_done(self)
+
 	def _on_future_done(self, future: Future) -> None:
 		with self._lock:
 			if self._cancelled and not future.cancelled():
@@ -1199,35 +1869,152 @@ class LoadingProcedure:
 				# Ones that got cancelled normally are fine and not included in the count.
 				self._cancelled_pending_return -= 1
 
+			self._running_jobs -= 1
+			done_callback = self._job_done_callbacks.pop(future)
+			jobs = self._pop_startable_jobs()
+
+		# Keep the executor fed before letting the asset system process the result.
+		self._start_jobs(jobs)
+		done_callback(future)
+
+	def _pop_startable_jobs(self) -> t.List[_PendingLoadingJob]:
+		"""
+		Pops as many jobs off the pending job heap as may be started.
+		Must be called with the lock held.
+		"""
+		jobs = []
+		while self._pending_jobs and self._running_jobs < self._max_running_jobs:
+			jobs.append(heapq.heappop(self._pending_jobs))
+			self._running_jobs += 1
+		return jobs
+
+	def _start_jobs(self, jobs: t.List[_PendingLoadingJob]) -> None:
+		"""
+		Submits the given jobs to the executor. Must be called without
+		the lock held, as the job's done callbacks call back into the
+		asset system and may run immediately.
+		"""
+		for job in jobs:
+			try:
+				future = self._executor.submit(job.job)
+			except RuntimeError:
+				# Executor was shut down by a cancellation that happened since the job was
+				# popped.
+				with self._lock:
+					self._running_jobs -= 1
+				continue
+
+			with self._lock:
+				self._job_done_callbacks[future] = job.done_callback
+				job.progress_info.future = future
+				if self._cancelled and not future.cancel():
+					# Snuck through; `cancel` did not see this future.
+					self._cancelled_pending_return += 1
+
+			future.add_done_callback(self._on_future_done)
+
+	def _submit_loading_job(
+		self,
+		progress_info: t.Union[_AssetRequestProgressInfo, _LibraryRequestProgressInfo],
+		job: t.Callable[[], t.Any],
+		done_callback: t.Callable[[Future], t.Any],
+	) -> bool:
+		with self._lock:
+			if self._cancelled:
+				return False
+
+			heapq.heappush(
+				self._pending_jobs,
+				_PendingLoadingJob(
+					progress_info.priority, self._job_sequence, progress_info, job, done_callback
+				),
+			)
+			self._job_sequence += 1
+			jobs = self._pop_startable_jobs()
+
+		self._start_jobs(jobs)
+		return True
+
 	def _submit_asset_loading_job(
 		self,
 		asset_request: _ProcessedAssetRequest,
-		f: t.Callable[..., t.Any],
-		*args,
-		**kwargs,
-	) -> t.Optional[Future]:
+		job: t.Callable[[], t.Any],
+		done_callback: t.Callable[[Future], t.Any],
+	) -> bool:
+		"""
+		Queues ``job`` to be run on the executor by order of the
+		asset request's priority. ``done_callback`` will be called with
+		its future once it completes, outside of the procedure's lock.
+		Returns whether the job was queued, which it won't be if the
+		procedure was cancelled.
+		"""
+		return self._submit_loading_job(self._asset_requests[asset_request], job, done_callback)
+
+	def _adopt_asset_loading_future(
+		self,
+		asset_request: _ProcessedAssetRequest,
+		future: Future,
+		done_callback: t.Callable[[Future], t.Any],
+	) -> bool:
+		"""
+		Has the procedure wait on ``future``, which belongs to a load
+		of the asset request's asset another thread is running, as if
+		it were one of its own jobs. ``done_callback`` will be called
+		with it once it completes, outside of the procedure's lock.
+		Returns whether the future was adopted, which it won't be if
+		the procedure was cancelled.
+		"""
+		ar_info = self._asset_requests[asset_request]
 		with self._lock:
 			if self._cancelled:
-				# I guess we could get rid of none checks by introducing some kind of dummy
-				# "always cancelled" future, but that's be really ugly, so no
-				return None
+				return False
 
-			future = self._executor.submit(f, *args, **kwargs)
-			future.add_done_callback(self._on_future_done)
-			self._asset_requests[asset_request].future = future
-			return future
+			ar_info.future = future
+			ar_info.adopted = True
 
-	def _submit_library_loading_job(
-		self, library_name: str, f: t.Callable[[str], t.Any]
-	) -> t.Optional[Future]:
+		# May run right away if the load just finished.
+		future.add_done_callback(
+			functools.partial(self._on_adopted_future_done, ar_info, done_callback)
+		)
+		return True
+
+	def _on_adopted_future_done(
+		self,
+		ar_info: _AssetRequestProgressInfo,
+		done_callback: t.Callable[[Future], t.Any],
+		future: Future,
+	) -> None:
 		with self._lock:
+			ar_info.adopted = False
 			if self._cancelled:
-				return None
+				# `cancel` counted every adopted future whose callback had not run yet.
+				self._cancelled_pending_return -= 1
 
-			future = self._executor.submit(f, library_name)
-			future.add_done_callback(self._on_future_done)
-			self._library_requests[library_name].future = future
-			return future
+		done_callback(future)
+
+	def _note_requested_asset(
+		self, identifier: AssetIdentifier, asset_request: _ProcessedAssetRequest
+	) -> None:
+		"""
+		Notes the identifier an asset request resolved to for this
+		procedure's plan.
+		"""
+		if self.plan_key is None or asset_request.planned:
+			return
+
+		with self._lock:
+			priority = self._asset_requests[asset_request].priority
+			if (existing := self._plan_requested.get(identifier)) is not None:
+				priority = min(priority, existing[2])
+			self._plan_requested[identifier] = (asset_request.args, asset_request.kwargs, priority)
+
+	def _submit_library_loading_job(
+		self,
+		library_name: str,
+		job: t.Callable[[], t.Any],
+		done_callback: t.Callable[[Future], t.Any],
+	) -> bool:
+		return self._submit_loading_job(self._library_requests[library_name], job, done_callback)
 
 	def get_progress(self) -> LoadingProcedureProgress:
 		with self._lock:
@@ -1238,11 +2025,16 @@ class LoadingProcedure:
 				self._last_loaded_asset,
 			)
 
-	def is_done(self) -> bool:
+	def is_done(self, priority: t.Optional[AssetRequestPriority] = None) -> bool:
 		"""
 		Whether the loading procedure has completed.
 		No more threads for it are running and it is safe to start
 		new ones.
+
+		If ``priority`` is given, instead returns whether all assets
+		of that or a more important priority have been loaded and no
+		more of them can be requested. The procedure may then still
+		be loading less important ones.
 		"""
 		with self._lock:
 			if self._cancelled:
@@ -1253,7 +2045,15 @@ class LoadingProcedure:
 			if self._unreported_asset_requests or self._unreported_libraries:
 				return False
 
-			return self._requested == self._loaded
+			if priority is None:
+				return self._requested == self._loaded
+
+			if not self._requested_final:
+				return False
+
+			return all(
+				info.loaded for info in self._asset_requests.values() if info.priority <= priority
+			)
 
 	def schedule(self, new_request: LoadingRequest) -> None:
 		"""
@@ -1278,7 +2078,16 @@ class LoadingProcedure:
 		self._on_load_callbacks[cb].called = True
 		return cb(*args)
 
-	def _add_more_requests(self, new_requests: t.Iterable[LoadingRequest]) -> None:
+	def _add_more_requests(
+		self,
+		new_requests: t.Iterable[LoadingRequest],
+		default_priority: AssetRequestPriority = AssetRequestPriority.NORMAL,
+	) -> None:
+		"""
+		Adds the given requests to this procedure. Asset requests and
+		libraries without a set priority will receive
+		``default_priority``.
+		"""
 		req_queue = list(new_requests)
 
 		while req_queue:
@@ -1311,13 +2120,18 @@ class LoadingProcedure:
 					assert areq.completion_tag in self._completion_tags
 
 				self._requested += 1
-				self._asset_requests[areq] = _AssetRequestProgressInfo()
+				self._asset_requests[areq] = _AssetRequestProgressInfo(
+					default_priority if areq.priority is None else areq.priority
+				)
 				self._unreported_asset_requests.append(areq)
 
 			for lib_name in new_request.libraries:
 				if lib_name not in self._library_requests:
 					self._unreported_libraries.append(lib_name)
-					self._library_requests[lib_name] = _LibraryRequestProgressInfo()
+					lib_priority = new_request.get_library_priority(lib_name)
+					self._library_requests[lib_name] = _LibraryRequestProgressInfo(
+						default_priority if lib_priority is None else lib_priority
+					)
 
 		self._determine_finality()
 
@@ -1374,7 +2188,8 @@ class LoadingProcedure:
 			for cb in to_call:
 				new_requests.append(self._call_on_load_callback(cb))
 
-			self._add_more_requests(new_requests)
+			# Requests resulting from this asset are likely as important as it is.
+			self._add_more_requests(new_requests, ar_info.priority)
 
 	# TODO: The distinction between loaded assets/called callbacks and
 	# failed assets/retracted callbacks is lacking, but good enough for PNF's usecases
@@ -1407,7 +2222,7 @@ class LoadingProcedure:
 		with self._lock:
 			self._library_requests[lib_name].loaded = True
 			self._last_loaded_asset = f"lib:{lib_name}"
-			self._add_more_requests((lib_request,))
+			self._add_more_requests((lib_request,), self._library_requests[lib_name].priority)
 
 	def _library_failed_loading(self, lib_name, exc: BaseException) -> None:
 		with self._lock:
@@ -1418,7 +2233,7 @@ class LoadingProcedure:
 		"""
 		Not to be used by user code.
 		Returns all asset requests that have not yet been returned by
-		a call to this method.
+		a call to this method, most important ones first.
 		To be used by internal code that schedules the loads.
 		"""
 		if self._cancelled:
@@ -1427,6 +2242,7 @@ class LoadingProcedure:
 		with self._lock:
 			l = self._unreported_asset_requests
 			self._unreported_asset_requests = []
+			l.sort(key=lambda areq: self._asset_requests[areq].priority)
 			return l
 
 	def _get_new_libraries(self) -> t.List[str]:
@@ -1450,11 +2266,15 @@ class _CacheEntry(t.Generic[T]):
 	__slots__ = (
 		"item", "first_requested", "last_requested", "cache_hits", "required_by", "dependencies",
 		"estimated_size_system", "estimated_size_gpu", "estimated_provider_usage_system",
-		"estimated_provider_usage_gpu"
+		"estimated_provider_usage_gpu", "measured_size_system", "source_paths"
 	)
 
 	def __init__(
-		self, load_result: LoadResult[T], dependencies: t.List[AssetIdentifier], age: int
+		self,
+		load_result: LoadResult[T],
+		dependencies: t.List[AssetIdentifier],
+		age: int,
+		measured_size_system: t.Optional[int] = None,
 	) -> None:
 		self.item = load_result.item
 		self.first_requested = age
@@ -1466,6 +2286,17 @@ class _CacheEntry(t.Generic[T]):
 		self.estimated_size_gpu = load_result.estimated_size_gpu
 		self.estimated_provider_usage_system = load_result.provider_internal_size_system
 		self.estimated_provider_usage_gpu = load_result.provider_internal_size_gpu
+		self.measured_size_system = measured_size_system
+		"""
+		System memory allocated while loading the asset, not counting
+		its dependencies. Only available when memory accounting was
+		active at the time.
+		"""
+		self.source_paths: t.Tuple[str, ...] = ()
+		"""
+		Absolute paths of the files the asset was loaded from, not
+		counting files of its cached dependencies.
+		"""
 
 
 class _AssetType(t.Generic[T]):
@@ -1514,12 +2345,90 @@ class _AssetType(t.Generic[T]):
 		occupies, as reported by its ``get_cache_usage`` method.
 		"""
 
+		self.stats = CacheStats()
+		"""
+		This asset type's share of the asset system's memory usage
+		stats. Must only be modified with the cache lock held.
+		"""
+
+		self.quota_system: t.Optional[int] = None
+		"""
+		Amount of system memory assets of this type may take up before
+		an eviction limited to them is started. ``None`` for no quota.
+		See ``AssetSystemManager.set_asset_type_quota``.
+		"""
+
+		self.quota_gpu: t.Optional[int] = None
+		"""GPU memory equivalent of ``quota_system``."""
+
+		self.quota_extensions_sys: t.List[int] = []
+		"""
+		Decaying extensions of ``quota_system`` after an eviction
+		failed to bring usage under it, like
+		``AssetSystemManager._eviction_cur_limit_extensions_sys``.
+		"""
+
+		self.quota_extensions_gpu: t.List[int] = []
+		"""GPU memory equivalent of ``quota_extensions_sys``."""
+
 		self.loader: t.Optional[t.Callable[..., T]] = loader
 		"""
 		The generated loader function for this asset type.
 		"""
 
 
+class EvictionStats:
+	"""
+	Cheap dataclass for metrics about the asset system's evictions.
+	"""
+
+	__slots__ = (
+		"evictions", "failed_evictions", "steps", "evicted_assets", "total_pause_time",
+		"max_pause_time", "last_pause_time", "garbage_collections", "garbage_collection_time",
+	)
+
+	def __init__(self) -> None:
+		self.evictions: int = 0
+		"""The amount of evictions that were started."""
+
+		self.failed_evictions: int = 0
+		"""
+		The amount of evictions that completed without reaching their
+		memory targets.
+		"""
+
+		self.steps: int = 0
+		"""
+		The amount of eviction steps run. Each step pauses the main
+		thread for about ``AssetSystemManager.eviction_step_budget``.
+		"""
+
+		self.evicted_assets: int = 0
+
+		self.total_pause_time: float = 0.0
+		"""Time in seconds all eviction steps spent on the main thread."""
+
+		self.max_pause_time: float = 0.0
+		"""
+		Longest time in seconds a single eviction step spent on the
+		main thread. Garbage collections are included.
+		"""
+
+		self.last_pause_time: float = 0.0
+
+		self.garbage_collections: int = 0
+		"""The amount of garbage collections run by evictions."""
+
+		self.garbage_collection_time: float = 0.0
+		"""Time in seconds spent in those garbage collections."""
+
+	def copy(self) -> "EvictionStats":
+		c = EvictionStats()
+		for attr in self.__slots__:
+			setattr(c, attr, getattr(self, attr))
+		return c
+
+
 class EvictionProcessState:
 	def __init__(self) -> None:
 		self.sys_memory_target = 0
@@ -1528,19 +2437,53 @@ class EvictionProcessState:
 		self.opt_gpu_mem_target = 0
 		self.memory_targets_required = 0
 		self.gc_less_attempts_remaining = 0
+		self.next_gc_generation = 0
+		self.evict_sys_ram = False
+		self.evict_vram = False
+		self.effective_memory_limit_sys = 0
+		self.effective_memory_limit_gpu = 0
+		self.start_time = 0.0
+
+		self.asset_type_name: t.Optional[str] = None
+		"""
+		Name of the asset type the eviction is limited to because it
+		exceeded its quota. ``None`` for evictions caused by the
+		global memory limits.
+		"""
+
+		self.sweep: t.Optional[t.List[t.Tuple[AssetIdentifier, t.Dict, float]]] = None
+		"""
+		Eviction candidates of the sweep in progress, or ``None`` if
+		the next step has to start a new one.
+		"""
+		self.sweep_position = 0
+		self.sweep_had_trees = False
+		self.optimistic_sys_usage = 0
+		self.optimistic_gpu_usage = 0
+
 		self.completed = True
 
 	def reset(
 		self,
+		evict_sys_ram: bool,
+		evict_vram: bool,
 		sys_memory_target: t.Optional[int],
 		gpu_memory_target: t.Optional[int],
+		effective_memory_limit_sys: int,
+		effective_memory_limit_gpu: int,
 		gc_less_attempts: int,
 		optimistic_sweep_stop_factor: float,
+		asset_type_name: t.Optional[str] = None,
 	) -> None:
+		self.asset_type_name = asset_type_name
+		self.evict_sys_ram = evict_sys_ram
+		self.evict_vram = evict_vram
 		self.sys_memory_target = sys_memory_target
 		self.gpu_memory_target = gpu_memory_target
 		self.opt_sys_mem_target = None
-		self.gpu_sys_mem_target = None
+		self.opt_gpu_mem_target = None
+		self.effective_memory_limit_sys = effective_memory_limit_sys
+		self.effective_memory_limit_gpu = effective_memory_limit_gpu
 
 		self.memory_targets_required = 0
 
@@ -1553,6 +2496,9 @@ class EvictionProcessState:
 			self.opt_gpu_mem_target = gpu_memory_target * optimistic_sweep_stop_factor
 
 		self.gc_less_attempts_remaining = gc_less_attempts
+		self.next_gc_generation = 0
+		self.start_time = perf_counter()
+		self.sweep = None
 		self.completed = False
 
 	def get_result(self, sys_mem_used: int, gpu_mem_used: int) -> "_EvictionResult":
@@ -1585,12 +2531,74 @@ class AssetSystemManager:
 	# TODO
 	"""
 
-	def __init__(self, pyglet_clock: clock.Clock) -> None:
+	def __init__(
+		self,
+		pyglet_clock: clock.Clock,
+		cache_directory: t.Optional[Path] = None,
+		worker_processes: int = 0,
+		eviction_policy: t.Union[str, EvictionPolicy] = "burden",
+	) -> None:
 		self._clock = pyglet_clock
 
 		self._cwd = Path.cwd()
 
+		self.cache_directory = cache_directory
+		"""
+		A directory the asset system and its providers may store
+		persistent data in. May be ``None``, in which case nothing
+		is persisted.
+		"""
+
+		self.disk_cache: t.Optional[DiskCache] = None
+		"""
+		A cache for decoded assets that persists across launches.
+		Providers may use it to skip expensive decoding steps.
+		Lives in ``cache_directory``; ``None`` if that is ``None`` or
+		if the directory could not be created.
+		"""
+		if cache_directory is not None:
+			try:
+				self.disk_cache = DiskCache(cache_directory / "decoded")
+			except OSError as e:
+				logger.warning(f"Could not create disk cache, running without it: {e}")
+
+		self.asset_graph = AssetGraph()
+		"""
+		Dependencies of all assets loaded so far and the assets loading
+		procedures with a plan key requested. Persisted in
+		``cache_directory`` when the asset system is shut down.
+		See ``plan_loading_request``.
+		"""
+		self._asset_graph_path: t.Optional[Path] = None
+		if cache_directory is not None:
+			self._asset_graph_path = cache_directory / "asset_graph.json"
+			self.asset_graph = AssetGraph.load(self._asset_graph_path)
+
+		self._process_pool: t.Optional[ProcessPoolExecutor] = None
+		"""
+		Pool of worker processes CPU-heavy loading steps are handed to
+		via ``run_cpu_bound``. ``None`` if ``worker_processes`` was 0,
+		in which case those steps run on the calling thread.
+		"""
+		if worker_processes > 0:
+			# Spawn, as forking a process with a GL context and a bunch of threads is asking
+			# for trouble.
+			self._process_pool = ProcessPoolExecutor(
+				worker_processes,
+				multiprocessing.get_context("spawn"),
+				asset_workers.initialize_worker,
+			)
+
 		self.asset_router_stack: t.List[BaseAssetRouter] = []
+		self._route_cache: t.Dict[
+			t.Tuple[str, str],
+			t.Tuple[str, t.Optional[t.Dict[str, t.Any]], t.List[PostLoadProcessor]],
+		] = {}
+		"""
+		Memoized results of ``_route_asset``, keyed by path and asset
+		type name. Replaced with a new dict whenever the asset router
+		stack changes.
+		"""
 		self.asset_type_registry: t.Dict[str, _AssetType] = {}
 		self._pyobj_cache: t.Dict[t.Hashable, t.Any] = {}
 
@@ -1605,11 +2613,70 @@ class AssetSystemManager:
 		cause a race condition between loader threads.
 		"""
 
+		self._in_flight_loads: t.Dict[AssetIdentifier, _InFlightLoad] = {}
+		"""
+		Assets that are currently being loaded, so that other threads
+		requesting them wait for that load instead of starting another
+		one. Guarded by ``_cache_lock``.
+		"""
+
+		self._source_path_index: t.DefaultDict[str, t.Set[AssetIdentifier]] = defaultdict(set)
+		"""
+		Maps the absolute paths of files to the cached assets loaded
+		from them. Guarded by ``_cache_lock``.
+		"""
+
+		self._file_watcher: t.Optional[asset_watcher.FileWatcher] = None
+		"""Watcher for hot reloading, if running. See ``start_hot_reload``."""
+
+		self._changed_files: queue.SimpleQueue = queue.SimpleQueue()
+		"""Paths of changed files the file watcher reported."""
+
+		self._hot_reloads: t.List[t.Tuple[LoadingProcedure, t.Dict[AssetIdentifier, t.Any]]] = []
+		"""
+		Loading procedures reloading assets and the old versions of
+		the assets among them that were still in use.
+		"""
+
+		self._removed_usage: t.Dict[AssetIdentifier, t.Tuple[int, int]] = {}
+		"""
+		Cache hits and estimated sizes of assets that were removed from
+		the cache this session, for the usage snapshot recorded on
+		shutdown. Guarded by ``_cache_lock``.
+		"""
+
 		# TODO: make configurable
 		# NOTE: 4 threads max since they're all still pretty likely to run a good amount of
 		# python bytecode in the generated loader methods.
 		# Don't want them to starve the main or media thread too much.
 		self._loader_thread_count = 4
+		"""
+		Amount of loader threads of a loading procedure that may do work
+		at the same time. Each procedure gets twice as many threads,
+		so that while some are waiting on main thread work to complete,
+		others can continue with other assets.
+		"""
+
+		self.speculative_loader_thread_count = 1
+		"""
+		Equivalent of ``_loader_thread_count`` for speculative loading
+		procedures, which should stay out of the way of everything
+		else.
+		"""
+
+		self._main_thread_work: queue.SimpleQueue = queue.SimpleQueue()
+		"""
+		Contains loading steps unsuited for threads that loader threads
+		are waiting on, as tuples of function, args, kwargs and a
+		future to report the result to.
+		"""
+
+		self.main_thread_work_budget = 0.004
+		"""
+		Time in seconds ``process_main_thread_work`` may spend working
+		off the main thread work queue per call, by default.
+		At least one item will always be processed.
+		"""
 
 		# Tbh i think this lock is really pointless
 		self.loading_procedure_management_lock = threading.Lock()
@@ -1619,12 +2686,12 @@ class AssetSystemManager:
 
 		self._eviction_gate = threading.Event()
 		"""
-		All generated loaders will have to "pass" this gate.
-		This serves as not much more than a bandaid, but i guess it
-		doesn't hurt: If an eviction is scheduled/running, the cache has
-		filled up and in order to prevent memory peaking out by yet more
-		loaders getting data and holding onto it before they can interact
-		with the cache, the gate is closed.
+		All generated loaders running on loader threads will have to
+		"pass" this gate.
+		If an eviction is running and memory usage has gone past the
+		hard limit (see ``eviction_hard_limit_factor``), the gate is
+		closed to prevent memory peaking out by yet more loaders getting
+		data and holding onto it before the eviction catches up.
 		"""
 		self._eviction_gate.set()
 
@@ -1695,15 +2762,6 @@ class AssetSystemManager:
 		Also see ``self._bring_gc_closer_on_optimistic_sweep_stop``.
 		"""
 
-		self._eviction_safe_burden = 4096.0
-		"""
-		Assets with a burden score of less than this value will never
-		be evicted.
-		Theoretically, this allows to clog the asset cache up with
-		thousands of extremely small assets as long as they are somewhat
-		frequently used, but that is a super-duper unrealistic scenario.
-		"""
-
 		self._eviction_use_gc = True
 		"""
 		Whether to use garbage collections as part of an eviction.
@@ -1735,41 +2793,91 @@ class AssetSystemManager:
 		procedure.
 		"""
 
-		self.eviction_stale_age = 5
+		# TODO: make everything above this comment configurable
+
+		self.eviction_step_budget = 0.002
 		"""
-		An asset will be considered stale and be evicted with high
-		likelihood if it has not been requested for this many
-		generations.
+		Evictions run incrementally on the asset clock, as actual asset
+		eviction has to happen on the main thread. This is the time in
+		seconds each step may take, after which it yields until the
+		next tick. Garbage collections may exceed it.
 		"""
-		# TODO: make everything above this comment configurable
 
-		self._eviction_process_state = EvictionProcessState()
-		self._eviction_process_flag = threading.Event()
+		self.eviction_hard_limit_factor = 1.25
+		"""
+		If memory usage exceeds its limit multiplied by this factor
+		while an eviction is running, loader threads will be stalled
+		until the eviction completes.
 		"""
-		Used to communicate between the eviction and main thread, as
-		actual asset eviction has to happen on the main one.
+
+		self.eviction_policy = create_eviction_policy(eviction_policy)
+		"""
+		Policy deciding which assets to evict first. Must only be
+		accessed with the cache lock held.
+		"""
+
+		self._access_trace: t.Optional[t.TextIO] = None
+		"""
+		File cache accesses are written to, see ``start_access_trace``.
+		May only be read with the cache lock or the access trace lock
+		held and only be replaced with both held.
+		"""
+
+		self._access_trace_records: t.Deque[t.Dict[str, t.Any]] = deque()
+		"""
+		Access trace records that are yet to be written. Records are
+		queued with the cache lock held and written outside of it by
+		``_flush_access_trace``.
+		"""
+
+		self._access_trace_lock = threading.Lock()
 		"""
+		Lock held while writing to the access trace. Must never be
+		acquired while holding the cache lock.
+		"""
+
+		self._eviction_process_state = EvictionProcessState()
+		self._eviction_stats = EvictionStats()
 
 		self._eviction_cur_limit_extensions_sys: t.List[int] = []
 		self._eviction_cur_limit_extensions_gpu: t.List[int] = []
 
 		self._resolved_libraries: t.Dict[str, t.Dict[str, t.Sequence[ParameterTuple]]] = {}
+		self._library_discovery_thread: t.Optional[threading.Thread] = None
+		"""Thread running a background library discovery, if any."""
 		self._library_specs: t.Dict[str, t.Tuple[LibrarySpecPattern, ...]] = {}
 
 		self._threadloc = threading.local()
 		"""
 		Thread-local data. Contains:
 			`loading_stack`: Aids in tracking of assets dependencies.
+				Contains a list of identifier, dependencies and source
+				files for each cached asset being loaded and the string
+				"<uncached>" for each uncached one.
 
 			`threaded_load`: Whether the thread is primary or operates
 				for a threaded loading procedure.
 
-			`relay_queue`: A one-element queue used to communicate between
-				stages of a fragmented loading procedure
+			`cpu_slots`: A semaphore shared between all threads of a
+				loading procedure, limiting how many of them may do work
+				that is not waiting on the main thread.
+
+			`accounting_stack`: Allocation measurements of the loads
+				running on this thread, see ``start_memory_accounting``.
 		"""
 		self._threadloc.loading_stack = []
 		self._threadloc.threaded_load = False
-		self._threadloc.relay_queue = queue.Queue(1)
+		self._threadloc.cpu_slots = None
+		self._threadloc.accounting_stack = []
+
+		self._memory_accounting = False
+		self._apply_measured_sizes = False
+		self._started_tracemalloc = False
+		self._accounting_lock = threading.RLock()
+		"""
+		Lock serializing measured loads, as tracemalloc can't tell
+		apart the allocations of different threads.
+		"""
 
 	def set_default_asset_directory(self, path: Path) -> None:
 		"""
@@ -1783,9 +2891,168 @@ class AssetSystemManager:
 	def get_cache_stats(self) -> CacheStats:
 		"""
 		Returns the guessed amount of system memory the cached assets
-		are currently taking up, as well as the amount of them.
+		are currently taking up, as well as the amount of them, in
+		total and for each asset type.
 		"""
-		return self._memory_usage_stats.copy()
+		with self._cache_lock:
+			stats = self._memory_usage_stats.copy()
+			stats.asset_types = {
+				name: asset_type.stats.copy()
+				for name, asset_type in self.asset_type_registry.items()
+			}
+		return stats
+
+	def set_asset_type_quota(
+		self,
+		asset_type_name: str,
+		system_memory: t.Optional[int] = None,
+		gpu_memory: t.Optional[int] = None,
+	) -> None:
+		"""
+		Sets the amount of system and GPU memory in bytes the cached
+		assets of the given type may take up. ``None`` removes the
+		respective quota.
+
+		Once a type exceeds its quota, an eviction is started that
+		only considers assets of that type, so that e.g. large songs
+		push out other songs instead of textures that are still
+		needed. Evictions caused by the global memory limits will
+		also consider assets of types over their quota first.
+		"""
+		asset_type = self.asset_type_registry[asset_type_name]
+		asset_type.quota_system = system_memory
+		asset_type.quota_gpu = gpu_memory
+		asset_type.quota_extensions_sys = []
+		asset_type.quota_extensions_gpu = []
+
+	def _is_over_quota(self, asset_type: _AssetType) -> bool:
+		return (
+			(
+				asset_type.quota_system is not None and
+				asset_type.stats.system_memory_used > asset_type.quota_system
+			) or (
+				asset_type.quota_gpu is not None and
+				asset_type.stats.gpu_memory_used > asset_type.quota_gpu
+			)
+		)
+
+	def get_eviction_stats(self) -> EvictionStats:
+		"""
+		Returns metrics about the evictions run so far, most notably
+		the time they paused the main thread for.
+		"""
+		with self._eviction_lock:
+			return self._eviction_stats.copy()
+
+	def start_memory_accounting(self, apply: bool = False) -> None:
+		"""
+		Starts measuring the system memory allocated by each cached
+		load using ``tracemalloc``, which is started if it isn't
+		running already. See ``get_memory_calibration`` for the
+		results.
+
+		As ``tracemalloc`` can't attribute allocations to threads,
+		measured loads of loader threads are serialized, slowing
+		threaded loading down. Main thread loads that coincide with a
+		measured threaded load aren't measured at all, and allocations
+		the main thread makes in the meantime are attributed to that
+		load. Expect noise.
+
+		If ``apply`` is given, measured sizes will replace the estimated
+		system memory sizes of assets cached from now on, which the
+		memory limits are enforced against.
+		"""
+		if not tracemalloc.is_tracing():
+			tracemalloc.start()
+			self._started_tracemalloc = True
+		self._apply_measured_sizes = apply
+		self._memory_accounting = True
+
+	def stop_memory_accounting(self) -> None:
+		"""
+		Stops measuring loads. Sizes measured until now are kept.
+		"""
+		self._memory_accounting = False
+		self._apply_measured_sizes = False
+		if self._started_tracemalloc:
+			tracemalloc.stop()
+			self._started_tracemalloc = False
+
+	def get_memory_calibration(self) -> t.Dict[str, MemoryCalibration]:
+		"""
+		Returns, for each asset type, how estimated system memory
+		sizes of cached assets compare to the sizes measured while
+		they were loaded. Only assets loaded during memory accounting
+		are taken into account.
+		"""
+		res = {}
+		with self._cache_lock:
+			for at in self.asset_type_registry.values():
+				calib = MemoryCalibration()
+				for ce in at.cache.values():
+					if ce.measured_size_system is None:
+						continue
+
+					estimate = ce.estimated_size_system + ce.estimated_provider_usage_system
+					calib.asset_count += 1
+					calib.estimated_size += estimate
+					calib.measured_size += ce.measured_size_system
+					calib.max_deviation = max(
+						calib.max_deviation, abs(ce.measured_size_system - estimate)
+					)
+
+				if calib.asset_count > 0:
+					res[at.name] = calib
+
+		return res
+
+	def _begin_load_accounting(self) -> t.Optional[_LoadAccounting]:
+		"""
+		Starts measuring a load if memory accounting is active.
+		Every non-``None`` return value must be passed into
+		``_end_load_accounting``.
+		"""
+		if not self._memory_accounting:
+			return None
+
+		if self._threadloc.threaded_load:
+			if not self._accounting_lock.acquire(blocking=False):
+				# Don't hog a cpu slot while waiting
+				if (cpu_slots := self._threadloc.cpu_slots) is not None:
+					cpu_slots.release()
+				try:
+					self._accounting_lock.acquire()
+				finally:
+					if cpu_slots is not None:
+						cpu_slots.acquire()
+		elif not self._accounting_lock.acquire(blocking=False):
+			# Main thread may not wait for loader threads that might wait for it in turn.
+			return None
+
+		if not tracemalloc.is_tracing():
+			self._accounting_lock.release()
+			return None
+
+		accounting = _LoadAccounting(tracemalloc.get_traced_memory()[0])
+		self._threadloc.accounting_stack.append(accounting)
+		return accounting
+
+	def _end_load_accounting(self, accounting: _LoadAccounting) -> int:
+		"""
+		Finishes measuring a load and returns the memory it allocated,
+		minus the memory allocated by measured loads nested in it.
+		"""
+		total = 0
+		if tracemalloc.is_tracing():
+			# If tracing was stopped and restarted in the meantime, this is garbage.
+			total = max(tracemalloc.get_traced_memory()[0] - accounting.start, 0)
+		stack = self._threadloc.accounting_stack
+		stack.pop()
+		if stack:
+			stack[-1].children += total
+		self._accounting_lock.release()
+
+		return max(total - accounting.children, 0)
 
 	def _lookup_cache_key(
 		self, asset_type_name: str, key: t.Hashable, bump: bool = True
@@ -1801,24 +3068,127 @@ class AssetSystemManager:
 		"""
 		# My hope is the cache lock ensures that the item cannot be evicted as the reference
 		# created by building the tuple will make the sys.getrefcount call fail afterwards.
+		with self._cache_lock:
+			c = self.asset_type_registry[asset_type_name].cache
+			if key not in c:
+				return (False, None)
+
+			if bump:
+				c[key].last_requested = self.age
+				c[key].cache_hits += 1
+				self.eviction_policy.on_hit((asset_type_name, key))
+				self._trace_access(asset_type_name, key, c[key])
+			res = (True, c[key].item)
+
+		if self._access_trace_records:
+			self._flush_access_trace()
+
+		return res
+
+	def _note_source_path(self, path: str) -> None:
+		"""
+		Notes that the innermost cached asset being loaded on this
+		thread reads the file at ``path``.
+		Uncached assets have no entry their files could be noted on,
+		so their files count towards the cached asset loading them.
+		"""
+		for frame in reversed(self._threadloc.loading_stack):
+			if isinstance(frame, list):
+				frame[2].append(path)
+				return
+
+	def _claim_load(
+		self, asset_type_name: str, key: t.Hashable
+	) -> t.Tuple[bool, t.Any]:
+		"""
+		To be called after a cache miss on the given asset identifier.
+		Returns a two-element tuple where [0] denotes whether the asset
+		got encached in the meantime and [1] contains the asset if so.
+		Otherwise, [1] is the ``_InFlightLoad`` of the asset. If it
+		belongs to the calling thread, the asset has been claimed and
+		must be loaded and then passed to ``_resolve_load``, otherwise
+		it's to be waited on through ``_wait_for_load``.
+		[1] may also be ``None``, in which case the asset should be
+		loaded without any coordination.
+		"""
+		ident = (asset_type_name, key)
 		with self._cache_lock:
 			c = self.asset_type_registry[asset_type_name].cache
 			if key in c:
-				if bump:
-					c[key].last_requested = self.age
-					c[key].cache_hits += 1
 				return (True, c[key].item)
 
-		return (False, None)
+			if (in_flight := self._in_flight_loads.get(ident)) is None:
+				in_flight = self._in_flight_loads[ident] = _InFlightLoad()
+				return (False, in_flight)
 
-	def _encache(self, asset_type_name: str, key: t.Hashable, load_result: LoadResult) -> None:
+		# Recursive request on the same thread, don't wait on ourselves.
+		# Measured loads hold the accounting lock, which the thread we'd be waiting on may need.
+		# NOTE: Two threads loading assets that require each other the other way round would
+		# deadlock here, but assets don't do that.
+		if in_flight.thread_id == threading.get_ident() or self._threadloc.accounting_stack:
+			return (False, None)
+
+		return (False, in_flight)
+
+	def _wait_for_load(self, in_flight: _InFlightLoad) -> t.Any:
+		"""
+		Waits for another thread's load of an asset to finish and
+		returns the asset, or raises whatever the load raised.
+		On the main thread, keeps working off main thread work and
+		evictions while waiting, as the loader thread may depend on
+		those to progress.
+		"""
+		future = in_flight.future
+		if self._threadloc.threaded_load:
+			return self._wait_without_cpu_slot(future)
+
+		while not future.done():
+			self.process_main_thread_work(None)
+			if not self._eviction_gate.is_set():
+				# Loader threads are held up by the eviction, just finish it
+				self._run_eviction_step(None, None)
+			wait_futures((future,), 0.002)
+
+		return future.result()
+
+	def _resolve_load(
+		self,
+		asset_type_name: str,
+		key: t.Hashable,
+		in_flight: _InFlightLoad,
+		asset: t.Any = None,
+		exception: t.Optional[BaseException] = None,
+	) -> None:
+		"""
+		Ends an asset's in-flight load claimed through ``_claim_load``,
+		handing the asset or the exception its loading raised to all
+		threads waiting on it.
+		"""
+		with self._cache_lock:
+			self._in_flight_loads.pop((asset_type_name, key), None)
+
+		if exception is None:
+			in_flight.future.set_result(asset)
+		else:
+			in_flight.future.set_exception(exception)
+
+	def _encache(
+		self,
+		asset_type_name: str,
+		key: t.Hashable,
+		load_result: LoadResult,
+		measured_size: t.Optional[int] = None,
+		request: t.Optional[t.Tuple[t.Tuple[t.Any, ...], t.Dict[str, t.Any]]] = None,
+	) -> None:
 		# print("Encaching", asset_type_name, key)
 
 		asset_type = self.asset_type_registry[asset_type_name]
 
 		identifier = (asset_type_name, key)
 
-		ce = _CacheEntry(load_result, self._threadloc.loading_stack[-1][1], self.age)
+		ce = _CacheEntry(
+			load_result, self._threadloc.loading_stack[-1][1], self.age, measured_size
+		)
 		# print(f"Dependencies of {identifier} are {ce.dependencies}")
 
 		assert (
@@ -1826,40 +3196,74 @@ class AssetSystemManager:
 			ce.estimated_size_gpu + ce.estimated_provider_usage_gpu
 		) > 0
 
+		if measured_size is not None and self._apply_measured_sizes:
+			# Keep the provider's share, it's the only one that may legitimately predate
+			# the load.
+			ce.estimated_size_system = max(
+				measured_size - ce.estimated_provider_usage_system,
+				0 if ce.estimated_size_gpu + ce.estimated_provider_usage_gpu > 0 else 1,
+			)
+
 		if len(self._threadloc.loading_stack) > 1:
 			# print(f"Noted {self._threadloc.loading_stack[-2][0]} as dependant on {identifier}.")
 			ce.required_by.add(self._threadloc.loading_stack[-2][0])
 			self._threadloc.loading_stack[-2][1].append(identifier)
 
+		if request is not None:
+			self.asset_graph.record_asset(identifier, request[0], request[1], ce.dependencies)
+
+		ce.source_paths = tuple({
+			os.path.abspath(p) for p in self._threadloc.loading_stack[-1][2]
+		})
+
 		with self._cache_lock:
 			asset_type.cache[key] = ce
+			for path in ce.source_paths:
+				self._source_path_index[path].add(identifier)
+			file_watcher = self._file_watcher
+			self.eviction_policy.on_insert(
+				identifier,
+				ce.estimated_size_system + ce.estimated_provider_usage_system +
+					ce.estimated_size_gpu + ce.estimated_provider_usage_gpu,
+			)
+			self._trace_access(asset_type_name, key, ce)
 
 			# The provider (only cache-aware ones) may have different memory usage stats now, so
 			# go ahead and update them, merging into the total memory usage.
 			# Ignore provider_internal memory usage, as a provider may allocate larger pools of
 			# memory for the assets interned there.
 			pcs, pcg = asset_type.provider.get_cache_usage()
-			self._memory_usage_stats.object_count += 1
-			self._memory_usage_stats.system_memory_used += (
+			added_sys = (
 				ce.estimated_size_system +
 				(pcs - asset_type.current_provider_cache_memory_usage_system)
 			)
-			self._memory_usage_stats.gpu_memory_used += (
+			added_gpu = (
 				ce.estimated_size_gpu +
 				(pcg - asset_type.current_provider_cache_memory_usage_gpu)
 			)
+			for stats in (self._memory_usage_stats, asset_type.stats):
+				stats.object_count += 1
+				stats.system_memory_used += added_sys
+				stats.gpu_memory_used += added_gpu
 
 			asset_type.current_provider_cache_memory_usage_system = pcs
 			asset_type.current_provider_cache_memory_usage_gpu = pcg
 
+		if self._access_trace_records:
+			self._flush_access_trace()
+
+		if file_watcher is not None:
+			for path in ce.source_paths:
+				if os.path.isfile(path):
+					file_watcher.watch(path)
+
 		if not self._enable_automatic_eviction:
 			return
 
 		# Determine whether to start an eviction.
 		# Reduce possibly existing limit extensions beforehand and obey that.
 
-		# NOTE: This lock might be applied way too broadly, but the eviction is a heavily
-		# bottlenecking process anyways so who cares
+		run_synchronously = False
 		with self._eviction_lock:
 			effective_memory_limit_sys = self._sys_memory_limit
 			if self._eviction_cur_limit_extensions_sys:
@@ -1875,83 +3279,216 @@ class AssetSystemManager:
 					f"Reduced VRAM limit to {(effective_memory_limit_gpu) // 1024} KiB"
 				)
 
-			evict_sys_ram = (
-				(ce.estimated_size_system > 0 or ce.estimated_provider_usage_system > 0) and
-				self._memory_usage_stats.system_memory_used > effective_memory_limit_sys
-			)
-			evict_vram = (
-				(ce.estimated_size_gpu > 0 or ce.estimated_provider_usage_gpu > 0) and
-				self._memory_usage_stats.gpu_memory_used > effective_memory_limit_gpu
-			)
+			# Same deal for the asset type's quota.
+			effective_quota_sys = asset_type.quota_system
+			if asset_type.quota_extensions_sys:
+				extension = asset_type.quota_extensions_sys.pop()
+				if effective_quota_sys is not None:
+					effective_quota_sys += extension
+
+			effective_quota_gpu = asset_type.quota_gpu
+			if asset_type.quota_extensions_gpu:
+				extension = asset_type.quota_extensions_gpu.pop()
+				if effective_quota_gpu is not None:
+					effective_quota_gpu += extension
+
+			state = self._eviction_process_state
+			if not state.completed:
+				# Already running. Only check whether things are getting out of hand.
+				if self._is_over_hard_eviction_limit():
+					if self._threadloc.threaded_load:
+						self._eviction_gate.clear()
+					else:
+						run_synchronously = True
+			else:
+				# Quotas come first, an eviction limited to one type will hopefully spare the
+				# others. If it's not enough, the next encached asset will start a global one.
+				scoped_type_name = asset_type_name
+				evict_sys_ram = (
+					effective_quota_sys is not None and
+					(ce.estimated_size_system > 0 or ce.estimated_provider_usage_system > 0) and
+					asset_type.stats.system_memory_used > effective_quota_sys
+				)
+				evict_vram = (
+					effective_quota_gpu is not None and
+					(ce.estimated_size_gpu > 0 or ce.estimated_provider_usage_gpu > 0) and
+					asset_type.stats.gpu_memory_used > effective_quota_gpu
+				)
+				if evict_sys_ram or evict_vram:
+					sys_limit = asset_type.quota_system
+					gpu_limit = asset_type.quota_gpu
+					effective_memory_limit_sys = effective_quota_sys
+					effective_memory_limit_gpu = effective_quota_gpu
+				else:
+					scoped_type_name = None
+					sys_limit = self._sys_memory_limit
+					gpu_limit = self._gpu_memory_limit
+					evict_sys_ram = (
+						(ce.estimated_size_system > 0 or ce.estimated_provider_usage_system > 0) and
+						self._memory_usage_stats.system_memory_used > effective_memory_limit_sys
+					)
+					evict_vram = (
+						(ce.estimated_size_gpu > 0 or ce.estimated_provider_usage_gpu > 0) and
+						self._memory_usage_stats.gpu_memory_used > effective_memory_limit_gpu
+					)
 
-			l = []
-			if evict_sys_ram:
-				l.append("RAM")
-			if evict_vram:
-				l.append("VRAM")
-			if not l:
-				return
+				l = []
+				if evict_sys_ram:
+					l.append("RAM")
+				if evict_vram:
+					l.append("VRAM")
+				if not l:
+					return
 
-			logger.info(f"Exceeding {'+'.join(l)} limit, starting eviction")
+				if scoped_type_name is None:
+					logger.info(f"Exceeding {'+'.join(l)} limit, starting eviction")
+				else:
+					logger.info(
+						f"Exceeding {'+'.join(l)} quota of {scoped_type_name!r}, starting eviction"
+					)
+
+				state.reset(
+					evict_sys_ram,
+					evict_vram,
+					int(sys_limit * self._eviction_shrink_factor) if evict_sys_ram else None,
+					int(gpu_limit * self._eviction_shrink_factor) if evict_vram else None,
+					effective_memory_limit_sys or 0,
+					effective_memory_limit_gpu or 0,
+					self._eviction_gc_less_sweeps,
+					self._optimistic_sweep_stop_factor,
+					scoped_type_name,
+				)
+				self._eviction_stats.evictions += 1
+
+				if self._threadloc.threaded_load:
+					self._clock.schedule_once(self._run_eviction_step, 0.0)
+				else:
+					# Main thread loads are synchronous anyways, might as well do it now
+					run_synchronously = True
+
+		if run_synchronously:
+			self._run_eviction_step(None, None)
+
+	def _get_eviction_scope(self) -> t.Tuple[CacheStats, int, int]:
+		"""
+		Returns the memory usage stats the running eviction is trying
+		to bring down, as well as the system and GPU memory limit
+		they're judged against. Must be called with the eviction lock
+		held.
+		"""
+		state = self._eviction_process_state
+		if state.asset_type_name is None:
+			return (self._memory_usage_stats, self._sys_memory_limit, self._gpu_memory_limit)
+
+		asset_type = self.asset_type_registry[state.asset_type_name]
+		return (asset_type.stats, asset_type.quota_system or 0, asset_type.quota_gpu or 0)
+
+	def _is_over_hard_eviction_limit(self) -> bool:
+		state = self._eviction_process_state
+		stats, sys_limit, gpu_limit = self._get_eviction_scope()
+		return (
+			(
+				state.evict_sys_ram and
+				stats.system_memory_used > sys_limit * self.eviction_hard_limit_factor
+			) or (
+				state.evict_vram and
+				stats.gpu_memory_used > gpu_limit * self.eviction_hard_limit_factor
+			)
+		)
+
+	def _finish_eviction(self) -> None:
+		"""
+		Called once the running eviction has completed. Raises the
+		memory limits if it failed and reopens the eviction gate.
+		Must be called with the eviction lock held.
+		"""
+		state = self._eviction_process_state
+		stats, sys_limit, gpu_limit = self._get_eviction_scope()
+		eviction_res = state.get_result(stats.system_memory_used, stats.gpu_memory_used)
+		self._eviction_gate.set()
+		logger.info(
+			f"Eviction {'succeeded' if eviction_res.succeeded else 'failed'} after "
+			f"{perf_counter() - state.start_time:>.4f}s"
+		)
 
-			_start_time = perf_counter()
-			self._eviction_gate.clear()
+		if eviction_res.succeeded:
+			return
 
-			eviction_res = self._evict(evict_sys_ram, evict_vram)
+		self._eviction_stats.failed_evictions += 1
 
-			self._eviction_gate.set()
-			logger.info(
-				f"Eviction {'succeeded' if eviction_res.succeeded else 'failed'} after "
-				f"{perf_counter() - _start_time:>.4f}s"
+		# Eviction failed (but may have freed something), add limit.
+		# Existing limit extension will be replaced with the new one.
+		if eviction_res.succeeded_sys is False:
+			extensions = self._get_limit_extensions(
+				stats.system_memory_used,
+				state.effective_memory_limit_sys,
+				sys_limit,
+				self._eviction_limit_extension_sys,
 			)
+			if state.asset_type_name is None:
+				self._eviction_cur_limit_extensions_sys = extensions
+			else:
+				self.asset_type_registry[state.asset_type_name].quota_extensions_sys = extensions
+			logger.trace(f"RAM eviction limit raised to {(sys_limit + extensions[-1]) // 1024} KiB")
+
+		if eviction_res.succeeded_gpu is False:
+			extensions = self._get_limit_extensions(
+				stats.gpu_memory_used,
+				state.effective_memory_limit_gpu,
+				gpu_limit,
+				self._eviction_limit_extension_gpu,
+			)
+			if state.asset_type_name is None:
+				self._eviction_cur_limit_extensions_gpu = extensions
+			else:
+				self.asset_type_registry[state.asset_type_name].quota_extensions_gpu = extensions
+			logger.trace(f"VRAM eviction limit raised to {(gpu_limit + extensions[-1]) // 1024} KiB")
 
-			if eviction_res.succeeded:
-				return
-
-			# Eviction failed (but may have freed something), add limit.
-			# Existing limit extension will be replaced with the new one.
-			if eviction_res.succeeded_sys is False:
-				new_limit = (
-					max(self._memory_usage_stats.system_memory_used, effective_memory_limit_sys) +
-					self._eviction_limit_extension_sys
-				)
-				diff = new_limit - self._sys_memory_limit
-				assert diff > 0
-
-				self._eviction_cur_limit_extensions_sys = [
-					int(diff * (i / self._eviction_limit_extension_decay))
-					for i in range(1, self._eviction_limit_extension_decay + 1)
-				]
-				self._eviction_cur_limit_extensions_sys.append(new_limit)
-				logger.trace(
-					f"RAM eviction limit raised to "
-					f"{(self._sys_memory_limit + new_limit) // 1024} KiB"
-				)
+	def _get_limit_extensions(
+		self, memory_used: int, effective_limit: int, limit: int, extension: int
+	) -> t.List[int]:
+		"""
+		Returns the decaying list of extensions to ``limit`` after an
+		eviction failed to get ``memory_used`` under it.
+		"""
+		new_limit = max(memory_used, effective_limit) + extension
+		diff = new_limit - limit
+		assert diff > 0
 
-			if eviction_res.succeeded_gpu is False:
-				new_limit = (
-					max(self._memory_usage_stats.gpu_memory_used, effective_memory_limit_gpu) +
-					self._eviction_limit_extension_gpu
-				)
-				diff = new_limit - self._gpu_memory_limit
-				assert diff > 0
-
-				self._eviction_cur_limit_extensions_gpu = [
-					int(diff * (i / self._eviction_limit_extension_decay))
-					for i in range(1, self._eviction_limit_extension_decay + 1)
-				]
-				self._eviction_cur_limit_extensions_gpu.append(new_limit)
-				logger.trace(
-					f"VRAM eviction limit raised to "
-					f"{(self._gpu_memory_limit + new_limit) // 1024} KiB"
-				)
+		extensions = [
+			int(diff * (i / self._eviction_limit_extension_decay))
+			for i in range(1, self._eviction_limit_extension_decay + 1)
+		]
+		extensions.append(new_limit)
+		return extensions
 
-	def _remove_from_cache(self, asset_type_name: str, key: t.Hashable) -> None:
+	def _remove_from_cache(
+		self, asset_type_name: str, key: t.Hashable, unload: bool = True
+	) -> None:
+		"""
+		Removes an asset from the cache. Unless ``unload`` is
+		``False``, it is unloaded by its provider as well.
+		Must be called with the cache lock held.
+		"""
 		asset_type = self.asset_type_registry[asset_type_name]
 
 		removed_entry = asset_type.cache.pop(key)
 		removed_ident = (asset_type_name, key)
-		asset_type.provider.unload(key, removed_entry.item)
+		self.eviction_policy.on_remove(removed_ident)
+		if unload:
+			asset_type.provider.unload(key, removed_entry.item)
+
+		prev_hits, _ = self._removed_usage.get(removed_ident, (0, 0))
+		self._removed_usage[removed_ident] = (
+			prev_hits + removed_entry.cache_hits,
+			removed_entry.estimated_size_system + removed_entry.estimated_size_gpu,
+		)
+
+		for path in removed_entry.source_paths:
+			idents = self._source_path_index[path]
+			idents.discard(removed_ident)
+			if not idents:
+				del self._source_path_index[path]
 
 		for n, k in removed_entry.dependencies:
 			self.asset_type_registry[n].cache[k].required_by.remove(removed_ident)
@@ -1970,9 +3507,10 @@ class AssetSystemManager:
 			removed_entry.estimated_size_gpu +
 			(asset_type.current_provider_cache_memory_usage_gpu - pcg)
 		)
-		self._memory_usage_stats.object_count -= 1
-		self._memory_usage_stats.system_memory_used -= freed_sys
-		self._memory_usage_stats.gpu_memory_used -= freed_gpu
+		for stats in (self._memory_usage_stats, asset_type.stats):
+			stats.object_count -= 1
+			stats.system_memory_used -= freed_sys
+			stats.gpu_memory_used -= freed_gpu
 
 		# print(
 		# 	f"Evicted {asset_type_name} {key}\n"
@@ -1994,6 +3532,7 @@ class AssetSystemManager:
 			"size_sys": entry.estimated_size_system + entry.estimated_provider_usage_system,
 			"size_gpu": entry.estimated_size_gpu + entry.estimated_provider_usage_gpu,
 			"last_requested": entry.last_requested,
+			"cache_hits": entry.cache_hits,
 			"immediate_dependencies": 0,
 			"full_dependencies": 0,
 		}
@@ -2014,71 +3553,31 @@ class AssetSystemManager:
 
 		return burden_dict
 
-	def _weigh_burden(self, b):
-		# TODO: May want to use cache_hits as well to prefer assets not requested as much.
-		# Considering that can be falsified easily by just having poor code that calls load_x
-		# often and relies on the cache though, make its impact minimal
-
-		unused_for = self.age - b["last_requested"]
-		size_factor = 1.0
-		if unused_for <= 1:
-			size_factor = 1.0
-		elif unused_for > self.eviction_stale_age:
-			size_factor = 999999999999.0
-		else:
-			# Make Euler spin in his grave and completely misuse the fancy normal distribution
-			# curve between 1..unused_cutoff
-			# sigma found by guessing, it's 1.7
-			q = ndist_1(1.0, 1.7)
-			v = ndist_1(float(unused_for), 1.7)
-			# TODO: These numbers explode pretty quickly, so quickly that they might overshadow
-			# the burden factor given by the stale generation limit.
-			# Might look into expanding the comparison key into a tuple that has 0 as first
-			# element for non-stale assets, but their respective age for others.
-			if v == 0.0:
-				# who knows what those floats are up to
-				v = 0.000000000001
-			# size_factor = 1.0 / ((1.0/q) * v)
-			size_factor = min(q / v, 999999999999.0)
-
-		# Calculate how much of a burden an asset is
-		# Larger assets should be more targeted for eviction simply cause they fill a lot of
-		# memory, but even more so ones that have not been used for some time
-		# `size_factor` should explode to pretty high values after an asset was unused for 4
-		# generations or so
-
-		return size_factor
-
-	def _evict(self, evict_sys_ram: bool, evict_vram: bool) -> _EvictionResult:
-		"""
-		Run and complete a cache eviction. May be called from any
-		thread, should be called from within a generated loader.
-		"""
-		# TODO: that's a silly limitation, it makes sense to hand control
-		# over to manual eviction. look into something like that.
-		if not evict_sys_ram and not evict_vram:
-			return _EvictionResult(None, None)
-
-		self._eviction_process_state.reset(
-			int(self._sys_memory_limit * self._eviction_shrink_factor) if evict_sys_ram else None,
-			int(self._gpu_memory_limit * self._eviction_shrink_factor) if evict_vram else None,
-			self._eviction_gc_less_sweeps,
-			self._optimistic_sweep_stop_factor,
-		)
+	def _run_eviction_step(self, _=None, budget: t.Optional[float] = -1.0) -> None:
+		"""
+		Runs the current eviction for ``budget`` seconds, which
+		defaults to ``eviction_step_budget``. If ``None``, runs it to
+		completion. Reschedules itself on the asset clock if the
+		eviction isn't done by then.
+		Must be called from the main thread.
+		"""
+		if budget is not None and budget < 0.0:
+			budget = self.eviction_step_budget
 
 		# Because i'm not implementing a manual refcounter, we can only reliably process top-level
 		# assets per sweep.
 
 		# NOTE: By creative usage of lambdas and the likes, scenes can live longer than they
 		# should, which might make them hold on to heavy resources that aren't being used
-		# anymore. Running a full garbage collection feels like overkill, but it is in fact
-		# capable of getting rid of references to expensive images and the like.
-		# We start running those after two cycles that haven't yielded sufficient cleanup.
+		# anymore. Garbage collections are capable of getting rid of references to expensive
+		# images and the like, but a full one is a massive stall. We start running those
+		# after a few sweeps that haven't yielded sufficient cleanup, and then only of
+		# increasing generations.
 
 		# Evict until we understepped all values we care about.
 		# Eviction scheme goes:
 		# - Get the eviction list and sort them depending on which memory types to clear.
-		# - Throw out the most undesirable assets
+		# - Throw out the most undesirable assets, a few per step
 		#   - In case of a tree, act optimistically! This prevents top-level tiny items from
 		#     being evicted in the first sweep: Stop the sweep once a tree would in theory
 		#     satisfy eviction requirements. (See `_optimistic_sweep_stop_factor`.)
@@ -2086,194 +3585,257 @@ class AssetSystemManager:
 		# - The sweep is done.
 		#   - If everything's been cleared out and that wasn't enough, tough luck. Done.
 		#   - If there have been trees that only just had a bit off the top, retry.
-		#   - If we've been through this two times already, start running an expensive GC.
+		#   - If we've been through this a few times already, start running garbage collections.
+
+		with self._eviction_lock:
+			state = self._eviction_process_state
+			if state.completed:
+				return
+
+			stime = perf_counter()
+			while not state.completed:
+				if state.sweep is None:
+					self._start_eviction_sweep()
+				else:
+					self._advance_eviction_sweep()
+
+				if budget is not None and perf_counter() - stime >= budget:
+					break
+
+			pause_time = perf_counter() - stime
+			self._eviction_stats.steps += 1
+			self._eviction_stats.total_pause_time += pause_time
+			self._eviction_stats.last_pause_time = pause_time
+			if pause_time > self._eviction_stats.max_pause_time:
+				self._eviction_stats.max_pause_time = pause_time
+
+			if state.completed:
+				self._finish_eviction()
+			else:
+				if not self._is_over_hard_eviction_limit():
+					self._eviction_gate.set()
+				self._clock.schedule_once(self._run_eviction_step, 0.0)
+
+	def _run_eviction_gc(self) -> None:
+		state = self._eviction_process_state
+		generation = min(state.next_gc_generation, 2)
+		logger.trace(f"Running generation {generation} garbage collection for asset eviction.")
+
+		stime = perf_counter()
+		gc.collect(generation)
+		self._eviction_stats.garbage_collections += 1
+		self._eviction_stats.garbage_collection_time += perf_counter() - stime
+
+		state.next_gc_generation = generation + 1
+
+	def _is_evictable(self, asset_type_name: str, ck: t.Hashable, ce: _CacheEntry) -> bool:
+		if any(
+			isinstance(frame, list) and frame[0] == (asset_type_name, ck)
+			for frame in self._threadloc.loading_stack
+		):
+			# The eviction process may be run by an asset which is being loaded as
+			# a dependency of another asset.
+			# Since this asset will have an incomplete dependency tree (the asset
+			# being loaded does not exist yet), ignore it
+			return False
+
+		# TODO: could probably prevent full iteration by storing toplevel assets
+		if ce.required_by:
+			return False
+
+		if self.eviction_consideration_age > (self.age - ce.last_requested):
+			return False
+
+		# Reference from the cache entry and the one made by passing it into getrefcount.
+		return sys.getrefcount(ce.item) == 2
+
+	def _start_eviction_sweep(self) -> None:
+		"""
+		Builds the list of eviction candidates for a new sweep or, if
+		there are none, decides how to continue the eviction.
+		"""
+		state = self._eviction_process_state
+
+		if state.gc_less_attempts_remaining == 0 and self._eviction_use_gc:
+			self._run_eviction_gc()
 
 		# TODO: Building the trees all the time can definitely be avoided, but in the end
 		# some linear operations and a sort across 200 objects max are just not that much.
 
-		while not self._eviction_process_state.completed:
-			if self._eviction_process_state.gc_less_attempts_remaining == 0:
-				logger.trace("Running garbage collection for asset eviction. This may stall.")
-				gc.collect()  # generation=2
+		if state.asset_type_name is None:
+			considered_types = list(self.asset_type_registry.values())
+		else:
+			considered_types = [self.asset_type_registry[state.asset_type_name]]
 
-			with self._cache_lock:
-				evictable_toplevel_assets = set()
-				for at in self.asset_type_registry.values():
-					for ck, ce in at.cache.items():
-						if any(a == (at.name, ck) for a, _ in self._threadloc.loading_stack):
-							# The eviction process may be run by an asset which is being loaded as
-							# a dependency of another asset.
-							# Since this asset will have an incomplete dependency tree (the asset
-							# being loaded does not exist yet), ignore it
-							# print(
-							# 	"not considering", at.name, ck, "for eviction: in loading stack"
-							# )
-							continue
-
-						# TODO: could probably prevent full iteration by storing toplevel assets
-						if ce.required_by:
-							# print("not considering", at.name, ck, "for eviction: not top-level")
-							continue
-
-						if self.eviction_consideration_age > (self.age - ce.last_requested):
-							# print(
-							# 	"not considering", at.name, ck, "for eviction: used too recently"
-							# )
-							continue
-
-						rc = sys.getrefcount(ce.item) - 1
-						if rc != 1:
-							# print(
-							# 	"not considering", at.name, ck, "for eviction: in use. "
-							# 	"refcount ==", rc
-							# )
-							continue
-
-						evictable_toplevel_assets.add((at.name, ck))
-
-				eviction_list = []
-				for identifier in evictable_toplevel_assets:
-					d = self._calculate_burden_dict(*identifier)
-					relevant_size = d["size_sys"] * evict_sys_ram + d["size_gpu"] * evict_vram
-
-					# When we should clean up only RAM, don't care about VRAM of course, and
-					# vice-versa.
-					# If there's assets that occupy space in both (somehow?), there's no real
-					# point in protecting the memory type that isn't used, just judge them by
-					# combined sizes.
-					# However, it's possible a sweep goes too far and then evicts a bunch of RAM
-					# objects simply because VRAM is overcrowded. We exclude objects based on
-					# that, which is the primary reason their size may not be 0.
-					if relevant_size == 0:
-						# print(f"not considering {identifier} for eviction: relevant size == 0")
-						continue
+		with self._cache_lock:
+			evictable_toplevel_assets = [
+				(at.name, ck)
+				for at in considered_types
+				for ck, ce in at.cache.items()
+				if self._is_evictable(at.name, ck, ce)
+			]
+			over_quota_types = {at.name for at in considered_types if self._is_over_quota(at)}
+
+			eviction_list = []
+			for identifier in evictable_toplevel_assets:
+				d = self._calculate_burden_dict(*identifier)
+				relevant_size = d["size_sys"] * state.evict_sys_ram + d["size_gpu"] * state.evict_vram
+
+				# When we should clean up only RAM, don't care about VRAM of course, and
+				# vice-versa.
+				# If there's assets that occupy space in both (somehow?), there's no real
+				# point in protecting the memory type that isn't used, just judge them by
+				# combined sizes.
+				# However, it's possible a sweep goes too far and then evicts a bunch of RAM
+				# objects simply because VRAM is overcrowded. We exclude objects based on
+				# that, which is the primary reason their size may not be 0.
+				if relevant_size == 0:
+					continue
 
-					burden_score = relevant_size * self._weigh_burden(d)
-					if burden_score <= self._eviction_safe_burden:
-						# print(
-						# 	f"not considering {identifier} for eviction: below safe burden score"
-						# )
-						continue
+				score = self.eviction_policy.get_score(
+					EvictionCandidate(
+						identifier,
+						relevant_size,
+						d["size_sys"],
+						d["size_gpu"],
+						d["last_requested"],
+						d["cache_hits"],
+						d["immediate_dependencies"],
+					),
+					self.age,
+				)
+				if score is None:
+					continue
 
-					eviction_list.append((identifier, d, burden_score))
+				eviction_list.append((identifier, d, score))
 
-				if not eviction_list:
-					if self._eviction_process_state.gc_less_attempts_remaining > 0:
-						logger.trace("Out of evictable items, retrying with gc")
-						self._eviction_process_state.gc_less_attempts_remaining = 0
-					else:
-						logger.trace("Out of evictable items, eviction unsuccessful.")
-						self._eviction_process_state.completed = True
-					continue
+			stats, _, _ = self._get_eviction_scope()
+			state.optimistic_sys_usage = stats.system_memory_used
+			state.optimistic_gpu_usage = stats.gpu_memory_used
 
-				eviction_list.sort(key = lambda x: x[2], reverse=True)
+		if not eviction_list:
+			if state.gc_less_attempts_remaining > 0 and self._eviction_use_gc:
+				logger.trace("Out of evictable items, retrying with gc")
+				state.gc_less_attempts_remaining = 0
+			elif (
+				state.gc_less_attempts_remaining == 0 and state.next_gc_generation <= 2 and
+				self._eviction_use_gc
+			):
+				logger.trace("Out of evictable items, retrying with an older gc generation")
+			else:
+				logger.trace("Out of evictable items, eviction unsuccessful.")
+				state.completed = True
+			return
 
-				# self._dump_eviction_list(eviction_list)
+		# Assets of types over their quota go first, then by score.
+		eviction_list.sort(key = lambda x: (x[0][0] in over_quota_types, x[2]), reverse=True)
 
-				if self._threadloc.threaded_load:
-					self._eviction_process_flag.clear()
-					self._clock.schedule_once(self._run_eviction_sweep, 0.0, eviction_list)
-					self._eviction_process_flag.wait()
-				else:
-					self._run_eviction_sweep(None, eviction_list)
+		# self._dump_eviction_list(eviction_list)
 
-		return self._eviction_process_state.get_result(
-			self._memory_usage_stats.system_memory_used, self._memory_usage_stats.gpu_memory_used
-		)
+		state.sweep = eviction_list
+		state.sweep_position = 0
+		state.sweep_had_trees = False
 
-	def _run_eviction_sweep(
-		self, _, list_: t.Iterable[t.Tuple[AssetIdentifier, t.Dict, float]]
-	) -> None:
-		memory_targets_required = self._eviction_process_state.memory_targets_required
+	def _advance_eviction_sweep(self) -> None:
+		"""
+		Evicts the next candidate of the running sweep and ends the
+		sweep if appropiate.
+		"""
+		state = self._eviction_process_state
 
-		sys_mem_target = self._eviction_process_state.sys_memory_target
-		gpu_mem_target = self._eviction_process_state.gpu_memory_target
-		opt_sys_mem_target = self._eviction_process_state.opt_sys_mem_target
-		opt_gpu_mem_target = self._eviction_process_state.opt_gpu_mem_target
+		if state.sweep_position >= len(state.sweep):
+			self._end_eviction_sweep(_EvictionSweepStopReason.EXHAUSTED)
+			return
 
-		optimistic_sys_usage = self._memory_usage_stats.system_memory_used
-		optimistic_gpu_usage = self._memory_usage_stats.gpu_memory_used
+		ident, bd, _ = state.sweep[state.sweep_position]
+		state.sweep_position += 1
 
-		had_trees = False
-		stop_reason: t.Optional[_EvictionSweepStopReason] = None
+		with self._cache_lock:
+			# Things may have changed since the list was built a few ticks ago.
+			cache = self.asset_type_registry[ident[0]].cache
+			if ident[1] not in cache or not self._is_evictable(*ident, cache[ident[1]]):
+				return
 
-		for ident, bd, _ in list_:
 			if bd["immediate_dependencies"] > 0:
-				had_trees = True
+				state.sweep_had_trees = True
 
 			self._remove_from_cache(*ident)
-
-			# This may be a tree, subtract all of its size.
-			# Helps to prevent clearing of low-burden assets in case the entire tree can be taken
-			# down over the next sweeps.
-			# Problem: We don't want to stop the sweep too fast (in case the tree's subresources
-			# actually turn out to not be evictable) and also not run over too many low-burden
-			# assets.
-			optimistic_sys_usage -= bd["size_sys"]
-			optimistic_gpu_usage -= bd["size_gpu"]
-
-			targets_completed = 0
-			targets_completed_opt = 0
-			if sys_mem_target is not None:
-				if self._memory_usage_stats.system_memory_used <= sys_mem_target:
-					targets_completed += 1
-				if optimistic_sys_usage <= opt_sys_mem_target:
-					targets_completed_opt += 1
-
-			if gpu_mem_target is not None:
-				if self._memory_usage_stats.gpu_memory_used <= gpu_mem_target:
-					targets_completed += 1
-				if optimistic_gpu_usage <= opt_gpu_mem_target:
-					targets_completed_opt += 1
-
-			if targets_completed == memory_targets_required:
-				stop_reason = _EvictionSweepStopReason.SUCCEEDED
-				break
-
-			if targets_completed_opt == memory_targets_required:
-				# logger.trace("Eviction sweep stopped, optimistic target fulfilled")
-				stop_reason = _EvictionSweepStopReason.OPTIMISTIC
-				break
-		else:
-			stop_reason = _EvictionSweepStopReason.EXHAUSTED
+			self._eviction_stats.evicted_assets += 1
+
+		# This may be a tree, subtract all of its size.
+		# Helps to prevent clearing of low-burden assets in case the entire tree can be taken
+		# down over the next sweeps.
+		# Problem: We don't want to stop the sweep too fast (in case the tree's subresources
+		# actually turn out to not be evictable) and also not run over too many low-burden
+		# assets.
+		state.optimistic_sys_usage -= bd["size_sys"]
+		state.optimistic_gpu_usage -= bd["size_gpu"]
+
+		stats, _, _ = self._get_eviction_scope()
+		targets_completed = 0
+		targets_completed_opt = 0
+		if state.sys_memory_target is not None:
+			if stats.system_memory_used <= state.sys_memory_target:
+				targets_completed += 1
+			if state.optimistic_sys_usage <= state.opt_sys_mem_target:
+				targets_completed_opt += 1
+
+		if state.gpu_memory_target is not None:
+			if stats.gpu_memory_used <= state.gpu_memory_target:
+				targets_completed += 1
+			if state.optimistic_gpu_usage <= state.opt_gpu_mem_target:
+				targets_completed_opt += 1
+
+		if targets_completed == state.memory_targets_required:
+			self._end_eviction_sweep(_EvictionSweepStopReason.SUCCEEDED)
+		elif targets_completed_opt == state.memory_targets_required:
+			self._end_eviction_sweep(_EvictionSweepStopReason.OPTIMISTIC)
+
+	def _end_eviction_sweep(self, stop_reason: _EvictionSweepStopReason) -> None:
+		state = self._eviction_process_state
+		state.sweep = None
 
 		logger.trace(f"Eviction sweep done: {stop_reason.name}")
 
 		decrement_gc = False
 		if stop_reason is _EvictionSweepStopReason.SUCCEEDED:
-			self._eviction_process_state.completed = True
+			state.completed = True
 
 		elif stop_reason is _EvictionSweepStopReason.OPTIMISTIC:
-			assert had_trees
+			assert state.sweep_had_trees
 			if self._bring_gc_closer_on_optimistic_sweep_stop:
 				decrement_gc = True
 
 		elif stop_reason is _EvictionSweepStopReason.EXHAUSTED:
-			if had_trees:
+			if state.sweep_had_trees:
 				decrement_gc = True
 			else:
-				if self._eviction_process_state.gc_less_attempts_remaining > 0:
+				if state.gc_less_attempts_remaining > 0 and self._eviction_use_gc:
 					logger.trace(
 						"Eviction sweep done and no more trees, enabling garbage collection "
-						"now for final sweep."
+						"now for final sweeps."
 					)
-					self._eviction_process_state.gc_less_attempts_remaining = 0
+					state.gc_less_attempts_remaining = 0
+				elif (
+					state.gc_less_attempts_remaining == 0 and state.next_gc_generation <= 2 and
+					self._eviction_use_gc
+				):
+					# Keep going, the next sweep will run an older gc generation.
+					pass
 				else:
-					self._eviction_process_state.completed = True
+					state.completed = True
 		else:
 			raise RuntimeError("unreachable")
 
-		if decrement_gc and self._eviction_process_state.gc_less_attempts_remaining > 0:
-			if self._eviction_process_state.gc_less_attempts_remaining == 1:
+		if decrement_gc and state.gc_less_attempts_remaining > 0:
+			if state.gc_less_attempts_remaining == 1:
 				logger.trace("Enabling garbage collection for next eviction sweeps")
-			self._eviction_process_state.gc_less_attempts_remaining -= 1
-
-		self._eviction_process_flag.set()
+			state.gc_less_attempts_remaining -= 1
 
 	def _dump_eviction_list(self, el) -> None:
-		print("===== Up for eviction (burden score, type, cache key):")
-		for (at_name, ck), _, burden_score in el:
-			print(f"{burden_score:>14.2f} {at_name:<16} # {ck}")
+		print("===== Up for eviction (eviction score, type, cache key):")
+		for (at_name, ck), _, score in el:
+			print(f"{score:>14.2f} {at_name:<16} # {ck}")
 		print("=====")
 
 	def advance_age(self) -> None:
@@ -2285,28 +3847,384 @@ class AssetSystemManager:
 		This aids in considerations for which assets to unload.
 		"""
 		self.age += 1
+		with self._cache_lock:
+			if self._access_trace is not None:
+				self._access_trace_records.append({"event": "age", "age": self.age})
+
+		self._flush_access_trace()
+
+	def start_access_trace(self, path: t.Union[str, Path]) -> None:
+		"""
+		Starts writing every asset entering or being retrieved from
+		the cache into the file at ``path``, as well as changes of the
+		asset system's age. The resulting trace can be replayed through
+		the available eviction policies by running
+		``python -m pyday_night_funkin.core.eviction_policies <path>``.
+		Stops any trace that is already being written.
+		"""
+		f = open(path, "w", encoding="utf-8")
+		with self._access_trace_lock:
+			with self._cache_lock:
+				old_trace = self._access_trace
+				self._access_trace = f
+				old_records = self._take_access_trace_records()
+				self._access_trace_records.append({"event": "age", "age": self.age})
+
+			if old_trace is not None:
+				self._write_access_trace_records(old_trace, old_records)
+				old_trace.close()
+
+	def stop_access_trace(self) -> None:
+		"""
+		Stops writing the access trace, if one is being written.
+		"""
+		with self._access_trace_lock:
+			with self._cache_lock:
+				trace = self._access_trace
+				self._access_trace = None
+				records = self._take_access_trace_records()
+
+			if trace is not None:
+				self._write_access_trace_records(trace, records)
+				trace.close()
+
+	def start_hot_reload(self, polling_interval: float = 0.5) -> None:
+		"""
+		Starts watching the files behind cached assets. Once one of
+		them changes, all assets loaded from it as well as all assets
+		requiring those are removed from the cache and loaded again by
+		a loading procedure.
+		Old versions of assets that were still in use are handed to
+		their provider's ``reload_in_place`` once the reload is done,
+		so textures and frame collections used by live sprites are
+		updated. Other assets in use will only be replaced once their
+		users request them again.
+
+		Uses inotify where available, otherwise polls the files every
+		``polling_interval`` seconds.
+		Meant for development: Old versions of assets that were still
+		in use are never unloaded.
+		"""
+		if self._file_watcher is not None:
+			return
+
+		watcher = asset_watcher.create_file_watcher(self._changed_files.put, polling_interval)
+		with self._cache_lock:
+			self._file_watcher = watcher
+			paths = list(self._source_path_index)
+
+		for path in paths:
+			if os.path.isfile(path):
+				watcher.watch(path)
+
+		watcher.start()
+		# May still be scheduled to finish reloads of a previous run.
+		self._clock.unschedule(self._process_file_changes)
+		self._clock.schedule_interval(self._process_file_changes, 0.25)
+
+	def stop_hot_reload(self) -> None:
+		"""
+		Stops watching for file changes. Running reloads are finished.
+		"""
+		with self._cache_lock:
+			watcher = self._file_watcher
+			self._file_watcher = None
+
+		if watcher is None:
+			return
+
+		watcher.stop()
+		if not self._hot_reloads:
+			self._clock.unschedule(self._process_file_changes)
+
+	def _process_file_changes(self, _dt: float) -> None:
+		still_running = []
+		for lproc, replaced in self._hot_reloads:
+			if lproc.is_done():
+				self._finish_hot_reload(replaced)
+			else:
+				still_running.append((lproc, replaced))
+		self._hot_reloads = still_running
+
+		if self._file_watcher is None:
+			if not self._hot_reloads:
+				self._clock.unschedule(self._process_file_changes)
+			return
+
+		# Assets being loaded right now may end up depending on ones that are about to be
+		# reloaded, retry once nothing is loading.
+		if self._running_loading_procedures:
+			return
+
+		paths = set()
+		while True:
+			try:
+				paths.add(self._changed_files.get_nowait())
+			except queue.Empty:
+				break
+
+		if paths:
+			self._reload_assets_from(paths)
+
+	def _reload_assets_from(self, paths: t.Iterable[str]) -> None:
+		"""
+		Removes all cached assets loaded from the given files and all
+		assets requiring them from the cache and starts loading them
+		again.
+		"""
+		replaced: t.Dict[AssetIdentifier, t.Any] = {}
+		with self._cache_lock:
+			affected: t.Dict[AssetIdentifier, _CacheEntry] = {}
+			stack = [ident for path in paths for ident in self._source_path_index.get(path, ())]
+			while stack:
+				ident = stack.pop()
+				if ident in affected:
+					continue
+				if (ce := self.asset_type_registry[ident[0]].cache.get(ident[1])) is None:
+					continue
+				affected[ident] = ce
+				stack.extend(ce.required_by)
+
+			if not affected:
+				return
+
+			# Remove assets before the ones they require. `required_by` shrinks as their
+			# dependants are removed.
+			remaining = affected.copy()
+			while remaining:
+				removable = [ident for ident, ce in remaining.items() if not ce.required_by]
+				if not removable:
+					logger.error("Dependency cycle in asset cache, aborting reload.")
+					return
+
+				for ident in removable:
+					ce = remaining.pop(ident)
+					# Reference from the cache entry and the one made by passing it in.
+					in_use = sys.getrefcount(ce.item) > 2
+					self._remove_from_cache(*ident, unload=not in_use)
+					if in_use:
+						replaced[ident] = ce.item
+
+		asset_requests: t.DefaultDict[str, t.List[AssetRequest]] = defaultdict(list)
+		for ident in affected:
+			if (node := self.asset_graph.get_node(ident)) is None:
+				logger.warning(f"Don't know how {ident} was loaded, can't reload it.")
+				continue
+			asset_requests[ident[0]].append(AssetRequest(node.args, node.kwargs, may_fail=True))
+
+		logger.info(f"Files changed, reloading {len(affected)} asset(s).")
+		lproc = self.start_threaded_load(LoadingRequest(dict(asset_requests)))
+		self._hot_reloads.append((lproc, replaced))
+
+	def _finish_hot_reload(self, replaced: t.Dict[AssetIdentifier, t.Any]) -> None:
+		"""
+		Has the providers of reloaded assets that were in use update
+		their old versions from the new ones.
+		"""
+		swapped = 0
+		for ident, old in replaced.items():
+			is_cached, new = self._lookup_cache_key(*ident, bump=False)
+			if not is_cached:
+				continue
+
+			try:
+				if self.asset_type_registry[ident[0]].provider.reload_in_place(old, new):
+					swapped += 1
+			except Exception as e:
+				logger.error(f"Failed updating {ident} in place: {e}")
+
+		logger.info(
+			f"Reload done, updated {swapped} of {len(replaced)} asset(s) in use in place."
+		)
+
+	def start_warm_up(
+		self, memory_budget: int, max_assets: int = 64
+	) -> t.Optional[LoadingProcedure]:
+		"""
+		Starts a speculative loading procedure for the assets that were
+		used the most in previous sessions, so that the first scenes
+		that need them don't have to load them.
+		At most ``max_assets`` of those are loaded, with them and their
+		dependencies taking up at most ``memory_budget`` bytes as
+		estimated when they were last cached.
+		Returns ``None`` if there is nothing to warm up.
+		"""
+		warm_up = self.asset_graph.get_warm_up(max_assets, memory_budget)
+		asset_requests: t.DefaultDict[str, t.List[AssetRequest]] = defaultdict(list)
+		for identifier, args, kwargs, _ in warm_up:
+			if identifier[0] in self.asset_type_registry:
+				asset_requests[identifier[0]].append(AssetRequest(args, kwargs, may_fail=True))
+
+		if not asset_requests:
+			return None
+
+		logger.info(f"Warming up asset cache with {len(warm_up)} assets")
+		return self.start_speculative_load(
+			LoadingRequest(dict(asset_requests), priority=AssetRequestPriority.LOW)
+		)
+
+	def _record_usage_snapshot(self) -> None:
+		"""
+		Records how often each asset used this session was requested
+		from the cache into the asset graph, see ``start_warm_up``.
+		"""
+		with self._cache_lock:
+			usage = self._removed_usage.copy()
+			for asset_type_name, asset_type in self.asset_type_registry.items():
+				for key, ce in asset_type.cache.items():
+					ident = (asset_type_name, key)
+					prev_hits, _ = usage.get(ident, (0, 0))
+					usage[ident] = (
+						prev_hits + ce.cache_hits, ce.estimated_size_system + ce.estimated_size_gpu
+					)
+
+		self.asset_graph.record_usage(usage)
+
+	def _trace_access(self, asset_type_name: str, key: t.Hashable, ce: _CacheEntry) -> None:
+		# Must hold the cache lock. The record is written by ``_flush_access_trace``.
+		if self._access_trace is None:
+			return
+
+		self._access_trace_records.append({
+			"event": "access",
+			"type": asset_type_name,
+			"key": repr(key),
+			"size_sys": ce.estimated_size_system + ce.estimated_provider_usage_system,
+			"size_gpu": ce.estimated_size_gpu + ce.estimated_provider_usage_gpu,
+		})
+
+	def _take_access_trace_records(self) -> t.List[t.Dict[str, t.Any]]:
+		# Must hold the cache lock.
+		records = list(self._access_trace_records)
+		self._access_trace_records.clear()
+		return records
+
+	@staticmethod
+	def _write_access_trace_records(
+		trace: t.TextIO, records: t.Iterable[t.Dict[str, t.Any]]
+	) -> None:
+		trace.write("".join(json.dumps(record) + "\n" for record in records))
+
+	def _flush_access_trace(self) -> None:
+		"""
+		Writes all queued access trace records to the access trace.
+		Must not be called with the cache lock held.
+		"""
+		with self._access_trace_lock:
+			records = []
+			while self._access_trace_records:
+				records.append(self._access_trace_records.popleft())
+
+			if self._access_trace is not None and records:
+				self._write_access_trace_records(self._access_trace, records)
+
+	def plan_loading_request(self, request: LoadingRequest, plan_key: t.Hashable) -> LoadingRequest:
+		"""
+		Returns a copy of ``request`` that additionally requests all
+		assets that the last completed loading procedure started with
+		``plan_key`` requested, as well as all of their recorded
+		dependencies (transitively).
+
+		This way, assets that would only be requested after others
+		have loaded, such as the songs requested once a level's data
+		is loaded or the image behind some frames, can all be loaded
+		at once. As the plan may be out of date, its assets are
+		allowed to fail loading.
+		"""
+		planned_assets = self.asset_graph.get_plan(plan_key)
+		if not planned_assets:
+			return request
+
+		requested = set()
+		for asset_request in request._asset_requests:
+			try:
+				requested.add(self._get_asset_request_identifier(asset_request))
+			except (KeyError, TypeError):
+				pass
+
+		asset_requests: t.DefaultDict[str, t.List[AssetRequest]] = defaultdict(list)
+		for identifier, args, kwargs, priority in planned_assets:
+			if identifier in requested or identifier[0] not in self.asset_type_registry:
+				continue
+			asset_requests[identifier[0]].append(
+				AssetRequest(args, kwargs, may_fail=True, priority=AssetRequestPriority(priority))
+			)
 
-	def start_threaded_load(self, request: LoadingRequest) -> LoadingProcedure:
+		planned = LoadingRequest(dict(asset_requests))
+		for asset_request in planned._asset_requests:
+			asset_request.planned = True
+
+		res = request.copy()
+		res.add_subrequest(planned)
+		return res
+
+	def start_threaded_load(
+		self, request: LoadingRequest, plan_key: t.Optional[t.Hashable] = None
+	) -> LoadingProcedure:
 		"""
 		Start loading a multitude of items.
 
 		By the end of it, all specified items will be in the cache and should
 		be available quickly via their respective ``load`` methods.
 
+		If ``plan_key`` is given, the request is expanded by
+		``plan_loading_request`` and the assets the procedure ends up
+		requesting are recorded under that key for next time.
+
 		vvv NOT IMPLEMENTED vvv
 		As part of such a loading process, the AssetSystemManager will
 		attempt to clear the cache of unused items below a certain threshold
 		[TODO what threshold lol]
 		[AND IMPLEMENT HOUSKEEPING AND ACTUAL ASSET RELEASE BUT LATER]
 		"""
+		return self._start_loading_procedure(
+			request, self._loader_thread_count, False, plan_key
+		)
+
+	def start_speculative_load(
+		self, request: LoadingRequest, plan_key: t.Optional[t.Hashable] = None
+	) -> LoadingProcedure:
+		"""
+		Starts loading the given request in the background on the
+		assumption that it will be needed soon, such as for the level
+		currently highlighted in a menu.
+
+		The procedure only uses ``speculative_loader_thread_count``
+		threads. They run at the same OS priority as all others, since
+		regular loads may end up waiting on assets they are loading.
+		Cancel it via its ``cancel`` method as soon as its assets become
+		unlikely to be needed; assets that were loaded until then
+		remain in the cache.
+		See ``start_threaded_load`` for ``plan_key``.
+		"""
+		return self._start_loading_procedure(
+			request, self.speculative_loader_thread_count, True, plan_key
+		)
+
+	def _start_loading_procedure(
+		self,
+		request: LoadingRequest,
+		cpu_slot_count: int,
+		speculative: bool,
+		plan_key: t.Optional[t.Hashable] = None,
+	) -> LoadingProcedure:
+		if plan_key is not None:
+			request = self.plan_loading_request(request, plan_key)
+
+		cpu_slots = threading.BoundedSemaphore(cpu_slot_count)
 		def _tinit():
 			self._threadloc.loading_stack = []
 			self._threadloc.threaded_load = True
-			self._threadloc.relay_queue = queue.Queue()
-		executor = ThreadPoolExecutor(self._loader_thread_count, "AssetLoader", _tinit)
+			self._threadloc.cpu_slots = cpu_slots
+			self._threadloc.accounting_stack = []
+		executor = ThreadPoolExecutor(
+			cpu_slot_count * 2, "SpeculativeAssetLoader" if speculative else "AssetLoader", _tinit
+		)
 
 		with self.loading_procedure_management_lock:
-			lproc = LoadingProcedure(executor, self, request)
+			lproc = LoadingProcedure(
+				executor, self, request, speculative, cpu_slot_count * 2, plan_key
+			)
 			self._running_loading_procedures.append(lproc)
 
 		self._drain_loading_procedure(lproc)
@@ -2335,32 +4253,153 @@ class AssetSystemManager:
 				break
 
 			for asset_request in new_requests:
-				is_cached, asset = self._asset_request_check_cache(asset_request)
+				identifier = self._get_asset_request_identifier(asset_request)
+				lproc._note_requested_asset(identifier, asset_request)
+				is_cached, asset = self._lookup_cache_key(*identifier)
 				if is_cached:
 					lproc._asset_available(asset_request, asset)
-				else:
+				elif not self._adopt_in_flight_load(lproc, identifier, asset_request):
 					self._start_threaded_asset_request_load(lproc, asset_request)
 
-		if lproc.is_done():
-			with self.loading_procedure_management_lock:
-				self._running_loading_procedures.remove(lproc)
+		self._forget_loading_procedure_if_done(lproc)
+
+	def _forget_loading_procedure_if_done(self, lproc: LoadingProcedure) -> None:
+		with self.loading_procedure_management_lock:
+			if not lproc.is_done() or lproc not in self._running_loading_procedures:
+				return
+			self._running_loading_procedures.remove(lproc)
+
+		if lproc.plan_key is not None and not lproc._cancelled:
+			requested = {}
+			for identifier, (args, kwargs, priority) in lproc._plan_requested.items():
+				self.asset_graph.record_asset(identifier, args, kwargs)
+				requested[identifier] = priority
+			self.asset_graph.record_plan(lproc.plan_key, requested)
+
+	def _run_loader_job(self, f: t.Callable[..., T], *args, **kwargs) -> T:
+		"""
+		Runs ``f`` on a loader thread, having it take one of the
+		procedure's cpu slots.
+		"""
+		with self._threadloc.cpu_slots:
+			return f(*args, **kwargs)
+
+	def _run_on_main_thread(self, f: t.Callable[..., T], *args, **kwargs) -> T:
+		"""
+		Puts ``f`` into the main thread work queue and blocks until it
+		has been run, returning its result.
+		The calling loader thread's cpu slot is given up while waiting,
+		so that another loader thread may use it.
+		"""
+		future = Future()
+		self._main_thread_work.put((f, args, kwargs, future))
+		return self._wait_without_cpu_slot(future)
+
+	def _wait_without_cpu_slot(self, future: "Future[T]") -> T:
+		"""
+		Waits for and returns the result of ``future``. If called on a
+		loader thread, gives up its cpu slot for the wait.
+		"""
+		if (cpu_slots := self._threadloc.cpu_slots) is None:
+			return future.result()
+
+		cpu_slots.release()
+		try:
+			return future.result()
+		finally:
+			cpu_slots.acquire()
+
+	def run_cpu_bound(self, f: t.Callable[..., T], *args, **kwargs) -> T:
+		"""
+		Runs a CPU-heavy loading step and returns its result.
+		If the asset system was created with worker processes, ``f``
+		is run in one of them, otherwise it's simply called.
+		``f``, its arguments and return value must be picklable, so
+		``f`` should be a module-level function in a module that is
+		cheap to import, such as ``asset_workers``.
+		"""
+		if self._process_pool is None:
+			return f(*args, **kwargs)
+
+		return self._wait_without_cpu_slot(self._process_pool.submit(f, *args, **kwargs))
+
+	def process_main_thread_work(self, budget: t.Optional[float] = -1.0) -> int:
+		"""
+		Runs loading steps that loader threads have queued up for the
+		main thread, such as texture uploads.
+		This should be called once per frame on the main thread.
+		Stops once ``budget`` seconds have passed, which defaults to
+		``main_thread_work_budget``. If it's ``None``, the entire queue
+		is worked off.
+		Returns the amount of processed items.
+		"""
+		if budget is not None and budget < 0.0:
+			budget = self.main_thread_work_budget
+
+		stime = perf_counter()
+		processed = 0
+		while True:
+			try:
+				f, args, kwargs, future = self._main_thread_work.get_nowait()
+			except queue.Empty:
+				break
+
+			if future.set_running_or_notify_cancel():
+				try:
+					future.set_result(f(*args, **kwargs))
+				except BaseException as e:
+					future.set_exception(e)
+			processed += 1
+
+			if budget is not None and perf_counter() - stime >= budget:
+				break
+
+		return processed
 
 	def _start_threaded_asset_request_load(
 		self,
 		lproc: LoadingProcedure,
 		asset_request: _ProcessedAssetRequest,
 	) -> None:
-		future = lproc._submit_asset_loading_job(
+		lproc._submit_asset_loading_job(
 			asset_request,
-			self.asset_type_registry[asset_request.asset_type_name].loader,
-			*asset_request.args,
-			**asset_request.kwargs,
+			functools.partial(
+				self._run_loader_job,
+				self.asset_type_registry[asset_request.asset_type_name].loader,
+				*asset_request.args,
+				**asset_request.kwargs,
+			),
+			lambda future, lproc=lproc, asset_request=asset_request:
+				self._on_threaded_asset_request_load_complete(future, lproc, asset_request),
+		)
+
+	def _adopt_in_flight_load(
+		self,
+		lproc: LoadingProcedure,
+		identifier: AssetIdentifier,
+		asset_request: _ProcessedAssetRequest,
+	) -> bool:
+		"""
+		If the asset of the given identifier is currently being loaded
+		by any thread, such as one of a cancelled procedure, has
+		``lproc`` receive the result of that load once it's done and
+		returns ``True``. Otherwise, returns ``False``.
+		This saves the procedure both restarting the load and blocking
+		one of its threads on waiting for it.
+		"""
+		with self._cache_lock:
+			in_flight = self._in_flight_loads.get(identifier)
+
+		if in_flight is None:
+			return False
+
+		# The future has the same interface as the ones of the procedure's own jobs.
+		return lproc._adopt_asset_loading_future(
+			asset_request,
+			in_flight.future,
+			lambda future, lproc=lproc, asset_request=asset_request:
+				self._on_threaded_asset_request_load_complete(future, lproc, asset_request),
 		)
-		if future is not None:
-			future.add_done_callback(
-				lambda future, lproc=lproc, asset_request=asset_request:
-					self._on_threaded_asset_request_load_complete(future, lproc, asset_request)
-			)
 
 	def _on_threaded_asset_request_load_complete(
 		self,
@@ -2372,10 +4411,17 @@ class AssetSystemManager:
 			# Twitter got to us, no asset available, return
 			return
 
+		if lproc._cancelled:
+			# Whatever the outcome of the load, the procedure has no more use for it.
+			# This may have been the last future it was waiting on though.
+			self._forget_loading_procedure_if_done(lproc)
+			return
+
 		if (exc := future.exception()) is not None:
 			if not asset_request.may_fail:
 				logger.error(f"Threaded asset load: {exc}")
 			lproc._asset_failed_loading(asset_request, exc)
+			self._forget_loading_procedure_if_done(lproc)
 			return
 
 		# Tell the LoadingProcedure of the asset, then get possibly new ones and schedule
@@ -2384,12 +4430,12 @@ class AssetSystemManager:
 		self._drain_loading_procedure(lproc)
 
 	def _start_threaded_library_load(self, lproc: LoadingProcedure, library_name: str) -> None:
-		future = lproc._submit_library_loading_job(library_name, self.load_library)
-		if future is not None:
-			future.add_done_callback(
-				lambda future, lproc=lproc, lib_name=library_name:
-					self._on_threaded_library_load_complete(future, lproc, lib_name)
-			)
+		lproc._submit_library_loading_job(
+			library_name,
+			functools.partial(self._run_loader_job, self.load_library, library_name),
+			lambda future, lproc=lproc, lib_name=library_name:
+				self._on_threaded_library_load_complete(future, lproc, lib_name),
+		)
 
 	def _on_threaded_library_load_complete(
 		self,
@@ -2403,6 +4449,7 @@ class AssetSystemManager:
 		if (exc := future.exception()) is not None:
 			logger.error(f"Threaded library load: {exc}")
 			lproc._library_failed_loading(lib_name, exc)
+			self._forget_loading_procedure_if_done(lproc)
 			return
 
 		lproc._library_available(lib_name, self._libraries_to_subrequest((lib_name,)))
@@ -2413,6 +4460,13 @@ class AssetSystemManager:
 		Tests whether fulfilling the given asset request would hit the
 		cache.
 		"""
+		return self._lookup_cache_key(*self._get_asset_request_identifier(request))
+
+	def _get_asset_request_identifier(self, request: _ProcessedAssetRequest) -> AssetIdentifier:
+		"""
+		Returns the identifier of the asset the given asset request
+		would load.
+		"""
 		asset_type = self.asset_type_registry[request.asset_type_name]
 
 		# This `path` stringification is the worst
@@ -2426,10 +4480,7 @@ class AssetSystemManager:
 				if len(args) >= 1:  # Otherwise invalid probably
 					args = (path_to_string(args[0]),) + args[1:]
 
-		return self._lookup_cache_key(
-			asset_type.name,
-			asset_type.provider.create_cache_key(*args, **kwargs),
-		)
+		return (asset_type.name, asset_type.provider.create_cache_key(*args, **kwargs))
 
 	def _libraries_to_subrequest(self, library_names: t.Iterable[str]) -> LoadingRequest:
 		"""
@@ -2442,6 +4493,17 @@ class AssetSystemManager:
 
 		return LoadingRequest(dict(lib_subrequests))
 
+	def get_cached_asset(
+		self, asset_type_name: str, request: AssetRequest
+	) -> t.Tuple[bool, t.Any]:
+		"""
+		Returns a two-element tuple where [0] denotes whether the asset
+		the given request would load is cached and [1] contains the
+		asset, if it is. Never loads anything, so this can be used to
+		pick up assets requested with a low priority once they are in.
+		"""
+		return self._asset_request_check_cache(_ProcessedAssetRequest(asset_type_name, request))
+
 	def requires_loading_process(self, loading_request: LoadingRequest) -> bool:
 		"""
 		Returns whether a LoadingRequest needs to make calls to load assets,
@@ -2514,7 +4576,15 @@ class AssetSystemManager:
 		If no routers had this asset, will use the
 		``AssetSystemManager``'s own default directory to make the path
 		absolute.
+		Results are memoized until the asset router stack changes.
 		"""
+		# Grab the dict now; if the stack changes while routing, the result lands in the
+		# discarded one.
+		route_cache = self._route_cache
+		key = (path, asset_type_name)
+		if (res := route_cache.get(key)) is not None:
+			return res
+
 		post_load_processors = []
 		additional_options = None
 		for as_ in reversed(self.asset_router_stack):
@@ -2526,15 +4596,20 @@ class AssetSystemManager:
 					if additional_options is None:
 						additional_options = n_options
 					else:
-						additional_options.update(n_options)
+						# Don't modify the router's options, the first ones may be them.
+						additional_options = {**additional_options, **n_options}
 
 				if plp is not None:
 					post_load_processors.append(plp)
 
 				if terminal:
-					return path, additional_options, post_load_processors
+					break
+		else:
+			path = os.path.join(self._cwd, path)
 
-		return os.path.join(self._cwd, path), additional_options, post_load_processors
+		res = (path, additional_options, post_load_processors)
+		route_cache[key] = res
+		return res
 
 	def _route_complex_asset(
 		self, name: str, options: t.Dict[str, t.Any]
@@ -2581,36 +4656,85 @@ class AssetSystemManager:
 
 		raise AssetNotFoundError(f"Could not find pyobj {ident!r} in current asset router stack!")
 
-	def discover_libraries(self) -> None:
+	def discover_libraries(self, background: bool = False) -> None:
+		"""
+		Discovers all libraries known to the asset router stack.
+		If ``background`` is given, does so on a separate thread and
+		returns immediately. Libraries requested before it finishes
+		will wait on it.
+		If the asset system has a cache directory, routers may keep a
+		manifest of their libraries there, making repeated discoveries
+		cheap.
+		"""
+		self._wait_for_library_discovery()
 		self._resolved_libraries.clear()
-		self._discover_libraries(self._library_specs.keys())
+
+		names = tuple(self._library_specs.keys())
+		if not background:
+			self._run_library_discovery(names)
+			return
+
+		self._library_discovery_thread = threading.Thread(
+			target = self._run_library_discovery,
+			args = (names,),
+			name = "LibraryDiscovery",
+			daemon = True,
+		)
+		self._library_discovery_thread.start()
+
+	def _run_library_discovery(self, names: t.Sequence[str]) -> None:
+		stime = perf_counter()
+		try:
+			libraries = self._discover_libraries(names)
+		except Exception as e:
+			# Libraries will simply be discovered once they're requested
+			logger.error(f"Library discovery failed: {e}")
+			return
+
+		self._resolved_libraries.update(libraries)
 		logger.info(
-			f"Discovered {len(self._resolved_libraries)} asset libraries. "
-			f"{sum(len(w) for v in self._resolved_libraries.values() for w in v.values())} "
-			f"items in total."
+			f"Discovered {len(libraries)} asset libraries in {perf_counter() - stime:.3f}s. "
+			f"{sum(len(w) for v in libraries.values() for w in v.values())} items in total."
 		)
 
-	def _discover_libraries(self, names: t.Iterable[str]) -> None:
+	def _wait_for_library_discovery(self) -> None:
+		if (thread := self._library_discovery_thread) is not None:
+			if thread is not threading.current_thread():
+				thread.join()
+			self._library_discovery_thread = None
+
+	def _discover_libraries(
+		self, names: t.Iterable[str]
+	) -> t.Dict[str, t.Dict[str, t.Sequence[ParameterTuple]]]:
+		manifest_directory = (
+			None if self.cache_directory is None else self.cache_directory / "libraries"
+		)
+		res = {}
 		request = {name: self._library_specs[name] for name in names}
 		for as_ in reversed(self.asset_router_stack):
-			result = as_.discover_libraries(request.copy())
+			result = as_.discover_libraries(request.copy(), manifest_directory)
 			for disc_name, disc_items in result.items():
 				request.pop(disc_name)
-				self._resolved_libraries[disc_name] = disc_items
+				res[disc_name] = disc_items
 
 			if not request:
-				return
+				return res
 
 		for undisc_name in request:
 			logger.info(f"Library {undisc_name!r} fell off")
-			self._resolved_libraries[undisc_name] = {}
+			res[undisc_name] = {}
+
+		return res
 
 	def load_library(self, name: str) -> t.Dict[str, t.Sequence[ParameterTuple]]:
 		"""
 		Returns a library's items.
 		"""
 		if name not in self._resolved_libraries:
-			self._discover_libraries((name,))
+			self._wait_for_library_discovery()
+
+		if name not in self._resolved_libraries:
+			self._resolved_libraries.update(self._discover_libraries((name,)))
 			logger.info(
 				f"Discovered library {name}. "
 				f"{sum(len(w) for w in self._resolved_libraries[name].values())} items."
@@ -2678,18 +4802,12 @@ class AssetSystemManager:
 
 			if loading_steps[0][1]:
 				# Function suited for thread, just forward to it
-				def threaded_loader_func(relay_queue: queue.Queue, *args, **kwargs):
-					# sleep(0.1)  # fancy loading screen slowdown
-					return regular_loader_func(*args, **kwargs)
+				threaded_loader_func = regular_loader_func
 			else:
-				# Function not suited for thread, schedule and wait for it
-				def augmented_loader(_, relay_queue: queue.Queue, *args, **kwargs):
-					relay_queue.put(regular_loader_func(*args, **kwargs))
-
-				def threaded_loader_func(relay_queue: queue.Queue, *args, **kwargs):
+				# Function not suited for thread, queue it for the main thread and wait for it
+				def threaded_loader_func(*args, **kwargs):
 					# sleep(0.1)  # fancy loading screen slowdown
-					self._clock.schedule_once(augmented_loader, 0.0, relay_queue, *args, **kwargs)
-					return relay_queue.get()
+					return self._run_on_main_thread(regular_loader_func, *args, **kwargs)
 		else:
 			# Regular loader func simply chains all the loadsteps
 			*inter_steps, last_step = loading_steps
@@ -2699,49 +4817,18 @@ class AssetSystemManager:
 					args, kwargs = f(*args, **kwargs)
 				return last_step[0](*args, **kwargs)
 
-			# Alternative approach
-			# def make_chained(funcs):
-			# 	if len(funcs) == 1:
-			# 		return funcs[0]
-			# 
-			# 	i = -1
-			# 	next_ = funcs[-1]
-			# 	while -i < len(funcs):
-			# 		i -= 1
-			# 
-			# 		def inner(p, n, *args, **kwargs):
-			# 			new_args, new_kwargs = p(*args, **kwargs)
-			# 			return n(*new_args, **new_kwargs)
-			# 
-			# 		next_ = functools.partial(inner, funcs[i], next_)
-			# 
-			# 	return next_
-			# 
-			# regular_loader_func = make_chained(loading_steps)
-
-			# NOTE: Creates functions every call, but what can you do
-			def threaded_loader_func(relay_queue: queue.Queue, *args, **kwargs):
+			def threaded_loader_func(*args, **kwargs):
 				# sleep(0.1)  # fancy loading screen slowdown
 				for f, thread_suited in inter_steps:
 					if thread_suited:
 						args, kwargs = f(*args, **kwargs)
 					else:
-						def relay_loader(_, relay_queue: queue.Queue, *args, **kwargs):
-							# stime = perf_counter()
-							relay_queue.put(f(*args, **kwargs))
-							# print("relay loader stalled for", perf_counter() - stime, "s")
-						self._clock.schedule_once(relay_loader, 0.0, relay_queue, *args, **kwargs)
-						args, kwargs = relay_queue.get()
+						args, kwargs = self._run_on_main_thread(f, *args, **kwargs)
 
 				if last_step[1]:
 					return last_step[0](*args, **kwargs)
 				else:
-					def relay_loader(_, relay_queue: queue.Queue, *args, **kwargs):
-						# stime = perf_counter()
-						relay_queue.put(last_step[0](*args, **kwargs))
-						# print("relay loader stalled for", perf_counter() - stime, "s")
-					self._clock.schedule_once(relay_loader, 0.0, relay_queue, *args, **kwargs)
-					return relay_queue.get()
+					return self._run_on_main_thread(last_step[0], *args, **kwargs)
 
 		# Generate the ultimate loader func responsible for asset router resolving and
 		# cache interaction
@@ -2768,16 +4855,31 @@ class AssetSystemManager:
 					# print(f"Cache hit on {asset_type_name}, {cache_key=}")
 					return r[1]
 
+				cached, in_flight = self._claim_load(asset_type_name, cache_key)
+				if cached:
+					return in_flight
+
+				if in_flight is not None and in_flight.thread_id != threading.get_ident():
+					# Someone else is already loading the asset, wait for them.
+					asset = self._wait_for_load(in_flight)
+					r = self._lookup_cache_key(asset_type_name, cache_key)
+					return r[1] if r[0] else asset
+
 				# If we're at this point, the asset will need to be loaded.
 
-				self._threadloc.loading_stack.append([(asset_type_name, cache_key), []])
+				self._threadloc.loading_stack.append([(asset_type_name, cache_key), [], []])
 			else:
+				in_flight = None
 				self._threadloc.loading_stack.append("<uncached>")
 
-			self._eviction_gate.wait()
+			# The main thread runs the eviction steps itself and must never block on them.
+			if self._threadloc.threaded_load:
+				self._eviction_gate.wait()
 
 			faked_kwargs = ba.arguments
 
+			accounting = self._begin_load_accounting() if cache else None
+			measured_size = None
 			try:
 				if is_complex:
 					rp = None
@@ -2791,18 +4893,19 @@ class AssetSystemManager:
 
 				if not is_complex:
 					faked_kwargs["path"] = rp
+					# Complex assets have no routed path of their own; their providers note the
+					# paths they really read from.
+					self._note_source_path(rp)
 
 				if is_cache_aware:
 					if self._threadloc.threaded_load:
-						load_result = threaded_loader_func(
-							self._threadloc.relay_queue, cache, cache_key, **faked_kwargs
-						)
+						load_result = threaded_loader_func(cache, cache_key, **faked_kwargs)
 					else:
 						load_result = regular_loader_func(cache, cache_key, **faked_kwargs)
 					asset = load_result.item
 				else:
 					if self._threadloc.threaded_load:
-						asset = threaded_loader_func(self._threadloc.relay_queue, **faked_kwargs)
+						asset = threaded_loader_func(**faked_kwargs)
 					else:
 						asset = regular_loader_func(**faked_kwargs)
 					load_result = LoadResult(asset, provider.get_estimated_asset_size(asset))
@@ -2812,8 +4915,14 @@ class AssetSystemManager:
 
 				load_result.item = asset
 
+				if accounting is not None:
+					measured_size = self._end_load_accounting(accounting)
+					accounting = None
+
 				if cache:
-					self._encache(asset_type_name, cache_key, load_result)
+					self._encache(
+						asset_type_name, cache_key, load_result, measured_size, (args, kwargs)
+					)
 
 				# print(
 				# 	("[T] " if self._threadloc.threaded_load else "") + ("[C] " if cache else "") +
@@ -2821,9 +4930,19 @@ class AssetSystemManager:
 				# 	f"; {cache_key}; {faked_kwargs}; {self._threadloc.loading_stack}"
 				# )
 
+			except BaseException as e:
+				if in_flight is not None:
+					self._resolve_load(asset_type_name, cache_key, in_flight, exception=e)
+				raise
+
 			finally:
+				if accounting is not None:
+					self._end_load_accounting(accounting)
 				self._threadloc.loading_stack.pop()
 
+			if in_flight is not None:
+				self._resolve_load(asset_type_name, cache_key, in_flight, asset)
+
 			return asset
 
 		# Finally introduce asset type
@@ -2947,29 +5066,41 @@ class AssetSystemManager:
 		is aware of and then stalls until they have completed.
 
 		This should be called when exiting the game, otherwise there's
-		a chance of worker threads waiting on queues that will never
-		receive a response.
+		a chance of worker threads waiting on main thread work that will
+		never be done.
 
 		Will not function properly if new ``LoadingProcedures`` are
 		started while this is running. (Just don't do that™)
 		"""
 		with self.loading_procedure_management_lock:
-			if not self._running_loading_procedures:
-				return
+			running_procedures = self._running_loading_procedures.copy()
 
-			for p in self._running_loading_procedures:
-				p.cancel()
+		for p in running_procedures:
+			p.cancel()
 
 		while self._running_loading_procedures or not self._eviction_process_state.completed:
 			self._clock.call_scheduled_functions(self._clock.update_time())
+			self.process_main_thread_work(None)
 			sleep(0.02)
 
+		if self._process_pool is not None:
+			self._process_pool.shutdown()
+			self._process_pool = None
+
+		self.stop_access_trace()
+		self.stop_hot_reload()
+
+		self._record_usage_snapshot()
+		if self._asset_graph_path is not None:
+			self.asset_graph.save(self._asset_graph_path)
+
 	def clear_caches(self) -> None:
 		"""
 		Clears all of the asset system's caches.
 		"""
 		self._pyobj_cache.clear()
 		self._resolved_libraries.clear()
+		self._route_cache = {}
 		# TODO cache-aware providers are left out of this, fix later (TM)
 
 
@@ -2987,16 +5118,28 @@ _g_load_pyobj = None
 _asm = None
 
 
-def initialize(clock: clock.Clock) -> AssetSystemManager:
+def initialize(
+	clock: clock.Clock,
+	cache_directory: t.Optional[Path] = None,
+	worker_processes: int = 0,
+	eviction_policy: t.Union[str, EvictionPolicy] = "burden",
+) -> AssetSystemManager:
 	"""
 	Initializes the asset system.
 	Sets up the default loaders for bytes, text, json, xml, sound,
 	images, frames and pyobj. Requires an OpenGL context to be active.
+	If ``cache_directory`` is given, decoded assets will be stored
+	inside of it to speed up loading on subsequent launches.
+	If ``worker_processes`` is greater than 0, image decoding and
+	parsing will be done in that many worker processes.
+	``eviction_policy`` selects which assets to evict first once the
+	cache grows too large; it may be a policy or the name of one of
+	the built-in ones in ``eviction_policies.EVICTION_POLICIES``.
 	"""
 	global _asm, _g_load_bytes, _g_load_text, _g_load_json, _g_load_xml
 	global _g_load_sound, _g_load_image, _g_load_image_data, _g_load_frames, _g_load_pyobj
 
-	_asm = AssetSystemManager(clock)
+	_asm = AssetSystemManager(clock, cache_directory, worker_processes, eviction_policy)
 	_g_load_bytes = _asm.register_asset_provider("bytes", BytesAssetProvider)
 	_g_load_text = _asm.register_asset_provider("text", TextAssetProvider)
 	_g_load_json = _asm.register_asset_provider("json", JSONAssetProvider)
@@ -3006,6 +5149,9 @@ def initialize(clock: clock.Clock) -> AssetSystemManager:
 	_g_load_image_data = _asm.register_asset_provider("image_data", ImageDataAssetProvider)
 	_g_load_frames = _asm.register_complex_asset_provider("frames", FramesAssetProvider)
 
+	# Decoded songs are huge, don't let them push everything else out.
+	_asm.set_asset_type_quota("sound", 2**28) # 256MiB
+
 	_g_load_pyobj = _asm.load_pyobj
 
 	return _asm
@@ -0,0 +1,213 @@
+"""
+File watchers the asset system uses to notice changes to the files
+behind cached assets, so they can be reloaded while the game is
+running. Meant for development.
+"""
+
+import abc
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import typing as t
+
+from loguru import logger
+
+
+class FileWatcher(abc.ABC):
+	"""
+	Watches a set of files on a background thread and calls a callback
+	with the path of each file that changes. The callback is called
+	from that thread.
+	"""
+
+	def __init__(self, callback: t.Callable[[str], t.Any]) -> None:
+		self._callback = callback
+		self._lock = threading.Lock()
+		self._stop_event = threading.Event()
+		self._thread: t.Optional[threading.Thread] = None
+
+	@abc.abstractmethod
+	def watch(self, path: str) -> None:
+		"""
+		Starts watching the file at the given absolute path.
+		Watching a file multiple times has no effect.
+		"""
+		raise NotImplementedError()
+
+	@abc.abstractmethod
+	def _run(self) -> None:
+		"""
+		Runs on the watcher thread until the stop event is set.
+		"""
+		raise NotImplementedError()
+
+	def start(self) -> None:
+		if self._thread is not None:
+			return
+		self._thread = threading.Thread(
+			target=self._run, name=self.__class__.__name__, daemon=True
+		)
+		self._thread.start()
+
+	def stop(self) -> None:
+		"""
+		Stops the watcher thread and waits for it to exit.
+		"""
+		self._stop_event.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+
+def _stat(path: str) -> t.Optional[t.Tuple[int, int]]:
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None
+	return (st.st_mtime_ns, st.st_size)
+
+
+class PollingFileWatcher(FileWatcher):
+	"""
+	Watcher that stats all watched files every ``interval`` seconds.
+	Works anywhere, but gets slow with lots of files.
+	"""
+
+	def __init__(self, callback: t.Callable[[str], t.Any], interval: float = 0.5) -> None:
+		super().__init__(callback)
+		self.interval = interval
+		self._files: t.Dict[str, t.Optional[t.Tuple[int, int]]] = {}
+
+	def watch(self, path: str) -> None:
+		with self._lock:
+			if path not in self._files:
+				self._files[path] = _stat(path)
+
+	def _run(self) -> None:
+		while not self._stop_event.wait(self.interval):
+			with self._lock:
+				files = list(self._files.items())
+
+			for path, prev_stat in files:
+				if (cur_stat := _stat(path)) == prev_stat:
+					continue
+
+				with self._lock:
+					self._files[path] = cur_stat
+				self._callback(path)
+
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_TO = 0x80
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class InotifyFileWatcher(FileWatcher):
+	"""
+	Watcher using Linux's inotify on the directories of the watched
+	files. Notices changes immediately and costs nothing while
+	nothing changes.
+	"""
+
+	def __init__(self, callback: t.Callable[[str], t.Any]) -> None:
+		super().__init__(callback)
+
+		self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+		self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+		if self._fd < 0:
+			errno = ctypes.get_errno()
+			raise OSError(errno, os.strerror(errno))
+
+		self._files: t.Set[str] = set()
+		self._watched_dirs: t.Dict[str, int] = {}
+		self._watch_descriptors: t.Dict[int, str] = {}
+
+	def watch(self, path: str) -> None:
+		directory = os.path.dirname(path)
+		with self._lock:
+			self._files.add(path)
+			if directory in self._watched_dirs:
+				return
+
+			# Editors like to save by writing a new file and moving it over the old one,
+			# so also listen for files being moved in.
+			wd = self._libc.inotify_add_watch(
+				self._fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO
+			)
+			if wd < 0:
+				errno = ctypes.get_errno()
+				logger.warning(f"Failed watching {directory!r}: {os.strerror(errno)}")
+				return
+
+			self._watched_dirs[directory] = wd
+			self._watch_descriptors[wd] = directory
+
+	def _run(self) -> None:
+		try:
+			while not self._stop_event.is_set():
+				readable, _, _ = select.select((self._fd,), (), (), 0.25)
+				if not readable:
+					continue
+
+				try:
+					data = os.read(self._fd, 65536)
+				except BlockingIOError:
+					continue
+
+				self._dispatch(data)
+		finally:
+			self._close()
+
+	def stop(self) -> None:
+		started = self._thread is not None
+		super().stop()
+		# Without a thread, nothing else will close the inotify instance.
+		if not started:
+			self._close()
+
+	def _close(self) -> None:
+		if self._fd >= 0:
+			os.close(self._fd)
+			self._fd = -1
+
+	def _dispatch(self, data: bytes) -> None:
+		changed = []
+		offset = 0
+		with self._lock:
+			while offset < len(data):
+				wd, _, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+				offset += _INOTIFY_EVENT.size
+				name = data[offset:offset + name_len].rstrip(b"\0")
+				offset += name_len
+
+				if (directory := self._watch_descriptors.get(wd)) is None or not name:
+					continue
+
+				path = os.path.join(directory, os.fsdecode(name))
+				if path in self._files and path not in changed:
+					changed.append(path)
+
+		for path in changed:
+			self._callback(path)
+
+
+def create_file_watcher(
+	callback: t.Callable[[str], t.Any], polling_interval: float = 0.5
+) -> FileWatcher:
+	"""
+	Creates an inotify-based watcher if possible, otherwise a polling
+	one checking files every ``polling_interval`` seconds.
+	"""
+	if sys.platform.startswith("linux"):
+		try:
+			return InotifyFileWatcher(callback)
+		except (OSError, AttributeError) as e:
+			logger.info(f"inotify not available, polling for file changes instead: {e}")
+
+	return PollingFileWatcher(callback, polling_interval)
@@ -0,0 +1,81 @@
+"""
+CPU-bound asset loading functions that the asset system may run in a
+pool of worker processes to keep them from contending for the GIL with
+the main and media threads.
+
+This module is imported by the worker processes, so it must stay free
+of any imports that require an OpenGL context or are otherwise heavy.
+All functions here also work when called directly.
+"""
+
+import json
+import typing as t
+from xml.etree.ElementTree import ElementTree
+
+from pyday_night_funkin.core import asset_archive
+
+
+_in_worker_process = False
+
+
+def initialize_worker() -> None:
+	"""
+	Initializer for worker processes.
+	"""
+	global _in_worker_process
+
+	_in_worker_process = True
+
+	# Workers must never create a window or GL context
+	import pyglet
+	pyglet.options["shadow_window"] = False
+
+
+def decode_image(path: str) -> t.Tuple[int, int, str, int, t.Any]:
+	"""
+	Decodes the image at ``path`` and converts its pixel data into a
+	format that can be uploaded to OpenGL as-is.
+	Returns width, height, format, pitch and the pixel data.
+	"""
+	from pyglet import image
+
+	with asset_archive.open_asset(path) as f:
+		image_data = image.load(path, file=f)
+
+	# HACK: Private access / implementation-copypaste, but saves conversion work that
+	# would otherwise stall the main thread for like 300ms at worst.
+	target_format_str = image_data.format
+	target_pitch = abs(image_data._current_pitch)
+	# Second parameter always ends up as GL_UNSIGNED_BYTE, probably safe to not worry about it
+	gl_fmt, _ = image_data._get_gl_format_and_type(target_format_str)
+	if gl_fmt is None:
+		target_format_str = {1: 'R', 2: 'RG', 3: 'RGB', 4: 'RGBA'}[len(target_format_str)]
+		gl_fmt, _ = image_data._get_gl_format_and_type(target_format_str)
+
+	new_data = image_data._convert(target_format_str, target_pitch)
+	# HACK: Remove everything between these two "HACK" comments if it causes problems
+
+	if _in_worker_process and not isinstance(new_data, bytes):
+		# ctypes arrays can't be pickled back to the parent process
+		new_data = bytes(new_data)
+
+	return (image_data.width, image_data.height, target_format_str, target_pitch, new_data)
+
+
+def parse_json(path: str, encoding: str = "utf-8") -> t.Any:
+	with asset_archive.open_text_asset(path, encoding) as f:
+		return json.load(f)
+
+
+def parse_xml(path: str) -> ElementTree:
+	from pyday_night_funkin.core.almost_xml_parser import AlmostXMLParser
+
+	et = ElementTree()
+	# NOTE: The xml files contain the encoding inside them, which is mega stupid
+	# since you need the encoding to properly parse them, so like ????
+	# Unless there is some spec that declares that the first line MUST be valid ASCII
+	# and then you have to change the encoding or whatever but i'm not gonna care about
+	# all that and just have this work for utf8.
+	with asset_archive.open_text_asset(path, "utf-8") as f:
+		et.parse(f, AlmostXMLParser())
+	return et
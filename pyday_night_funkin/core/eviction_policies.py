@@ -0,0 +1,542 @@
+"""
+Policies deciding which cached assets the asset system evicts first
+when it runs over its memory limits.
+
+The asset system notifies its policy of every asset entering, being
+retrieved from and leaving the cache, and asks it to score eviction
+candidates. It still takes care of which assets can be evicted at all,
+keeping the policies independent of it.
+
+Can be run as a script to replay an asset access trace recorded with
+``AssetSystemManager.start_access_trace`` through each policy:
+``python -m pyday_night_funkin.core.eviction_policies trace.jsonl``
+"""
+
+import abc
+import argparse
+from collections import OrderedDict
+import json
+from math import exp, tau, sqrt
+import sys
+import typing as t
+
+
+AssetIdentifier = t.Tuple[str, t.Hashable]
+
+
+_SQRT_TAU = sqrt(tau)
+def ndist_1(x: float, sigma: float) -> float:
+	"""
+	Normal distribution with standard deviation hardcoded to 1
+	(aka curve peaks at 1.0)
+	"""
+	return exp(-0.5 * ((x - 1.0)/sigma)**2.0) / (sigma * _SQRT_TAU)
+
+
+class EvictionCandidate(t.NamedTuple):
+	"""
+	Information about a top-level asset that could be evicted.
+	Sizes include all of the asset's dependencies.
+	"""
+	identifier: AssetIdentifier
+	size: int
+	"""Size in the memory types that are being evicted from."""
+	size_sys: int
+	size_gpu: int
+	last_requested: int
+	"""Age the asset was last requested at."""
+	cache_hits: int
+	dependencies: int
+	"""Amount of the asset's immediate dependencies."""
+
+
+class EvictionPolicy(abc.ABC):
+	"""
+	Base class for eviction policies.
+	Calls into policies are serialized by the asset system.
+	"""
+
+	name: t.ClassVar[str] = ""
+
+	def on_insert(self, identifier: AssetIdentifier, size: int) -> None:
+		"""
+		Called when an asset of the given size is put into the cache.
+		"""
+
+	def on_hit(self, identifier: AssetIdentifier) -> None:
+		"""
+		Called when an asset is retrieved from the cache.
+		"""
+
+	def on_remove(self, identifier: AssetIdentifier) -> None:
+		"""
+		Called when an asset leaves the cache.
+		"""
+
+	@abc.abstractmethod
+	def get_score(self, candidate: EvictionCandidate, age: int) -> t.Optional[float]:
+		"""
+		Scores an eviction candidate. Candidates with higher scores
+		will be evicted first. If ``None`` is returned, the candidate
+		will not be evicted at all.
+		``age`` is the asset system's current age.
+		"""
+		raise NotImplementedError()
+
+
+class BurdenEvictionPolicy(EvictionPolicy):
+	"""
+	Evicts assets by their size, weighed more heavily the more
+	generations they have gone unused for.
+	"""
+
+	name = "burden"
+
+	def __init__(self, stale_age: int = 5, safe_burden: float = 4096.0) -> None:
+		self.stale_age = stale_age
+		"""
+		An asset will be considered stale and be evicted with high
+		likelihood if it has not been requested for this many
+		generations.
+		"""
+
+		self.safe_burden = safe_burden
+		"""
+		Assets with a burden score of less than this value will never
+		be evicted.
+		Theoretically, this allows to clog the asset cache up with
+		thousands of extremely small assets as long as they are somewhat
+		frequently used, but that is a super-duper unrealistic scenario.
+		"""
+
+	def _weigh_burden(self, unused_for: int) -> float:
+		# TODO: May want to use cache_hits as well to prefer assets not requested as much.
+		# Considering that can be falsified easily by just having poor code that calls load_x
+		# often and relies on the cache though, make its impact minimal
+
+		size_factor = 1.0
+		if unused_for <= 1:
+			size_factor = 1.0
+		elif unused_for > self.stale_age:
+			size_factor = 999999999999.0
+		else:
+			# Make Euler spin in his grave and completely misuse the fancy normal distribution
+			# curve between 1..unused_cutoff
+			# sigma found by guessing, it's 1.7
+			q = ndist_1(1.0, 1.7)
+			v = ndist_1(float(unused_for), 1.7)
+			# TODO: These numbers explode pretty quickly, so quickly that they might overshadow
+			# the burden factor given by the stale generation limit.
+			# Might look into expanding the comparison key into a tuple that has 0 as first
+			# element for non-stale assets, but their respective age for others.
+			if v == 0.0:
+				# who knows what those floats are up to
+				v = 0.000000000001
+			# size_factor = 1.0 / ((1.0/q) * v)
+			size_factor = min(q / v, 999999999999.0)
+
+		# Calculate how much of a burden an asset is
+		# Larger assets should be more targeted for eviction simply cause they fill a lot of
+		# memory, but even more so ones that have not been used for some time
+		# `size_factor` should explode to pretty high values after an asset was unused for 4
+		# generations or so
+
+		return size_factor
+
+	def get_score(self, candidate: EvictionCandidate, age: int) -> t.Optional[float]:
+		burden_score = candidate.size * self._weigh_burden(age - candidate.last_requested)
+		return None if burden_score <= self.safe_burden else burden_score
+
+
+class _TickingEvictionPolicy(EvictionPolicy):
+	"""
+	Policy that tracks the order of cache accesses with a counter, as
+	asset system ages are too coarse for that.
+	"""
+
+	def __init__(self) -> None:
+		self._tick = 0
+		self._last_access: t.Dict[AssetIdentifier, int] = {}
+
+	def _touch(self, identifier: AssetIdentifier) -> None:
+		self._tick += 1
+		self._last_access[identifier] = self._tick
+
+	def on_insert(self, identifier: AssetIdentifier, size: int) -> None:
+		self._touch(identifier)
+
+	def on_hit(self, identifier: AssetIdentifier) -> None:
+		self._touch(identifier)
+
+	def on_remove(self, identifier: AssetIdentifier) -> None:
+		self._last_access.pop(identifier, None)
+
+
+class LRUEvictionPolicy(_TickingEvictionPolicy):
+	"""
+	Evicts the least recently used assets first.
+	"""
+
+	name = "lru"
+
+	def get_score(self, candidate: EvictionCandidate, age: int) -> t.Optional[float]:
+		return float(-self._last_access.get(candidate.identifier, 0))
+
+
+class LFUEvictionPolicy(_TickingEvictionPolicy):
+	"""
+	Evicts the least frequently used assets first, the least recently
+	used ones of those on ties.
+	Frequencies are forgotten once an asset leaves the cache.
+	"""
+
+	name = "lfu"
+
+	def __init__(self) -> None:
+		super().__init__()
+		self._frequencies: t.Dict[AssetIdentifier, int] = {}
+
+	def on_insert(self, identifier: AssetIdentifier, size: int) -> None:
+		super().on_insert(identifier, size)
+		self._frequencies[identifier] = self._frequencies.get(identifier, 0) + 1
+
+	def on_hit(self, identifier: AssetIdentifier) -> None:
+		super().on_hit(identifier)
+		self._frequencies[identifier] = self._frequencies.get(identifier, 0) + 1
+
+	def on_remove(self, identifier: AssetIdentifier) -> None:
+		super().on_remove(identifier)
+		self._frequencies.pop(identifier, None)
+
+	def get_score(self, candidate: EvictionCandidate, age: int) -> t.Optional[float]:
+		ident = candidate.identifier
+		# The recency fraction is below 1 and so only ever breaks ties.
+		return -(
+			self._frequencies.get(ident, 0) +
+			self._last_access.get(ident, 0) / (self._tick + 1)
+		)
+
+
+class GDSFEvictionPolicy(EvictionPolicy):
+	"""
+	Greedy-Dual-Size-Frequency. Assets are given a priority of their
+	access frequency divided by their size, plus an inflation value
+	that is raised to the priority of each evicted asset so that
+	assets which were popular long ago eventually age out.
+	Evicts assets with the lowest priority first, which favors
+	keeping many small assets around.
+	"""
+
+	name = "gdsf"
+
+	def __init__(self) -> None:
+		self._inflation = 0.0
+		self._frequencies: t.Dict[AssetIdentifier, int] = {}
+		self._sizes: t.Dict[AssetIdentifier, int] = {}
+		self._priorities: t.Dict[AssetIdentifier, float] = {}
+
+	def _update_priority(self, identifier: AssetIdentifier) -> None:
+		self._priorities[identifier] = (
+			self._inflation +
+			self._frequencies[identifier] / max(self._sizes.get(identifier, 1), 1)
+		)
+
+	def on_insert(self, identifier: AssetIdentifier, size: int) -> None:
+		self._frequencies[identifier] = self._frequencies.get(identifier, 0) + 1
+		self._sizes[identifier] = size
+		self._update_priority(identifier)
+
+	def on_hit(self, identifier: AssetIdentifier) -> None:
+		if identifier not in self._frequencies:
+			return
+		self._frequencies[identifier] += 1
+		self._update_priority(identifier)
+
+	def on_remove(self, identifier: AssetIdentifier) -> None:
+		priority = self._priorities.pop(identifier, None)
+		if priority is not None and priority > self._inflation:
+			self._inflation = priority
+		self._frequencies.pop(identifier, None)
+		self._sizes.pop(identifier, None)
+
+	def get_score(self, candidate: EvictionCandidate, age: int) -> t.Optional[float]:
+		return -self._priorities.get(candidate.identifier, self._inflation)
+
+
+class ARCEvictionPolicy(EvictionPolicy):
+	"""
+	Adaptive Replacement Cache. Splits assets into ones seen once
+	recently and ones seen at least twice, remembers which assets were
+	evicted from either list and shifts the target size of the lists
+	towards the one whose evictions turned out to be mistakes.
+	Its capacity is the amount of assets currently in the cache.
+	"""
+
+	name = "arc"
+
+	def __init__(self) -> None:
+		self._t1: t.OrderedDict[AssetIdentifier, None] = OrderedDict()
+		"""Assets seen once recently, least recently used first."""
+		self._t2: t.OrderedDict[AssetIdentifier, None] = OrderedDict()
+		"""Assets seen at least twice recently, least recently used first."""
+		self._b1: t.OrderedDict[AssetIdentifier, None] = OrderedDict()
+		"""Ghost entries of assets evicted from ``_t1``."""
+		self._b2: t.OrderedDict[AssetIdentifier, None] = OrderedDict()
+		"""Ghost entries of assets evicted from ``_t2``."""
+		self._p = 0.0
+		"""Target size of ``_t1``."""
+
+		self._ranks: t.Optional[t.Dict[AssetIdentifier, float]] = None
+
+	def _get_capacity(self) -> int:
+		return max(len(self._t1) + len(self._t2), 1)
+
+	def _trim_ghosts(self) -> None:
+		c = self._get_capacity()
+		for ghosts in (self._b1, self._b2):
+			while len(ghosts) > c:
+				ghosts.popitem(last=False)
+
+	def on_insert(self, identifier: AssetIdentifier, size: int) -> None:
+		self._ranks = None
+		c = self._get_capacity()
+		if identifier in self._t1 or identifier in self._t2:
+			self.on_hit(identifier)
+			return
+
+		if identifier in self._b1:
+			self._p = min(float(c), self._p + max(len(self._b2) / len(self._b1), 1.0))
+			del self._b1[identifier]
+			self._t2[identifier] = None
+		elif identifier in self._b2:
+			self._p = max(0.0, self._p - max(len(self._b1) / len(self._b2), 1.0))
+			del self._b2[identifier]
+			self._t2[identifier] = None
+		else:
+			self._t1[identifier] = None
+
+	def on_hit(self, identifier: AssetIdentifier) -> None:
+		self._ranks = None
+		if identifier in self._t1:
+			del self._t1[identifier]
+			self._t2[identifier] = None
+		elif identifier in self._t2:
+			self._t2.move_to_end(identifier)
+
+	def on_remove(self, identifier: AssetIdentifier) -> None:
+		self._ranks = None
+		if identifier in self._t1:
+			del self._t1[identifier]
+			self._b1[identifier] = None
+		elif identifier in self._t2:
+			del self._t2[identifier]
+			self._b2[identifier] = None
+		self._trim_ghosts()
+
+	def _build_ranks(self) -> t.Dict[AssetIdentifier, float]:
+		# Whichever list exceeds its target size is evicted from first, each from its least
+		# recently used end.
+		if len(self._t1) > self._p:
+			first, second = self._t1, self._t2
+		else:
+			first, second = self._t2, self._t1
+
+		ranks = {}
+		for base, lst in ((2.0, first), (1.0, second)):
+			n = len(lst)
+			for i, ident in enumerate(lst):
+				ranks[ident] = base + (n - i) / (n + 1)
+		return ranks
+
+	def get_score(self, candidate: EvictionCandidate, age: int) -> t.Optional[float]:
+		if self._ranks is None:
+			self._ranks = self._build_ranks()
+		return self._ranks.get(candidate.identifier, 0.0)
+
+
+EVICTION_POLICIES: t.Dict[str, t.Type[EvictionPolicy]] = {
+	p.name: p for p in (
+		BurdenEvictionPolicy,
+		LRUEvictionPolicy,
+		LFUEvictionPolicy,
+		GDSFEvictionPolicy,
+		ARCEvictionPolicy,
+	)
+}
+"""Maps names to the built-in eviction policies."""
+
+
+def create_eviction_policy(policy: t.Union[str, EvictionPolicy]) -> EvictionPolicy:
+	"""
+	Returns ``policy`` if it already is a policy, otherwise creates
+	the built-in policy of that name.
+	"""
+	if isinstance(policy, EvictionPolicy):
+		return policy
+
+	if policy not in EVICTION_POLICIES:
+		raise ValueError(
+			f"Unknown eviction policy {policy!r}, "
+			f"expected one of {', '.join(EVICTION_POLICIES)}"
+		)
+
+	return EVICTION_POLICIES[policy]()
+
+
+class ReplayResult:
+	__slots__ = ("policy", "hits", "misses", "evictions", "bytes_loaded", "bytes_reloaded")
+
+	def __init__(self, policy: str) -> None:
+		self.policy = policy
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.bytes_loaded = 0
+		self.bytes_reloaded = 0
+		"""Bytes loaded for assets that had already been loaded once."""
+
+	@property
+	def hit_rate(self) -> float:
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
+
+
+def replay_trace(
+	events: t.Iterable[t.Dict[str, t.Any]],
+	policy: EvictionPolicy,
+	capacity: int,
+	memory: str = "all",
+) -> ReplayResult:
+	"""
+	Feeds an access trace through a simulated cache of ``capacity``
+	bytes that evicts as told by ``policy``.
+	``memory`` selects which sizes of the traced assets count towards
+	the capacity: ``"sys"``, ``"gpu"`` or ``"all"``.
+
+	Unlike the asset system, the simulation knows nothing of asset
+	dependencies or outside references, so any cached asset but the
+	one just loaded may be evicted.
+	"""
+	result = ReplayResult(policy.name)
+	age = 0
+	used = 0
+	sizes: t.Dict[AssetIdentifier, int] = {}
+	last_requested: t.Dict[AssetIdentifier, int] = {}
+	hits: t.Dict[AssetIdentifier, int] = {}
+	seen: t.Set[AssetIdentifier] = set()
+
+	for event in events:
+		if event["event"] == "age":
+			age = event["age"]
+			continue
+
+		ident = (event["type"], event["key"])
+		if ident in sizes:
+			result.hits += 1
+			hits[ident] += 1
+			last_requested[ident] = age
+			policy.on_hit(ident)
+			continue
+
+		size = (
+			event["size_sys"] * (memory != "gpu") +
+			event["size_gpu"] * (memory != "sys")
+		)
+		result.misses += 1
+		result.bytes_loaded += size
+		if ident in seen:
+			result.bytes_reloaded += size
+		seen.add(ident)
+
+		sizes[ident] = size
+		last_requested[ident] = age
+		hits[ident] = 0
+		used += size
+		policy.on_insert(ident, size)
+
+		while used > capacity:
+			victim = None
+			victim_score = None
+			for cand_ident, cand_size in sizes.items():
+				if cand_ident == ident:
+					continue
+				score = policy.get_score(
+					EvictionCandidate(
+						cand_ident,
+						cand_size,
+						cand_size if memory != "gpu" else 0,
+						cand_size if memory == "gpu" else 0,
+						last_requested[cand_ident],
+						hits[cand_ident],
+						0,
+					),
+					age,
+				)
+				if score is not None and (victim_score is None or score > victim_score):
+					victim = cand_ident
+					victim_score = score
+
+			if victim is None:
+				break
+
+			used -= sizes.pop(victim)
+			del last_requested[victim]
+			del hits[victim]
+			policy.on_remove(victim)
+			result.evictions += 1
+
+	return result
+
+
+def main() -> int:
+	argparser = argparse.ArgumentParser(
+		description = (
+			"Replays an asset access trace through PNF's eviction policies and reports "
+			"how well each of them would have done."
+		)
+	)
+	argparser.add_argument("trace", help="Trace file, as written by `start_access_trace`.")
+	argparser.add_argument(
+		"--capacity",
+		"-c",
+		type = float,
+		default = 1024.0,
+		help = "Simulated cache capacity in MiB. Defaults to 1024.",
+	)
+	argparser.add_argument(
+		"--memory",
+		"-m",
+		choices = ("sys", "gpu", "all"),
+		default = "all",
+		help = "Which memory type the capacity applies to. Defaults to the sum of both.",
+	)
+	argparser.add_argument(
+		"--policy",
+		"-p",
+		action = "append",
+		choices = tuple(EVICTION_POLICIES),
+		help = "Policy to replay the trace through. May be given multiple times. Defaults to all.",
+	)
+	result = argparser.parse_args()
+
+	try:
+		with open(result.trace, "r", encoding="utf-8") as f:
+			events = [json.loads(line) for line in f if line.strip()]
+	except (OSError, ValueError) as e:
+		print(f"Failed reading trace: {e}", file=sys.stderr)
+		return 1
+
+	capacity = int(result.capacity * 1024 * 1024)
+	print(f"{'Policy':<8} {'Hit rate':>9} {'Misses':>8} {'Evictions':>10} {'Reloaded':>12}")
+	for name in (result.policy or EVICTION_POLICIES):
+		r = replay_trace(events, EVICTION_POLICIES[name](), capacity, result.memory)
+		print(
+			f"{name:<8} {r.hit_rate:>9.2%} {r.misses:>8} {r.evictions:>10} "
+			f"{r.bytes_reloaded / (1024 * 1024):>8.1f} MiB"
+		)
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -55,16 +55,22 @@ class PNFBatchInterfacer:
 
 		self.size = size
 		"""
-		Amount of vertices in the interfacer.
+		Amount of vertices in the interfacer. For instanced vertex
+		domains, this is the amount of instances, which is always 1.
 		"""
 
 		self.draw_mode = draw_mode
-		self.indices = tuple(domain_position + i for i in indices)
+		self.indices = (
+			tuple(indices) if vertex_domain.instanced else
+			tuple(domain_position + i for i in indices)
+		)
 		"""
 		Indices the interfacer's vertices should be drawn with.
 		These are absolute to the vertex domain's buffers, so taking
 		the example from `domain_position`'s docstring, [1, 2, 1] would
 		be valid and [0, 1, 3] would not.
+		For instanced vertex domains, they are drawn for the instance
+		as given, to be turned into vertices from `gl_VertexID`.
 		"""
 
 		self.deleted = False
@@ -125,7 +131,9 @@ class PNFBatchInterfacer:
 			states = {x: self.get_state(x) for x in self._draw_lists}
 
 		self.batch._remove_interfacer(self)
-		self._migrate_domain(new_batch._get_vertex_domain(self.domain.attribute_bundle))
+		self._migrate_domain(
+			new_batch._get_vertex_domain(self.domain.attribute_bundle, self.domain.instanced)
+		)
 		self._draw_lists.clear()
 		self.batch = new_batch
 		self._group = new_group
@@ -148,7 +156,8 @@ class PNFBatchInterfacer:
 		self.domain.deallocate(self.domain_position, self.size)
 		self.domain = new_domain
 		self.domain_position = new_start
-		self.indices = tuple(i + index_shift for i in self.indices)
+		if not new_domain.instanced:
+			self.indices = tuple(i + index_shift for i in self.indices)
 
 	def change_group_and_or_gl_state(
 		self,
@@ -172,9 +181,11 @@ class PNFBatchInterfacer:
 			pending_dls = set(self._draw_lists)
 			for dl_id, state in new_states.items():
 				if dl_id in pending_dls:
-					# self.batch.modify_group(dl_id, self._group, state)
-					self.batch.remove_group(dl_id, self._group)
 					pending_dls.remove(dl_id)
+					if new_group == self._group:
+						self.batch.modify_group(dl_id, self._group, state)
+						continue
+					self.batch.remove_group(dl_id, self._group)
 				else:
 					self.domain.ensure_vao(state.program, self.batch._get_draw_list(dl_id))
 				self.batch.add_group(dl_id, self, new_group, state)
@@ -204,12 +215,12 @@ class PNFBatchInterfacer:
 
 		self._visible = new_visibility
 
-		# TODO this is kinda hackish, but works well enough
 		for dl_id in self._draw_lists:
-			self.batch._draw_lists[dl_id]._dirty = True
+			self.batch._draw_lists[dl_id].update_visibility(self._group)
 
 	def set_data(self, name: str, value: t.Collection) -> None:
 		"""
 		Sets vertex data of this interfacer for the given attribute.
+		The data is written once the batch is drawn next.
 		"""
-		self.domain.attributes[name].set_data_py(self.domain_position, self.size, value)
+		self.batch.set_data(self.domain.attributes[name], self.domain_position, self.size, value)
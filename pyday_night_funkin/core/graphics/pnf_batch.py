@@ -1,5 +1,7 @@
 
+import bisect
 from collections import defaultdict
+from itertools import repeat
 import typing as t
 from weakref import WeakSet
 
@@ -7,7 +9,9 @@ from pyglet.gl import gl
 
 from pyday_night_funkin.core.graphics.interfacer import PNFBatchInterfacer
 from pyday_night_funkin.core.graphics.pnf_group import PNFGroup
-from pyday_night_funkin.core.graphics.pnf_vertex_domain import PNFVertexDomain
+from pyday_night_funkin.core.graphics.pnf_vertex_domain import (
+	PNFVertexDomain, PNFVertexDomainAttribute
+)
 from pyday_night_funkin.core.graphics.shared import GL_TYPE_SIZES, RE_VERTEX_FORMAT
 from pyday_night_funkin.core.graphics.state import GLState
 from pyday_night_funkin.core.graphics.vertexbuffer import RAMBackedBufferObject
@@ -18,23 +22,242 @@ if t.TYPE_CHECKING:
 
 
 _INDEX_TYPE = gl.GL_UNSIGNED_INT
-_INDEX_TYPE_SIZE = GL_TYPE_SIZES[_INDEX_TYPE]
+
+_COMMAND_TYPE_SIZE = GL_TYPE_SIZES[gl.GL_UNSIGNED_INT]
+_COMMAND_LENGTH = 5
+"""
+Length of a `DrawElementsIndirectCommand`: count, instance count,
+first index, base vertex and base instance.
+"""
+
+
+def _unbind_vao() -> None:
+	gl.glBindVertexArray(0)
+
+
+def _bucket_capacity(length: int, granularity: int = 1) -> int:
+	"""
+	Returns the amount of buffer elements to reserve for a bucket
+	needing `length` of them, leaving room for it to grow in place.
+	The result is a multiple of `granularity`.
+	"""
+	capacity = length + max(length >> 1, 24)
+	return -(-capacity // granularity) * granularity
+
+
+class BufferArena:
+	"""
+	Hands out ranges of a RAM-backed buffer from its end and keeps
+	track of how much of it was given up again.
+	"""
+	__slots__ = ("buffer", "end", "waste")
+
+	def __init__(self, buffer: RAMBackedBufferObject) -> None:
+		self.buffer = buffer
+		self.end = 0
+		"""End of the last range handed out, in elements."""
+		self.waste = 0
+		"""Elements in ranges that were given up."""
+
+	def allocate(self, length: int) -> int:
+		"""
+		Reserves `length` elements at the end of the buffer, growing
+		it if needed. Returns their start.
+		"""
+		start = self.end
+		self.end += length
+		buffer_len = self.buffer.size // self.buffer.element_size
+		if self.end > buffer_len:
+			self.buffer.resize_elements(max(self.end, buffer_len * 2))
+		return start
+
+	def free(self, length: int) -> None:
+		self.waste += length
+
+	def needs_compaction(self) -> bool:
+		return self.waste > self.end >> 1
+
+	def reset(self, data: t.List[int]) -> None:
+		"""
+		Replaces the buffer's contents with `data`, forgetting about
+		all previously handed out ranges.
+		"""
+		self.buffer.set_size_and_data_py(data)
+		self.end = len(data)
+		self.waste = 0
+
+
+class DrawBucket:
+	"""
+	Groups of a chain that share a state, vertex domain and draw mode.
+	Their indices occupy one range of the draw list's index buffer,
+	which has room to spare so groups can be added without moving
+	any other bucket's indices.
+	Buckets of instanced vertex domains instead hold one draw command
+	per group in the draw list's command buffer.
+	"""
+	__slots__ = (
+		"state", "domain", "draw_mode", "sort_key", "instanced", "arena", "members", "slots",
+		"starts", "positions", "masked", "offset", "capacity", "count", "run",
+	)
+
+	def __init__(self, state: GLState, domain: "PNFVertexDomain", draw_mode: int) -> None:
+		self.state = state
+		self.domain = domain
+		self.draw_mode = draw_mode
+		self.sort_key = hash(state.part_set)
+		self.instanced = domain.instanced
+
+		self.arena: t.Optional[BufferArena] = None
+		"""Arena of the buffer this bucket's range lies in."""
+
+		self.members: t.Set["GroupData"] = set()
+		"""All groups in this bucket, including invisible ones."""
+
+		self.slots: t.List["GroupData"] = []
+		"""
+		Groups with data in the bucket's range, in the order their
+		data appears in.
+		"""
+
+		self.starts: t.List[int] = []
+		"""Start of each slot's data, relative to `offset`."""
+
+		self.positions: t.Dict["GroupData", int] = {}
+		"""Maps groups with a slot to it."""
+
+		self.masked: t.Set["GroupData"] = set()
+		"""
+		Hidden groups that kept their slot, with their indices collapsed
+		into degenerate triangles or their command drawing no instances.
+		"""
+
+		self.offset = 0
+		"""Start of this bucket's range in its buffer, in elements."""
+
+		self.capacity = 0
+		"""Length of this bucket's range in its buffer, in elements."""
+
+		self.count = 0
+		"""Amount of elements in use."""
+
+		self.run: t.Optional["DrawRun"] = None
+		"""The run drawing this bucket."""
+
+
+class DrawRun:
+	"""
+	Consecutive buckets that can be drawn without any state switches
+	between them. Draws their index ranges with a single
+	`glMultiDrawElementsIndirect` call, sourcing its commands from a
+	region of the draw list's command buffer. When buckets change
+	their ranges, only that region needs to be rewritten.
+	Runs of instanced buckets draw each bucket's commands directly.
+	"""
+	__slots__ = ("draw_mode", "instanced", "buckets", "command_offset", "_command_count")
+
+	def __init__(self, draw_mode: int, instanced: bool) -> None:
+		self.draw_mode = draw_mode
+		self.instanced = instanced
+		self.buckets: t.List[DrawBucket] = []
+		self.command_offset = 0
+		"""
+		Start of this run's region in the command buffer, in elements.
+		The region holds as many commands as the run has buckets.
+		Unused by instanced runs.
+		"""
+		self._command_count = 0
+
+	def update_commands(self, command_buffer: RAMBackedBufferObject) -> None:
+		"""
+		Writes the draw commands for this run's buckets into its
+		region of the command buffer.
+		"""
+		commands = []
+		end = -1
+		for bucket in self.buckets:
+			if bucket.count == 0:
+				continue
+			if bucket.offset == end:
+				commands[-_COMMAND_LENGTH] += bucket.count
+			else:
+				commands.extend((bucket.count, 1, bucket.offset, 0, 0))
+			end = bucket.offset + bucket.count
+
+		self._command_count = len(commands) // _COMMAND_LENGTH
+		if commands:
+			command_buffer.set_data_py(self.command_offset, len(commands), commands)
+
+	def draw(self) -> None:
+		if self.instanced:
+			for bucket in self.buckets:
+				if bucket.count > 0:
+					gl.glMultiDrawElementsIndirect(
+						self.draw_mode,
+						_INDEX_TYPE,
+						bucket.offset * _COMMAND_TYPE_SIZE,
+						bucket.count // _COMMAND_LENGTH,
+						0,
+					)
+		elif self._command_count > 0:
+			gl.glMultiDrawElementsIndirect(
+				self.draw_mode,
+				_INDEX_TYPE,
+				self.command_offset * _COMMAND_TYPE_SIZE,
+				self._command_count,
+				0,
+			)
 
 
-# NOTE: This is just a class with a list. May be useful for further
-# work, may also turn out completely useless.
 class GroupChain:
-	__slots__ = ("groups",)
+	"""
+	Drawable groups whose order between each other is irrelevant,
+	sorted into buckets by their state.
+	"""
+	__slots__ = ("buckets", "_buckets_by_key", "_sort_keys")
+
+	def __init__(self) -> None:
+		self.buckets: t.List[DrawBucket] = []
+		self._buckets_by_key: t.Dict[t.Hashable, DrawBucket] = {}
+		self._sort_keys: t.List[int] = []
+
+	def get_bucket(self, group_data: "GroupData") -> t.Tuple[DrawBucket, bool]:
+		"""
+		Returns the bucket the given group belongs into and whether it
+		had to be created for it.
+		"""
+		# Vertex layout is dictated by vertex domain and a group's program.
+		key = (
+			group_data.state.part_set,
+			group_data.interfacer.domain,
+			group_data.state.program.id,
+			group_data.interfacer.draw_mode,
+		)
+		if (bucket := self._buckets_by_key.get(key)) is not None:
+			return bucket, False
 
-	def __init__(self, groups: t.Iterable["GroupData"]) -> None:
-		self.groups = list(groups)
-		# self.used_vertex_domains = {g.interfacer.domain for g in groups}
-		# self.used_draw_modes = {g.interfacer.draw_mode for g in groups}
+		# TODO: This can certainly be optimized further by ordering buckets
+		# smartly in order to minimize state switch cost.
+		# Unfortunately, I am too stupid to figure out how, so just have
+		# whatever this is. Smushes together common states, which is good
+		# enough for the most part.
+		bucket = DrawBucket(
+			group_data.state, group_data.interfacer.domain, group_data.interfacer.draw_mode
+		)
+		i = bisect.bisect_right(self._sort_keys, bucket.sort_key)
+		self.buckets.insert(i, bucket)
+		self._sort_keys.insert(i, bucket.sort_key)
+		self._buckets_by_key[key] = bucket
+		return bucket, True
 
 	def _dump(self) -> str:
 		r = f"<{self.__class__.__name__}\n"
-		for c in self.groups:
-			r += "  " + repr(c) + "\n"
+		for b in self.buckets:
+			r += (
+				f"  Bucket state hash {b.sort_key}, {len(b.members)} groups, "
+				f"{b.count}/{b.capacity} elements at {b.offset}"
+				f"{' (instanced)' if b.instanced else ''}\n"
+			)
 		r += ">"
 		return r
 
@@ -44,7 +267,7 @@ class GroupData:
 	GroupData is used to build a group tree by storing an interfacer
 	and a group's children, which a group then maps to.
 	"""
-	__slots__ = ("interfacer", "state", "children", "group_chain")
+	__slots__ = ("interfacer", "state", "children", "group_chain", "bucket")
 
 	def __init__(
 		self,
@@ -57,6 +280,7 @@ class GroupData:
 		self.interfacer = interfacer
 		self.children = set(children)
 		self.group_chain = group_chain
+		self.bucket: t.Optional[DrawBucket] = None
 
 	@property
 	def is_drawable(self):
@@ -67,6 +291,16 @@ class DrawList:
 	"""
 	A DrawList encompasses a group tree and hosts functionality to
 	create optimized sprite drawing lists using index buffers.
+
+	Adding, removing, restating and hiding groups only patches the
+	index ranges of the buckets they are in, as long as this doesn't
+	change how the group tree splits into chains. Otherwise, the draw
+	list is rebuilt entirely.
+
+	Hiding a group drawn as triangles keeps its indices in place and
+	collapses them into degenerate triangles, so groups that flicker
+	only ever rewrite their own indices. Masked groups are dropped
+	when the draw list is rebuilt.
 	"""
 
 	def __init__(self, name: t.Hashable) -> None:
@@ -78,18 +312,39 @@ class DrawList:
 		self.name = name
 
 		self._dirty: bool = True
+		"""Whether the draw list needs to be rebuilt from the group tree."""
+
+		self._funcs_dirty: bool = False
+		"""Whether buckets were added and `funcs` needs to be rebuilt."""
+
 		self.funcs: t.List[t.Callable[[], t.Any]] = []
 		"""
 		List of functions to call in-order to draw everything that
 		needs to be drawn.
 		"""
 
+		self._chains: t.List[GroupChain] = []
+		self._runs: t.List[DrawRun] = []
+
 		self._group_data: t.Dict["PNFGroup", "GroupData"] = defaultdict(GroupData)
 		self._top_group = PNFGroup()
 		self._group_data[self._top_group] = GroupData()
 		self.index_buffer = RAMBackedBufferObject(
 			gl.GL_ELEMENT_ARRAY_BUFFER, 0, gl.GL_DYNAMIC_DRAW, _INDEX_TYPE
 		)
+		self.command_buffer = RAMBackedBufferObject(
+			gl.GL_DRAW_INDIRECT_BUFFER, 0, gl.GL_DYNAMIC_DRAW, gl.GL_UNSIGNED_INT
+		)
+		"""Holds the indirect draw commands of all draw runs and instanced buckets."""
+		self._index_arena = BufferArena(self.index_buffer)
+		self._command_arena = BufferArena(self.command_buffer)
+		self._patterns: t.Dict[t.Tuple[int, ...], int] = {}
+		"""
+		Maps the index patterns instanced groups draw each instance
+		with to their start in the index buffer.
+		"""
+		self._stale_runs: t.Set[DrawRun] = set()
+		"""Draw runs whose commands need to be rewritten before drawing."""
 
 	def add_group(
 		self,
@@ -99,12 +354,15 @@ class DrawList:
 	) -> None:
 		"""
 		Add a group and all its parents to the group data
-		registry and mark the draw list as dirty.
+		registry and update the draw list.
 		If the group is already known, has no effect.
 		"""
 		if group in self._group_data:
 			raise ValueError(f"Group {group!r} is already known in DrawList {self.name!r}.")
 
+		parent = self._top_group if group.parent is None else group.parent
+		parent_known = parent in self._group_data
+
 		fresh_group = group
 		while True:
 			tmp_parent = fresh_group.parent
@@ -117,31 +375,245 @@ class DrawList:
 			self._group_data[tmp_parent].children.add(fresh_group)
 			fresh_group = tmp_parent
 	
-		self._group_data[group].interfacer = interfacer
-		self._group_data[group].state = state
-		self._dirty = True
+		group_data = self._group_data[group]
+		group_data.interfacer = interfacer
+		group_data.state = state
+
+		if self._dirty or interfacer is None or not parent_known:
+			self._dirty = True
+			return
+
+		# A leaf with a sibling of the same order ends up in that sibling's chain.
+		chain = self._find_sibling_chain(parent, group)
+		if chain is None:
+			self._dirty = True
+			return
+
+		self._add_to_chain(chain, group_data)
 
 	def remove_group(self, group: "PNFGroup") -> None:
 		"""
 		Removes a group from this draw list's group tree.
 		"""
-		if self._group_data[group].children:
+		group_data = self._group_data[group]
+		if group_data.children:
 			raise ValueError(f"Drawable group {group!r} has children, can not remove.")
 
 		self._delete_group(group)
+		if self._dirty or group_data.bucket is None:
+			self._dirty = True
+			return
+
+		self._remove_from_chain(group_data)
+		# Without a sibling of the same order left, its chain may fall apart.
+		parent = self._top_group if group.parent is None else group.parent
+		if self._find_sibling_chain(parent, group) is None:
+			self._dirty = True
+
+	def modify_group(self, group: "PNFGroup", state: GLState) -> None:
+		"""
+		Changes the state the given group is drawn with.
+		"""
+		group_data = self._group_data[group]
+		if self._dirty or group_data.bucket is None:
+			group_data.state = state
+			self._dirty = True
+			return
+
+		chain = group_data.group_chain
+		self._remove_from_chain(group_data)
+		group_data.state = state
+		self._add_to_chain(chain, group_data)
+
+	def update_visibility(self, group: "PNFGroup") -> None:
+		"""
+		Shows or hides the given group's indices depending on its
+		interfacer's visibility.
+		"""
+		if self._dirty:
+			return
+
+		group_data = self._group_data[group]
+		if (bucket := group_data.bucket) is None:
+			self._dirty = True
+			return
+
+		if group_data.interfacer._visible:
+			if group_data in bucket.masked:
+				bucket.masked.remove(group_data)
+				self._write_slot(bucket, group_data)
+			elif group_data not in bucket.positions:
+				self._show(bucket, group_data)
+		elif group_data in bucket.positions and group_data not in bucket.masked:
+			if bucket.instanced or (
+				bucket.draw_mode == gl.GL_TRIANGLES and group_data.interfacer.indices
+			):
+				bucket.masked.add(group_data)
+				self._write_slot(bucket, group_data)
+			else:
+				self._hide(bucket, group_data)
 
 	def _delete_group(self, group: "PNFGroup") -> None:
 		"""
-		Deletes a group from the group registry and marks the draw
-		list as dirty. If a non-leaf node is deleted, it will leave
-		a hole in the continuity of the group tree, so don't do that.
+		Deletes a group from the group registry. If a non-leaf node is
+		deleted, it will leave a hole in the continuity of the group
+		tree, so don't do that.
 		"""
 		if group.parent is not None and group.parent in self._group_data:
 			self._group_data[group.parent].children.remove(group)
 		self._group_data[self._top_group].children.discard(group)
 		self._group_data.pop(group)
 
-		self._dirty = True
+	def _find_sibling_chain(
+		self, parent: "PNFGroup", group: "PNFGroup"
+	) -> t.Optional[GroupChain]:
+		"""
+		Returns the chain of a drawable child of `parent` other than
+		`group` that has the same order as `group`, if there is one.
+		"""
+		for sibling in self._group_data[parent].children:
+			if sibling is group or sibling.order != group.order:
+				continue
+			sibling_data = self._group_data[sibling]
+			if sibling_data.interfacer is not None and sibling_data.group_chain is not None:
+				return sibling_data.group_chain
+
+		return None
+
+	def _add_to_chain(self, chain: GroupChain, group_data: GroupData) -> None:
+		bucket, created = chain.get_bucket(group_data)
+		if created:
+			if bucket.instanced:
+				bucket.arena = self._command_arena
+				bucket.capacity = _bucket_capacity(_COMMAND_LENGTH, _COMMAND_LENGTH)
+			else:
+				bucket.arena = self._index_arena
+				bucket.capacity = _bucket_capacity(len(group_data.interfacer.indices))
+			bucket.offset = bucket.arena.allocate(bucket.capacity)
+			self._funcs_dirty = True
+
+		bucket.members.add(group_data)
+		group_data.group_chain = chain
+		group_data.bucket = bucket
+		if group_data.interfacer._visible:
+			self._show(bucket, group_data)
+
+	def _remove_from_chain(self, group_data: GroupData) -> None:
+		bucket = group_data.bucket
+		if group_data in bucket.positions:
+			self._hide(bucket, group_data)
+			bucket.masked.discard(group_data)
+		# Empty buckets stay around until the next rebuild, the group may come back soon.
+		bucket.members.discard(group_data)
+		group_data.group_chain = None
+		group_data.bucket = None
+
+	def _get_pattern_offset(self, pattern: t.Tuple[int, ...]) -> int:
+		"""
+		Returns the start of the given index pattern in the index
+		buffer, writing it there if it isn't yet.
+		"""
+		if (offset := self._patterns.get(pattern)) is None:
+			offset = self._index_arena.allocate(len(pattern))
+			self.index_buffer.set_data_py(offset, len(pattern), pattern)
+			self._patterns[pattern] = offset
+		return offset
+
+	def _get_slot_data(self, bucket: DrawBucket, group_data: GroupData) -> t.Sequence[int]:
+		"""
+		Returns what a group's slot in its bucket should contain: Its
+		indices or, for instanced buckets, a command drawing its
+		instance. Masked groups draw nothing.
+		"""
+		indices = group_data.interfacer.indices
+		if bucket.instanced:
+			return (
+				len(indices),
+				int(group_data not in bucket.masked),
+				self._get_pattern_offset(indices),
+				0,
+				# The base instance selects the group's attributes, so it is where the
+				# instance lives in the vertex domain, not the group's slot in the bucket.
+				group_data.interfacer.domain_position,
+			)
+
+		if group_data in bucket.masked:
+			return (indices[0],) * len(indices)
+		return indices
+
+	def _show(self, bucket: DrawBucket, group_data: GroupData) -> None:
+		data = self._get_slot_data(bucket, group_data)
+		if bucket.count + len(data) > bucket.capacity:
+			# Move to a bigger range at the end of the buffer
+			bucket.arena.free(bucket.capacity)
+			granularity = _COMMAND_LENGTH if bucket.instanced else 1
+			bucket.capacity = _bucket_capacity(bucket.count + len(data), granularity)
+			bucket.offset = bucket.arena.allocate(bucket.capacity)
+			self._write_slots(bucket, 0, 0)
+			if bucket.arena.needs_compaction():
+				# Compact everything on the next rebuild
+				self._dirty = True
+
+		bucket.positions[group_data] = len(bucket.slots)
+		bucket.slots.append(group_data)
+		bucket.starts.append(bucket.count)
+		bucket.arena.buffer.set_data_py(bucket.offset + bucket.count, len(data), data)
+		bucket.count += len(data)
+		if bucket.run is not None and not bucket.instanced:
+			self._stale_runs.add(bucket.run)
+
+	def _hide(self, bucket: DrawBucket, group_data: GroupData) -> None:
+		slot = bucket.positions.pop(group_data)
+		last = bucket.slots.pop()
+		last_start = bucket.starts.pop()
+		if last is group_data:
+			bucket.count = last_start
+		elif bucket.count - last_start == self._get_slot_length(bucket, group_data):
+			# Move the last group's data into the hole
+			bucket.slots[slot] = last
+			bucket.positions[last] = slot
+			bucket.count = last_start
+			self._write_slot(bucket, last)
+		else:
+			# Shift everything behind the hole
+			bucket.slots.append(last)
+			bucket.starts.append(last_start)
+			start = bucket.starts[slot]
+			del bucket.slots[slot]
+			del bucket.starts[slot]
+			self._write_slots(bucket, slot, start)
+
+		if bucket.run is not None and not bucket.instanced:
+			self._stale_runs.add(bucket.run)
+
+	@staticmethod
+	def _get_slot_length(bucket: DrawBucket, group_data: GroupData) -> int:
+		return _COMMAND_LENGTH if bucket.instanced else len(group_data.interfacer.indices)
+
+	def _write_slot(self, bucket: DrawBucket, group_data: GroupData) -> None:
+		"""
+		Writes the data of the given group to its slot.
+		"""
+		data = self._get_slot_data(bucket, group_data)
+		start = bucket.offset + bucket.starts[bucket.positions[group_data]]
+		bucket.arena.buffer.set_data_py(start, len(data), data)
+
+	def _write_slots(self, bucket: DrawBucket, first_slot: int, start: int) -> None:
+		"""
+		Writes the data of all of a bucket's slots starting from
+		`first_slot` tightly packed to its buffer, beginning at `start`
+		within the bucket's range.
+		"""
+		data = []
+		for slot in range(first_slot, len(bucket.slots)):
+			group_data = bucket.slots[slot]
+			bucket.positions[group_data] = slot
+			bucket.starts[slot] = start + len(data)
+			data.extend(self._get_slot_data(bucket, group_data))
+
+		if data:
+			bucket.arena.buffer.set_data_py(bucket.offset + start, len(data), data)
+		bucket.count = start + len(data)
 
 	def _visit(self, group: "PNFGroup") -> t.Tuple[t.List[t.List["PNFGroup"]], bool]:
 		"""
@@ -156,8 +628,9 @@ class DrawList:
 		"""
 		chains = []
 		group_intact = self._group_data[group].interfacer is not None
-		if group_intact and self._group_data[group].interfacer._visible:
-			# Don't draw invisible groups now
+		if group_intact:
+			# Invisible groups are kept as well, so toggling their visibility does not
+			# change the chains.
 			chains.append([group])
 
 		if group_intact and self._group_data[group].children:
@@ -209,72 +682,99 @@ class DrawList:
 
 		return chains, group_intact
 
-	def regenerate(self) -> t.Tuple[t.List[t.Callable[[], t.Any]], t.List[int]]:
+	def regenerate(self) -> None:
 		"""
-		Rebuilds the draw list from the group tree.
-		Returns a series of functions that - when called in order -
-		will run through all necessary state mutations and draw
-		calls to draw the scene which you want to draw and a list
-		of indices the index buffer must contain at that point.
+		Rebuilds the draw list from the group tree, laying out the
+		indices of all buckets anew and rebuilding `funcs`.
 		"""
-		chains = [
-			GroupChain(self._group_data[g] for g in raw_chain)
-			for raw_chain in self._visit(self._top_group)[0]
-		]
+		for group_data in self._group_data.values():
+			group_data.group_chain = None
+			group_data.bucket = None
 
-		if not chains:
-			return [], []
+		chains = []
+		for raw_chain in self._visit(self._top_group)[0]:
+			chain = GroupChain()
+			for g in raw_chain:
+				group_data = self._group_data[g]
+				bucket, _ = chain.get_bucket(group_data)
+				bucket.members.add(group_data)
+				group_data.group_chain = chain
+				group_data.bucket = bucket
+			chains.append(chain)
 
-		# Below converts the group chains into GL calls.
-		# TODO: This can certainly be optimized further by reordering
-		# groups that share a GroupChain smartly in order to minimize
-		# state switch cost.
-		# Unfortunately, I am too stupid to figure out how, so just have
-		# whatever this is. Smushes together common states, which is good
-		# enough for the most part.
+		indices = []
+		self._patterns = {}
 		for chain in chains:
-			chain.groups.sort(key=lambda g: hash(g.state.part_set))
-
-		# AT THIS POINT the chains can be flattened.
+			for bucket in chain.buckets:
+				if not bucket.instanced:
+					continue
+				for group_data in bucket.members:
+					pattern = group_data.interfacer.indices
+					if pattern not in self._patterns:
+						self._patterns[pattern] = len(indices)
+						indices.extend(pattern)
+
+		commands = []
+		for chain in chains:
+			for bucket in chain.buckets:
+				if bucket.instanced:
+					data = commands
+					bucket.arena = self._command_arena
+					granularity = _COMMAND_LENGTH
+				else:
+					data = indices
+					bucket.arena = self._index_arena
+					granularity = 1
+
+				bucket.offset = len(data)
+				hidden_length = 0
+				for group_data in bucket.members:
+					if not group_data.interfacer._visible:
+						hidden_length += self._get_slot_length(bucket, group_data)
+						continue
+					bucket.positions[group_data] = len(bucket.slots)
+					bucket.slots.append(group_data)
+					bucket.starts.append(len(data) - bucket.offset)
+					data.extend(self._get_slot_data(bucket, group_data))
+
+				bucket.count = len(data) - bucket.offset
+				bucket.capacity = _bucket_capacity(bucket.count + hidden_length, granularity)
+				data.extend(repeat(0, bucket.capacity - bucket.count))
+
+		self._index_arena.reset(indices)
+		self._command_arena.reset(commands)
+		self._chains = chains
+		self._runs = []
+		self._emit()
+		self._dirty = False
 
+	def _emit(self) -> None:
+		"""
+		Builds `funcs` from the current chains.
+		"""
 		cur_state = GLState.empty()
 		draw_list = []
-		indices = []
-		# Vertex layout is dictated by vertex domain and a group's program.
 		cur_vertex_layout = None
 		cur_draw_mode = None
-		cur_index_start = 0
-		cur_index_run = 0
+		cur_run = None
+		runs: t.List[DrawRun] = []
 
-		for chain in chains:
-			for group_data in chain.groups:
+		for chain in self._chains:
+			for bucket in chain.buckets:
 				# Get necessary state switch calls
-				state_switches = cur_state.switch(group_data.state)
-				cur_state = group_data.state
+				state_switches = cur_state.switch(bucket.state)
+				cur_state = bucket.state
 
-				new_vertex_layout = (group_data.interfacer.domain, group_data.state.program.id)
-				new_draw_mode = group_data.interfacer.draw_mode
+				new_vertex_layout = (bucket.domain, bucket.state.program.id)
 
 				# Any of these unfortunately force a new draw call
 				if (
 					state_switches or
-					new_draw_mode != cur_draw_mode or
+					bucket.draw_mode != cur_draw_mode or
 					cur_vertex_layout != new_vertex_layout
 				):
-					# Accumulate all indices so far into a draw call (if there were any)
-					if cur_index_run > 0:
-						def draw_elements(
-							m=cur_draw_mode, c=cur_index_run, t=_INDEX_TYPE,
-							s=cur_index_start*_INDEX_TYPE_SIZE
-						):
-							gl.glDrawElements(m, c, t, s)
-						draw_list.append(draw_elements)
-
-						cur_index_start += cur_index_run
-						cur_index_run = 0
-
 					if cur_vertex_layout != new_vertex_layout:
-						def bind_vao(d=group_data.interfacer.domain, p=group_data.state.program):
+						def bind_vao(d=bucket.domain, p=bucket.state.program):
 							# Buffers store their data locally and need to be told to upload it.
 							# Using a buffer that does direct glNamedBufferSubData calls noticeably
 							# slows down the freeplay scene, where a lot of vertex updates are
@@ -287,52 +787,78 @@ class DrawList:
 						cur_vertex_layout = new_vertex_layout
 
 					# Extend the draw list with the required state switch calls
-					cur_draw_mode = new_draw_mode
+					cur_draw_mode = bucket.draw_mode
 					draw_list.extend(state_switches)
 
-				# Extend vertex indices
-				indices.extend(group_data.interfacer.indices)
-				cur_index_run += len(group_data.interfacer.indices)
+					cur_run = DrawRun(cur_draw_mode, bucket.instanced)
+					runs.append(cur_run)
+					draw_list.append(cur_run.draw)
 
-		if cur_index_run > 0:
-			# Final draw call
-			def final_draw_elements(
-				m=cur_draw_mode, c=cur_index_run, t=_INDEX_TYPE,
-				s=cur_index_start*_INDEX_TYPE_SIZE, d=cur_vertex_layout[0]
-			):
-				gl.glDrawElements(m, c, t, s)
-				gl.glBindVertexArray(0)
-			draw_list.append(final_draw_elements)
+				cur_run.buckets.append(bucket)
+				bucket.run = cur_run
+
+		if draw_list:
+			draw_list.append(_unbind_vao)
+
+		for run in self._runs:
+			if not run.instanced:
+				self._command_arena.free(len(run.buckets) * _COMMAND_LENGTH)
+		self._stale_runs = set()
+		for run in runs:
+			if not run.instanced:
+				run.command_offset = self._command_arena.allocate(len(run.buckets) * _COMMAND_LENGTH)
+				self._stale_runs.add(run)
+		if self._command_arena.needs_compaction():
+			self._dirty = True
 
-		return draw_list, indices
+		self._runs = runs
+		self.funcs = draw_list
+		self._funcs_dirty = False
 
 	def check_dirty(self) -> bool:
 		"""
 		Checks whether this draw list is dirty. If it is, regenerates
-		it and returns `True`. Otherwise, returns `False`.
+		it or rebuilds its functions and returns `True`. Otherwise,
+		returns `False`.
 		"""
-		if not self._dirty:
-			return False
+		if self._dirty:
+			self.regenerate()
+			return True
 
-		funcs, indices = self.regenerate()
-		self.funcs = funcs
-		self.index_buffer.set_size_and_data_py(indices)
-		self._dirty = False
-		return True
+		if self._funcs_dirty:
+			self._emit()
+			return True
+
+		return False
 
 	def draw(self) -> None:
+		for run in self._stale_runs:
+			run.update_commands(self.command_buffer)
+		self._stale_runs.clear()
+
+		self.index_buffer.ensure()
+		# Binds the command buffer, uploading pending commands
+		self.command_buffer.bind()
 		for f in self.funcs:
 			f()
+		gl.glBindBuffer(gl.GL_DRAW_INDIRECT_BUFFER, 0)
 
 	def delete(self) -> None:
 		"""
 		Properly deletes the DrawList and frees up any OpenGL objects.
 		"""
 		self.index_buffer.delete()
+		self.command_buffer.delete()
 
 		for gd in self._group_data.values():
 			gd.children.clear() # probably makes cyclic reference breakup easier
+			gd.group_chain = None
+			gd.bucket = None
 		del self._group_data
+		self._chains.clear()
+		self._runs.clear()
+		self._stale_runs.clear()
+		self.funcs.clear()
 		# del self._top_groups
 
 	def dump_group_tree(self, gi: t.Iterable["PNFGroup"] = None, indent: int = 2) -> str:
@@ -356,8 +882,8 @@ class DrawList:
 	def dump_debug_info(self) -> str:
 		r = f"  Calls in draw list: {len(self.funcs)}\n"
 		r += self.dump_group_tree()
-		r += "Generated group chains:\n"
-		r += "\n".join(map(repr, self._visit(self._top_group)[0]))
+		r += "Group chains:\n"
+		r += "\n".join(c._dump() for c in self._chains)
 		return r
 
 
@@ -374,9 +900,17 @@ class PNFBatch:
 
 	def __init__(self) -> None:
 		self._draw_lists: t.Dict[t.Hashable, DrawList] = {}
-		self._vertex_domains: t.Dict["frozenset[str]", "PNFVertexDomain"] = {}
+		self._vertex_domains: t.Dict[t.Tuple["frozenset[str]", bool], "PNFVertexDomain"] = {}
 		self._interfacers: "WeakSet[PNFBatchInterfacer]" = WeakSet()
 		"""Stores the interfacers this batch owns."""
+		self._pending_data: t.Dict[
+			PNFVertexDomainAttribute, t.Dict[int, t.Tuple[int, t.Collection]]
+		] = {}
+		"""
+		Vertex data set since the batch was last drawn. Maps attributes
+		to the positions data was set at, mapped to its size in
+		vertices and the data itself.
+		"""
 
 	def _get_draw_list(self, name: t.Hashable) -> DrawList:
 		"""
@@ -386,15 +920,17 @@ class PNFBatch:
 			self._draw_lists[name] = DrawList(name)
 		return self._draw_lists[name]
 
-	def _get_vertex_domain(self, attr_bundle: t.Iterable[str]) -> PNFVertexDomain:
+	def _get_vertex_domain(
+		self, attr_bundle: t.Iterable[str], instanced: bool = False
+	) -> PNFVertexDomain:
 		"""
 		Gets an existing or newly created vertexdomain for the given
-		vertex attribute bundle.
+		vertex attribute bundle and instancing.
 		"""
-		attr_bundle = frozenset(attr_bundle)
-		if attr_bundle not in self._vertex_domains:
-			self._vertex_domains[attr_bundle] = PNFVertexDomain(attr_bundle)
-		return self._vertex_domains[attr_bundle]
+		key = (frozenset(attr_bundle), instanced)
+		if key not in self._vertex_domains:
+			self._vertex_domains[key] = PNFVertexDomain(*key)
+		return self._vertex_domains[key]
 
 	def add(
 		self,
@@ -420,6 +956,37 @@ class PNFBatch:
 		*data: t.Tuple[str, t.Optional[t.Collection]],
 	) -> PNFBatchInterfacer:
 		domain = self._get_vertex_domain(x[0] for x in data)
+		return self._add_to_domain(domain, size, draw_mode, group, indices, states, data)
+
+	def add_instanced(
+		self,
+		draw_mode: int,
+		group: "PNFGroup",
+		indices: t.Sequence[int],
+		states: t.Dict[t.Hashable, GLState],
+		*data: t.Tuple[str, t.Optional[t.Collection]],
+	) -> PNFBatchInterfacer:
+		"""
+		Adds a single instance to an instanced vertex domain, where
+		the attributes in `data` are stored once for the entire
+		instance. `indices` are drawn for the instance as they are,
+		the vertex shader has to build its vertices from
+		`gl_VertexID`. Data for the attributes is given for that one
+		instance.
+		"""
+		domain = self._get_vertex_domain((x[0] for x in data), True)
+		return self._add_to_domain(domain, 1, draw_mode, group, indices, states, data)
+
+	def _add_to_domain(
+		self,
+		domain: PNFVertexDomain,
+		size: int,
+		draw_mode: int,
+		group: "PNFGroup",
+		indices: t.Sequence[int],
+		states: t.Dict[t.Hashable, GLState],
+		data: t.Sequence[t.Tuple[str, t.Optional[t.Collection]]],
+	) -> PNFBatchInterfacer:
 		start = domain.allocate(size)
 		interfacer = PNFBatchInterfacer(
 			domain, start, size, draw_mode, indices, self, group
@@ -438,10 +1005,50 @@ class PNFBatch:
 		"""
 		Draws the given draw list.
 		"""
+		self.flush_data()
 		draw_list = self._draw_lists[draw_list_name]
 		draw_list.check_dirty()
 		draw_list.draw()
 
+	def set_data(
+		self, attribute: PNFVertexDomainAttribute, start: int, size: int, data: t.Collection
+	) -> None:
+		"""
+		Sets `size` vertices of the given vertex domain attribute
+		from `start` to `data` once the batch is drawn next or
+		`flush_data` is called. Data set for the same vertices again
+		before that replaces the previous data.
+		"""
+		if (pending := self._pending_data.get(attribute)) is None:
+			pending = self._pending_data[attribute] = {}
+		pending[start] = (size, data)
+
+	def flush_data(self) -> None:
+		"""
+		Writes all pending vertex data into the vertex domains,
+		merging data for consecutive vertices into one write.
+		"""
+		if not self._pending_data:
+			return
+
+		for attribute, pending in self._pending_data.items():
+			run_start = run_end = -1
+			run_data = []
+			for start in sorted(pending):
+				size, data = pending[start]
+				if start != run_end:
+					if run_data:
+						attribute.set_data_py(run_start, run_end - run_start, run_data)
+						run_data = []
+					run_start = start
+				run_data.extend(data)
+				run_end = start + size
+
+			if run_data:
+				attribute.set_data_py(run_start, run_end - run_start, run_data)
+
+		self._pending_data.clear()
+
 	def _introduce_interfacer(
 		self,
 		interfacer: "PNFBatchInterfacer",
@@ -462,6 +1069,13 @@ class PNFBatch:
 		if interfacer not in self._interfacers:
 			return
 
+		# Its data may be about to be copied into another batch's domain.
+		for attribute in interfacer.domain.attributes.values():
+			if (pending := self._pending_data.get(attribute)) is None:
+				continue
+			if (size_and_data := pending.pop(interfacer.domain_position, None)) is not None:
+				attribute.set_data_py(interfacer.domain_position, *size_and_data)
+
 		for dl_id in interfacer._draw_lists:
 			self.remove_group(dl_id, interfacer._group)
 		self._interfacers.remove(interfacer)
@@ -480,6 +1094,13 @@ class PNFBatch:
 		"""
 		self._get_draw_list(draw_list).add_group(group, interfacer, state)
 
+	def modify_group(self, draw_list: t.Hashable, group: "PNFGroup", state: GLState) -> None:
+		"""
+		Changes the state the given group is drawn with in the given
+		draw list. The draw list must exist.
+		"""
+		self._draw_lists[draw_list].modify_group(group, state)
+
 	def remove_group(self, draw_list: t.Hashable, group: "PNFGroup") -> None:
 		"""
 		Removes the given group from the given draw list's group tree.
@@ -507,8 +1128,8 @@ class PNFBatch:
 			r += dl.dump_debug_info()
 
 		r += "\nVertex Domain info:"
-		for key, vtxd in self._vertex_domains.items():
-			r += f"\n{sorted(key)}\n"
+		for (bundle, instanced), vtxd in self._vertex_domains.items():
+			r += f"\n{sorted(bundle)}{' (instanced)' if instanced else ''}\n"
 			for name, att in vtxd.attributes.items():
 				r += f"  {name}: {att}\n"
 				arr = att.get_data_elements(0, 16)
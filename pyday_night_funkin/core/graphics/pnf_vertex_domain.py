@@ -91,11 +91,15 @@ class PNFVertexDomain:
 	Vertex domains have VAOs for different combinations of programs
 	and draw lists to quickly set up vertex bindings.
 	The vertex attribute bundle is unchangable.
+
+	Instanced vertex domains advance their attributes once per
+	instance instead of once per vertex. Their allocations are
+	counted in instances.
 	"""
 
 	INITIAL_VERTEX_CAPACITY = 2048
 
-	def __init__(self, attribute_bundle: "frozenset[str]") -> None:
+	def __init__(self, attribute_bundle: "frozenset[str]", instanced: bool = False) -> None:
 		"""
 		Creates a new vertex domain.
 		`attribute_bundle` should be an iterable of valid vertex attribute
@@ -105,6 +109,9 @@ class PNFVertexDomain:
 		self.attribute_bundle = attribute_bundle
 		"""Attribute bundle the domain was created with."""
 
+		self.instanced = instanced
+		"""Whether the domain's attributes advance per instance."""
+
 		# NOTE: This allocator does not track bytes, but vertices.
 		self._allocator = allocation.Allocator(self.INITIAL_VERTEX_CAPACITY)
 		self._vaos: t.Dict[t.Hashable, t.Dict[int, gl.GLuint]] = {}
@@ -183,6 +190,8 @@ class PNFVertexDomain:
 			gl.glVertexArrayAttribFormat(vao_id, loc, attr.count, attr.type, attr.normalize, 0)
 			# Associate the binding point with the buffer vertices should be sourced from.
 			gl.glVertexArrayVertexBuffer(vao_id, bp, attr.id, 0, attr.element_size)
+			if self.instanced:
+				gl.glVertexArrayBindingDivisor(vao_id, bp, 1)
 			# Link the shader attribute index with the binding point
 			gl.glVertexArrayAttribBinding(vao_id, loc, bp)
 
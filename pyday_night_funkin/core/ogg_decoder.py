@@ -16,13 +16,22 @@ class OggVorbisStreamingSource(StreamingSource):
 	Streaming source over an ogg vorbis file.
 	"""
 
-	def __init__(self, filename: t.Union[str, "Path"]) -> None:
+	def __init__(
+		self,
+		filename: t.Union[str, "Path"],
+		data: t.Optional[t.Union[bytes, memoryview]] = None,
+	) -> None:
 		"""
 		Creates a new OggVorbisStreamingSource. The filename given
 		should point to a valid ogg vorbis ogg file, otherwise a
 		RuntimeError will be raised.
+		If ``data`` is given, the file is decoded from it instead and
+		the filename is ignored.
 		"""
-		self._stbv = STBVorbis(str(filename))
+		if data is None:
+			self._stbv = STBVorbis(str(filename))
+		else:
+			self._stbv = STBVorbis(data=data)
 		self.fallback_sample_pos = 0
 
 		self.audio_format = AudioFormat(self._stbv.channel_amount, 16, self._stbv.sample_rate)
@@ -58,10 +67,15 @@ class OggVorbisDecoder(MediaDecoder):
 		return (".ogg",)
 
 	def decode(self, filename: str, file: t.BinaryIO, streaming: bool) -> Source:
+		data = None
 		if file is not None and not file.closed:
-			file.close()
+			if hasattr(file, "getbuffer"):
+				# In-memory file, e.g. from an archive. Decode without copying it.
+				data = file.getbuffer()
+			else:
+				file.close()
 
-		src = OggVorbisStreamingSource(filename)
+		src = OggVorbisStreamingSource(filename, data)
 		if streaming:
 			return src
 		else:
@@ -0,0 +1,258 @@
+"""
+A packed texture container format that can be uploaded to OpenGL
+straight out of a memory-mapped file, skipping image decoding and
+pixel format conversion.
+
+A file consists of a header, an entry table and the pixel data of each
+entry. Pixel data is stored as tightly packed RGBA8 rows, bottom row
+first, matching what pyglet would pass into ``glTexSubImage2D``.
+
+Can be run as a script to convert all images below a directory into
+packed files placed next to them:
+``python -m pyday_night_funkin.core.packed_texture assets``
+"""
+
+import argparse
+import ctypes
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+import typing as t
+
+if t.TYPE_CHECKING:
+	from pyglet.image import ImageData
+
+
+PACKED_TEXTURE_EXTENSION = ".pnftex"
+"""
+Extension appended to an image's file name to form the name of the
+packed file converted from it.
+"""
+
+_MAGIC = b"PNFT"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sHH")
+"""Magic, format version, entry count."""
+_ENTRY_NAME_LEN = struct.Struct("<H")
+_ENTRY = struct.Struct("<IIQqq")
+"""
+Width, height, offset of the pixel data from the start of the file,
+source file modification time in nanoseconds and source file size.
+The latter two are -1 if unknown.
+"""
+_DATA_ALIGNMENT = 16
+
+_CONVERTIBLE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
+
+
+class PackedTextureError(ValueError):
+	pass
+
+
+class PackedTextureEntry:
+	__slots__ = ("name", "width", "height", "offset", "source_mtime_ns", "source_size")
+
+	def __init__(
+		self,
+		name: str,
+		width: int,
+		height: int,
+		offset: int,
+		source_mtime_ns: int,
+		source_size: int,
+	) -> None:
+		self.name = name
+		self.width = width
+		self.height = height
+		self.offset = offset
+		self.source_mtime_ns = source_mtime_ns
+		self.source_size = source_size
+
+	def get_data_size(self) -> int:
+		return self.width * self.height * 4
+
+	def matches_source(self, source_path: str) -> bool:
+		"""
+		Whether this entry was created from the file at
+		``source_path`` in its current state. Entries that do not know
+		their source or entries whose source has disappeared are always
+		considered matching.
+		"""
+		if self.source_size < 0:
+			return True
+
+		try:
+			st = os.stat(source_path)
+		except OSError:
+			return True
+
+		return st.st_mtime_ns == self.source_mtime_ns and st.st_size == self.source_size
+
+
+def read_entries(buffer: t.Union[bytes, mmap.mmap]) -> t.Dict[str, PackedTextureEntry]:
+	"""
+	Reads the entry table of a packed texture file out of the given
+	buffer. Raises a ``PackedTextureError`` if it is malformed.
+	"""
+	if len(buffer) < _FILE_HEADER.size:
+		raise PackedTextureError("Buffer too small")
+
+	magic, version, count = _FILE_HEADER.unpack_from(buffer)
+	if magic != _MAGIC:
+		raise PackedTextureError("Bad magic")
+	if version != _VERSION:
+		raise PackedTextureError(f"Unsupported version {version}")
+
+	entries = {}
+	cursor = _FILE_HEADER.size
+	try:
+		for _ in range(count):
+			name_len, = _ENTRY_NAME_LEN.unpack_from(buffer, cursor)
+			cursor += _ENTRY_NAME_LEN.size
+			name = bytes(buffer[cursor:cursor + name_len]).decode("utf-8")
+			cursor += name_len
+			entry = PackedTextureEntry(name, *_ENTRY.unpack_from(buffer, cursor))
+			cursor += _ENTRY.size
+
+			if entry.offset + entry.get_data_size() > len(buffer):
+				raise PackedTextureError(f"Entry {name!r} exceeds buffer")
+			entries[name] = entry
+	except (struct.error, UnicodeDecodeError) as e:
+		raise PackedTextureError("Malformed entry table") from e
+
+	return entries
+
+
+def image_data_from_buffer(buffer: mmap.mmap, entry: PackedTextureEntry) -> "ImageData":
+	"""
+	Creates an ``ImageData`` whose data is a view into ``buffer``.
+	``buffer`` must be writable (e.g. a map created with
+	``ACCESS_COPY``), though it will never be written to.
+	The buffer will stay alive for as long as the ``ImageData`` does.
+	"""
+	from pyglet.image import ImageData
+
+	data = (ctypes.c_ubyte * entry.get_data_size()).from_buffer(buffer, entry.offset)
+	# Format and pitch match what the ImageAssetProvider requests, so pyglet's
+	# `_convert` passes this array through to GL untouched.
+	return ImageData(entry.width, entry.height, "RGBA", data, entry.width * 4)
+
+
+def build_chunks(
+	images: t.Sequence[t.Tuple[str, "ImageData", t.Optional[os.stat_result]]],
+) -> t.List[bytes]:
+	"""
+	Builds a packed texture file out of the given tuples of name,
+	image data and optional stat result of the file the image was
+	loaded from.
+	Returns it as a list of byte chunks that are to be written out
+	consecutively.
+	"""
+	if len(images) > 0xFFFF:
+		raise PackedTextureError("Too many images")
+
+	pixel_data = []
+	table_size = _FILE_HEADER.size
+	for name, image_data, _ in images:
+		table_size += _ENTRY_NAME_LEN.size + len(name.encode("utf-8")) + _ENTRY.size
+		pixel_data.append(image_data.get_data("RGBA", image_data.width * 4))
+
+	table = bytearray(_FILE_HEADER.pack(_MAGIC, _VERSION, len(images)))
+	chunks: t.List[bytes] = []
+	offset = table_size
+	for (name, image_data, st), data in zip(images, pixel_data):
+		padding = -offset % _DATA_ALIGNMENT
+		offset += padding
+		chunks.append(b"\0" * padding)
+		chunks.append(data)
+
+		encoded_name = name.encode("utf-8")
+		table += _ENTRY_NAME_LEN.pack(len(encoded_name))
+		table += encoded_name
+		table += _ENTRY.pack(
+			image_data.width,
+			image_data.height,
+			offset,
+			-1 if st is None else st.st_mtime_ns,
+			-1 if st is None else st.st_size,
+		)
+		offset += len(data)
+
+	assert len(table) == table_size
+	return [bytes(table), *chunks]
+
+
+def get_packed_path(source_path: str) -> str:
+	return source_path + PACKED_TEXTURE_EXTENSION
+
+
+def convert_directory(directory: Path, force: bool = False) -> t.Tuple[int, int]:
+	"""
+	Converts every image found below ``directory`` into a packed
+	texture file next to it.
+	Images whose packed file is already up to date are skipped unless
+	``force`` is given.
+	Returns the amount of converted and skipped images.
+	"""
+	from pyglet import image
+
+	converted = skipped = 0
+	for root, _, files in os.walk(directory):
+		for file_name in files:
+			if os.path.splitext(file_name)[1].lower() not in _CONVERTIBLE_EXTENSIONS:
+				continue
+
+			source_path = os.path.join(root, file_name)
+			packed_path = get_packed_path(source_path)
+			st = os.stat(source_path)
+
+			if not force and os.path.isfile(packed_path):
+				try:
+					with open(packed_path, "rb") as f:
+						with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+							entries = read_entries(mm)
+				except (OSError, ValueError):
+					entries = {}
+				if file_name in entries and entries[file_name].matches_source(source_path):
+					skipped += 1
+					continue
+
+			chunks = build_chunks([(file_name, image.load(source_path), st)])
+			tmp_path = packed_path + ".tmp"
+			with open(tmp_path, "wb") as f:
+				for chunk in chunks:
+					f.write(chunk)
+			os.replace(tmp_path, packed_path)
+			converted += 1
+			print(f"Packed {source_path}")
+
+	return converted, skipped
+
+
+def main() -> int:
+	argparser = argparse.ArgumentParser(
+		description = "Converts images into PNF's packed texture format for faster loading."
+	)
+	argparser.add_argument("directory", nargs="?", default="assets", type=Path)
+	argparser.add_argument(
+		"--force", "-f", action="store_true", help="Reconvert images that are up to date."
+	)
+	result = argparser.parse_args()
+
+	# No window will ever be opened, don't create a context for one.
+	import pyglet
+	pyglet.options["shadow_window"] = False
+
+	if not result.directory.is_dir():
+		print(f"Not a directory: {result.directory}", file=sys.stderr)
+		return 1
+
+	converted, skipped = convert_directory(result.directory, result.force)
+	print(f"Done. {converted} images packed, {skipped} up to date.")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -364,7 +364,7 @@ class PNFMatrixSprite(WorldObject):
 
 	@frames.setter
 	def frames(self, new_frames: FrameCollection) -> None:
-		if not new_frames.frames:
+		if not new_frames:
 			raise ValueError("Can't have empty frame collections!")
 
 		self.animation.delete_animations()
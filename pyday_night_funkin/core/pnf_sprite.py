@@ -3,7 +3,7 @@ import typing as t
 
 from loguru import logger
 from pyglet import gl
-from pyglet.image import AbstractImage, TextureArrayRegion
+from pyglet.image import AbstractImage, Texture, TextureArrayRegion
 from pyglet.math import Vec2
 
 from pyday_night_funkin.core.animation import AnimationController
@@ -24,12 +24,12 @@ _PNF_SPRITE_VERTEX_SHADER_SOURCE = """
 #version 450
 
 // 12 vtx attrs is totally not a sign of me doing anything wrong
-// Plus, these are realistically going to be calculated 3 times more
-// that needed for each sprite. Oh well, calculating them on the python
-// side is out of the question, that's what I get for using this
-// language.
+// Sprites are drawn instanced, so all of these are stored once per
+// sprite and the vertices of its quad are built from `gl_VertexID`.
+// Calculating the matrices on the python side is still out of the
+// question, that's what I get for using this language.
 
-in vec2 position;
+in vec2 texture_dimensions;
 in vec2 translate;
 in vec2 offset;
 in vec2 frame_offset;
@@ -39,7 +39,7 @@ in vec2 scroll_factor;
 in vec2 origin;
 in float rotation;
 in vec2 scale;
-in vec3 tex_coords;
+in vec4 tex_rect;
 in vec4 colors;
 
 out vec4 vertex_colors;
@@ -59,6 +59,14 @@ layout(std140) uniform CameraAttrs {{
 
 
 void main() {{
+	// Builds the quad's vertices in the order shown in `PNFSprite._create_interfacer`.
+	vec2 corner = vec2(
+		(gl_VertexID == 1 || gl_VertexID == 2) ? 1.0 : 0.0,
+		gl_VertexID < 2 ? 1.0 : 0.0
+	);
+	vec2 position = corner * texture_dimensions;
+	vec3 tex_coords = vec3(mix(tex_rect.xy, tex_rect.zw, vec2(corner.x, 1.0 - corner.y)), 0.0);
+
 	mat4 m_camera_trans_scale = mat4(1.0);
 	mat4 res_mat = mat4(1.0);
 	mat4 work_mat = mat4(1.0);
@@ -167,6 +175,15 @@ class PNFSpriteFragmentShader:
 		return cls.src.format(color_behavior=color_behavior)
 
 
+def _get_tex_rect(texture: Texture) -> t.Tuple[float, float, float, float]:
+	"""
+	Returns the bottom left and top right texture coordinates of the
+	given texture.
+	"""
+	tc = texture.tex_coords
+	return (tc[0], tc[1], tc[6], tc[7])
+
+
 class Movement:
 	__slots__ = ("velocity", "acceleration")
 	
@@ -309,28 +326,28 @@ class PNFSprite(WorldObject):
 		#  A    \    E
 		#  v      <C\|
 		#  1----B>---2
+		# Only the indices are given, the vertex shader builds these vertices itself.
 		usage = self._usage
-		self._interfacer = self._context.batch.add_indexed(
-			4,
+		self._interfacer = self._context.batch.add_instanced(
 			gl.GL_TRIANGLES,
 			self._context.group,
 			(0, 1, 2, 0, 2, 3),
 			{camera: self._build_gl_state(camera.ubo) for camera in self._context.cameras},
-			("position2f/" + usage,         None),
-			("translate2f/" + usage,        (self._x, self._y) * 4),
-			("offset2f/" + usage,           self._offset * 4),
-			("frame_offset2f/" + usage,     None),
-			("frame_dimensions2f/" + usage, None),
-			("flip2B/" + usage,             (self._flip_x, self._flip_y) * 4),
-			("scroll_factor2f/" + usage,    self._scroll_factor * 4),
-			("origin2f/" + usage,           self._origin * 4),
-			("rotation1f/" + usage,         (self._rotation,) * 4),
+			("texture_dimensions2f/" + usage, None),
+			("translate2f/" + usage,          (self._x, self._y)),
+			("offset2f/" + usage,             self._offset),
+			("frame_offset2f/" + usage,       None),
+			("frame_dimensions2f/" + usage,   None),
+			("flip2B/" + usage,               (self._flip_x, self._flip_y)),
+			("scroll_factor2f/" + usage,      self._scroll_factor),
+			("origin2f/" + usage,             self._origin),
+			("rotation1f/" + usage,           (self._rotation,)),
 			(
 				"scale2f/" + usage,
-				(self._scale * self._scale_x, self._scale * self._scale_y) * 4
+				(self._scale * self._scale_x, self._scale * self._scale_y)
 			),
-			("tex_coords3f/" + usage,       self._texture.tex_coords),
-			("colors4Bn/" + usage,          (*self._color, int(self._opacity)) * 4),
+			("tex_rect4f/" + usage,           _get_tex_rect(self._texture)),
+			("colors4Bn/" + usage,            (*self._color, int(self._opacity))),
 		)
 		self._update_vertex_positions()
 
@@ -485,29 +502,23 @@ class PNFSprite(WorldObject):
 			)
 		else:
 			self._texture = texture
-		self._interfacer.set_data("tex_coords", texture.tex_coords)
-		self._interfacer.set_data("frame_offset", tuple(new_frame.offset) * 4)
-		self._interfacer.set_data("frame_dimensions", tuple(new_frame.source_dimensions) * 4)
+		self._interfacer.set_data("tex_rect", _get_tex_rect(texture))
+		self._interfacer.set_data("frame_offset", tuple(new_frame.offset))
+		self._interfacer.set_data("frame_dimensions", tuple(new_frame.source_dimensions))
 		# If this is not done, screws over vertices if the texture changes
 		if prev_h != texture.height or prev_w != texture.width:
 			self._update_vertex_positions()
 
 	def _update_vertex_positions(self):
 		img = self._texture
-		x1 = 0
-		y1 = img.height
-		x2 = img.width
-		y2 = 0
 
 		if img.anchor_x != 0 or img.anchor_y != 0:
 			logger.warning("Ignored anchor on pyglet texture was not 0!")
 
 		if self._subpixel:
-			self._interfacer.set_data("position", (x1, y1, x2, y1, x2, y2, x1, y2))
+			self._interfacer.set_data("texture_dimensions", (img.width, img.height))
 		else:
-			self._interfacer.set_data(
-				"position", tuple(map(int, (x1, y1, x2, y1, x2, y2, x1, y2)))
-			)
+			self._interfacer.set_data("texture_dimensions", (int(img.width), int(img.height)))
 
 	def delete(self):
 		"""
@@ -546,7 +557,7 @@ class PNFSprite(WorldObject):
 
 	@frames.setter
 	def frames(self, new_frames: FrameCollection) -> None:
-		if not new_frames.frames:
+		if not new_frames:
 			raise ValueError("Can't have empty frame collections!")
 
 		self.animation.delete_animations()
@@ -563,7 +574,7 @@ class PNFSprite(WorldObject):
 	@x.setter
 	def x(self, new_x: "Numeric") -> None:
 		self._x = new_x
-		self._interfacer.set_data("translate", (new_x, self._y) * 4)
+		self._interfacer.set_data("translate", (new_x, self._y))
 
 	@property
 	def y(self) -> "Numeric":
@@ -573,7 +584,7 @@ class PNFSprite(WorldObject):
 	@y.setter
 	def y(self, new_y: "Numeric") -> None:
 		self._y = new_y
-		self._interfacer.set_data("translate", (self._x, new_y) * 4)
+		self._interfacer.set_data("translate", (self._x, new_y))
 
 	@property
 	def position(self) -> t.Tuple["Numeric", "Numeric"]:
@@ -586,7 +597,7 @@ class PNFSprite(WorldObject):
 	@position.setter
 	def position(self, new_position: t.Tuple["Numeric", "Numeric"]) -> None:
 		self._x, self._y = new_position
-		self._interfacer.set_data("translate", new_position * 4)
+		self._interfacer.set_data("translate", new_position)
 
 	@property
 	def rotation(self) -> float:
@@ -596,7 +607,7 @@ class PNFSprite(WorldObject):
 	@rotation.setter
 	def rotation(self, new_rotation: float) -> None:
 		self._rotation = new_rotation
-		self._interfacer.set_data("rotation", (new_rotation,) * 4)
+		self._interfacer.set_data("rotation", (new_rotation,))
 
 	@property
 	def scale_x(self) -> "Numeric":
@@ -612,7 +623,7 @@ class PNFSprite(WorldObject):
 	def scale_x(self, new_scale_x: "Numeric") -> None:
 		self._scale_x = new_scale_x
 		self._interfacer.set_data(
-			"scale", (self._scale * new_scale_x, self._scale * self._scale_y) * 4
+			"scale", (self._scale * new_scale_x, self._scale * self._scale_y)
 		)
 
 	def set_scale_x_and_repos(self, new_scale_x: "Numeric") -> None:
@@ -634,7 +645,7 @@ class PNFSprite(WorldObject):
 	def scale_y(self, new_scale_y: "Numeric") -> None:
 		self._scale_y = new_scale_y
 		self._interfacer.set_data(
-			"scale", (self._scale * self._scale_x, self._scale * new_scale_y) * 4
+			"scale", (self._scale * self._scale_x, self._scale * new_scale_y)
 		)
 
 	def set_scale_y_and_repos(self, new_scale_y: "Numeric") -> None:
@@ -657,7 +668,7 @@ class PNFSprite(WorldObject):
 		self._scale = new_scale
 		self._interfacer.set_data(
 			"scale",
-			(new_scale * self._scale_x, new_scale * self._scale_y) * 4,
+			(new_scale * self._scale_x, new_scale * self._scale_y),
 		)
 
 	def set_scale_and_repos(self, new_scale: "Numeric") -> None:
@@ -678,7 +689,7 @@ class PNFSprite(WorldObject):
 	@origin.setter
 	def origin(self, new_origin: t.Tuple["Numeric", "Numeric"]) -> None:
 		self._origin = new_origin
-		self._interfacer.set_data("origin", new_origin * 4)
+		self._interfacer.set_data("origin", new_origin)
 
 	@property
 	def offset(self) -> t.Tuple["Numeric", "Numeric"]:
@@ -702,7 +713,7 @@ class PNFSprite(WorldObject):
 	@offset.setter
 	def offset(self, new_offset: t.Tuple["Numeric", "Numeric"]) -> None:
 		self._offset = new_offset
-		self._interfacer.set_data("offset", new_offset * 4)
+		self._interfacer.set_data("offset", new_offset)
 
 	@property
 	def scroll_factor(self) -> t.Tuple[float, float]:
@@ -716,7 +727,7 @@ class PNFSprite(WorldObject):
 	@scroll_factor.setter
 	def scroll_factor(self, new_sf: t.Tuple[float, float]) -> None:
 		self._scroll_factor = new_sf
-		self._interfacer.set_data("scroll_factor", new_sf * 4)
+		self._interfacer.set_data("scroll_factor", new_sf)
 
 	def _set_rgba(self, new_rgba: t.Tuple[int, int, int, "Numeric"]) -> None:
 		self._color = new_rgba[:3]
@@ -735,7 +746,7 @@ class PNFSprite(WorldObject):
 	@color.setter
 	def color(self, new_color: t.Tuple[int, int, int]) -> None:
 		self._color = new_color
-		self._interfacer.set_data("colors", (*new_color, self._opacity) * 4)
+		self._interfacer.set_data("colors", (*new_color, self._opacity))
 
 	@property
 	def opacity(self) -> int:
@@ -749,7 +760,7 @@ class PNFSprite(WorldObject):
 	def opacity(self, new_opacity: "Numeric") -> None:
 		new_opacity = int(new_opacity)
 		self._opacity = new_opacity
-		self._interfacer.set_data("colors", (*self._color, new_opacity) * 4)
+		self._interfacer.set_data("colors", (*self._color, new_opacity))
 
 	@property
 	def visible(self) -> bool:
@@ -785,7 +796,7 @@ class PNFSprite(WorldObject):
 	@flip_x.setter
 	def flip_x(self, new_flip_x: bool) -> None:
 		self._flip_x = new_flip_x
-		self._interfacer.set_data("flip", (new_flip_x, self._flip_y) * 4)
+		self._interfacer.set_data("flip", (new_flip_x, self._flip_y))
 
 	@property
 	def flip_y(self) -> bool:
@@ -797,7 +808,7 @@ class PNFSprite(WorldObject):
 	@flip_y.setter
 	def flip_y(self, new_flip_y: bool) -> None:
 		self._flip_y = new_flip_y
-		self._interfacer.set_data("flip", (self._flip_x, new_flip_y) * 4)
+		self._interfacer.set_data("flip", (self._flip_x, new_flip_y))
 
 	def _dump(self) -> None:
 		print(f"x, y: {self.x}, {self.y}")
@@ -119,6 +119,16 @@ class SceneKernel:
 		"""
 		raise NotImplementedError()
 
+	def get_loading_plan_key(self) -> t.Optional[t.Hashable]:
+		"""
+		Returns a key that the assets loaded for this kernel's scene
+		are recorded under, so they can all be requested at once the
+		next time the scene is loaded.
+		Scenes whose assets differ by their arguments should make sure
+		to put those into the key. ``None`` disables this.
+		"""
+		return f"{self._scene_type.__module__}.{self._scene_type.__qualname__}"
+
 	def create_scene(self) -> "BaseScene":
 		return self._scene_type(self, *self._scene_args, **self._scene_kwargs)
 
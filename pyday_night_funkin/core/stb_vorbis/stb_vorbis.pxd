@@ -44,6 +44,7 @@ cdef extern from "c_src/stb_vorbis.c":
 
 
 	stb_vorbis *stb_vorbis_open_filename(char *file_name, int *error, stb_vorbis_alloc *alloc_buffer) nogil
+	stb_vorbis *stb_vorbis_open_memory(const unsigned char *data, int len, int *error, stb_vorbis_alloc *alloc_buffer) nogil
 	void stb_vorbis_close(stb_vorbis *self) nogil
 	stb_vorbis_info stb_vorbis_get_info(stb_vorbis *self) nogil
 	int stb_vorbis_get_error(stb_vorbis *self) nogil
@@ -7,8 +7,11 @@ def _get_error_string(err: int) -> str:
 
 
 class STBVorbis:
-	def __init__(self, file_name: str) -> None:
-		...
+	def __init__(self, file_name: str | None = None, data: bytes | memoryview | None = None) -> None:
+		"""
+		Opens an ogg vorbis file by name, or decodes one straight out
+		of ``data``, which is kept alive for the object's lifetime.
+		"""
 
 	@property
 	def channel_amount(self) -> float:
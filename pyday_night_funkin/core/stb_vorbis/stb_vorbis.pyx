@@ -57,13 +57,28 @@ def _get_error_string(int err) -> str:
 cdef class STBVorbis:
 	cdef stb_vorbis *_stb_vorbis
 
+	cdef object _data
+
 	cdef readonly int channel_amount
 	cdef readonly int sample_rate
 
-	def __cinit__(self, file_name: str):
+	def __cinit__(self, file_name: str = None, data = None):
 		cdef int open_error = 0
+		cdef const unsigned char[::1] data_view
+
+		if data is not None:
+			# stb_vorbis reads straight from the buffer, so it has to stay alive as long as
+			# this object does.
+			data_view = data
+			self._data = data
+			self._stb_vorbis = stb_vorbis_open_memory(
+				&data_view[0], <int>data_view.shape[0], &open_error, NULL
+			)
+		elif file_name is not None:
+			self._stb_vorbis = stb_vorbis_open_filename(file_name.encode(), &open_error, NULL)
+		else:
+			raise ValueError("Either a file name or data must be given")
 
-		self._stb_vorbis = stb_vorbis_open_filename(file_name.encode(), &open_error, NULL)
 		if self._stb_vorbis == NULL:
 			raise STBVorbisException(_get_error_string(open_error))
 
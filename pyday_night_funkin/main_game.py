@@ -120,7 +120,17 @@ class _FPSData:
 
 
 class Game(SceneManager):
-	def __init__(self, debug_level: int, vsync: bool) -> None:
+	def __init__(
+		self,
+		debug_level: int,
+		vsync: bool,
+		asset_worker_processes: int = 0,
+		eviction_policy: str = "burden",
+		asset_trace_path: t.Optional[str] = None,
+		memory_accounting: bool = False,
+		hot_reload: bool = False,
+		warm_up_budget: int = 0,
+	) -> None:
 		super().__init__()
 
 		self.debug = debug_level > 0
@@ -195,7 +205,18 @@ class Game(SceneManager):
 		logger.info("cygl module initialized.")
 
 		self._asset_system_clock = pyglet.clock.Clock()
-		self.assets = pyday_night_funkin.core.asset_system.initialize(self._asset_system_clock)
+		self.assets = pyday_night_funkin.core.asset_system.initialize(
+			self._asset_system_clock,
+			SaveData.get_savedata_location() / "cache",
+			asset_worker_processes,
+			eviction_policy,
+		)
+		if asset_trace_path is not None:
+			self.assets.start_access_trace(asset_trace_path)
+		if memory_accounting:
+			self.assets.start_memory_accounting()
+		if hot_reload:
+			self.assets.start_hot_reload()
 		self._most_recent_cache_stats = self.assets.get_cache_stats()
 
 		self.volume_control = VolumeControlDropdown(SOUND_GRANULARITY)
@@ -247,7 +268,10 @@ class Game(SceneManager):
 		from pyday_night_funkin import base_game_pack
 		self.add_content_pack(base_game_pack.load(self))
 		# NOTE: Can be omitted
-		self.assets.discover_libraries()
+		self.assets.discover_libraries(background=True)
+
+		if warm_up_budget > 0:
+			self.assets.start_warm_up(warm_up_budget)
 
 		# Push initial scene
 		self.push_scene(TitleScene)
@@ -273,6 +297,14 @@ class Game(SceneManager):
 		pyglet.clock.unschedule(self._tick_asset_system_clock)
 		self.assets.shutdown()
 
+		for asset_type_name, calib in self.assets.get_memory_calibration().items():
+			logger.info(
+				f"Memory calibration for {asset_type_name}: {calib.asset_count} assets, "
+				f"estimated {calib.estimated_size // 1024} KiB, measured "
+				f"{calib.measured_size // 1024} KiB (x{calib.ratio:.2f}), largest deviation "
+				f"{calib.max_deviation // 1024} KiB"
+			)
+
 	# The method below is subject to extremely heavy change
 	def add_content_pack(self, pack: "ContentPack") -> None:
 		pack_id = pack.pack_id
@@ -311,6 +343,10 @@ class Game(SceneManager):
 		if dt > self.dt_limit:
 			dt = self.dt_limit
 
+		# Texture uploads and similar for loader threads. Done before scene updates so
+		# that a loading procedure completed by them is noticed this frame.
+		self.assets.process_main_thread_work()
+
 		for scene in self._scenes_to_update:
 			scene.update(dt)
 
@@ -12,6 +12,9 @@ from pyday_night_funkin.enums import Control, Difficulty
 from pyday_night_funkin.menu import Menu
 from pyday_night_funkin import scenes
 
+if t.TYPE_CHECKING:
+	from pyday_night_funkin.core.scene import SceneKernel
+
 
 class StickySprite(PNFSprite):
 	def __init__(self, stickee: PNFSprite, *args, **kwargs) -> None:
@@ -89,6 +92,8 @@ class FreeplayScene(scenes.MusicBeatScene):
 				image = fetch_character_icons(opp_icon)[0],
 			)
 
+		self._prefetcher = scenes.loading.Prefetcher(self)
+
 		self.menu = Menu(
 			self.game.key_handler, len(self.displayed_songs), self._on_select, self._on_confirm
 		)
@@ -100,6 +105,7 @@ class FreeplayScene(scenes.MusicBeatScene):
 			fwd_control = Control.RIGHT,
 			bkwd_control = Control.LEFT,
 		)
+		self._prefetch_selection()
 
 	def update(self, dt: float) -> None:
 		super().update(dt)
@@ -119,6 +125,7 @@ class FreeplayScene(scenes.MusicBeatScene):
 			self.sfx_ring.play(self._scroll_sound)
 			for li, line in enumerate(self._text_lines):
 				line.target_y = li - i
+			self._prefetch_selection()
 		else:
 			self._text_lines[i].opacity = 153
 
@@ -126,17 +133,36 @@ class FreeplayScene(scenes.MusicBeatScene):
 		if not selected:
 			return
 
-		target_kernel = self.displayed_songs[i].stage_type.get_kernel(
+		# Whatever it got done is in the cache and whatever it's still loading will be picked
+		# up by the loading scene, which takes care of the rest.
+		self._prefetcher.cancel()
+		target_kernel = self._get_level_kernel(i)
+
+		self.game.assets.advance_age()
+
+		scenes.LoadingScene.load_or_set(self.game, target_kernel, scenes.FreeplayScene)
+
+	def _on_diff_select(self, i: int, state: bool) -> None:
+		if state:
+			self.diff_text.text = Difficulty(i).name
+			self._prefetch_selection()
+
+	def _get_level_kernel(self, i: int) -> "SceneKernel":
+		return self.displayed_songs[i].stage_type.get_kernel(
 			self.game,
 			self.displayed_songs[i],
 			Difficulty(self.diff_menu.selection_index),
 			FreeplayScene,
 		)
 
-		self.game.assets.advance_age()
+	def _prefetch_selection(self) -> None:
+		# Menus call their select callback on creation, in which case one of them is not there yet
+		if not hasattr(self, "menu") or not hasattr(self, "diff_menu"):
+			return
 
-		scenes.LoadingScene.load_or_set(self.game, target_kernel)
+		i = self.menu.selection_index
+		self._prefetcher.set_target(lambda: self._get_level_kernel(i))
 
-	def _on_diff_select(self, i: int, state: bool) -> None:
-		if state:
-			self.diff_text.text = Difficulty(i).name
+	def destroy(self) -> None:
+		self._prefetcher.cancel()
+		super().destroy()
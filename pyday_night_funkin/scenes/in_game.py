@@ -9,7 +9,9 @@ from pyglet.math import Vec2
 
 from pyday_night_funkin.base_game_pack import fetch_song
 from pyday_night_funkin.character import Character, CharacterData
-from pyday_night_funkin.core.asset_system import AssetRequest, LoadingRequest, load_pyobj
+from pyday_night_funkin.core.asset_system import (
+	AssetRequest, AssetRequestPriority, LoadingRequest, load_pyobj
+)
 from pyday_night_funkin.core.scene import BaseScene, SceneKernel, BaseSceneArgDict
 from pyday_night_funkin.core.utils import lerp
 from pyday_night_funkin.enums import Control, Difficulty
@@ -156,7 +158,8 @@ class InGameSceneKernel(SceneKernel):
 			if json_data["needsVoices"]:
 				return_hits["sound"].append(AssetRequest((song_dir / "Voices.ogg",),))
 
-			return LoadingRequest(return_hits)
+			# The scene won't even start its conductor without the song
+			return LoadingRequest(return_hits, priority=AssetRequestPriority.CRITICAL)
 
 		req = LoadingRequest(
 			{
@@ -164,17 +167,26 @@ class InGameSceneKernel(SceneKernel):
 					AssetRequest(
 						(self._level_data.song_name, self._difficulty),
 						completion_tag = "song_data.0",
+						priority = AssetRequestPriority.CRITICAL,
 					),
 				),
 			},
 			{"song_data": _on_song_data_load},
 			self._level_data.libraries or [],
+			# The stage is built from the libraries as soon as the scene is created
+			AssetRequestPriority.HIGH,
 		)
 
 		req.add_subrequest(char_lreq)
+		req.add_subrequest(LoadingRequest(
+			self._scene_type.get_deferrable_asset_requests(), priority=AssetRequestPriority.LOW
+		))
 
 		return req
 
+	def get_loading_plan_key(self) -> t.Optional[t.Hashable]:
+		return (super().get_loading_plan_key(), self._level_data.song_name, self._difficulty.name)
+
 	def fill(self, arg_dict: t.Optional[_InGameSceneArgDict] = None, **kwargs):
 		return super().fill(arg_dict, **kwargs)
 
@@ -290,6 +302,23 @@ class InGameScene(scenes.MusicBeatScene):
 		self.note_handler: t.Optional["AbstractNoteHandler"] = None
 		self.hud: t.Optional["HUD"] = None
 
+		self._pending_deferred_assets = [
+			(asset_type_name, request)
+			for asset_type_name, requests in self.get_deferrable_asset_requests().items()
+			for request in requests
+		]
+		"""
+		Deferrable asset requests whose assets have not been picked up
+		from the cache yet.
+		"""
+
+		self._deferred_assets: t.Dict[t.Tuple[str, t.Tuple[t.Any, ...]], t.Any] = {}
+		"""
+		Assets of deferrable asset requests that were picked up from
+		the cache, by their asset type and request args. Held so they
+		stay cached for as long as the scene exists.
+		"""
+
 	@classmethod
 	def get_kernel(
 		cls,
@@ -317,6 +346,24 @@ class InGameScene(scenes.MusicBeatScene):
 		"""
 		return InGameSceneKernel(cls, game, level_data, difficulty, follow_scene, remaining_week)
 
+	@classmethod
+	def get_deferrable_asset_requests(cls) -> t.Dict[str, t.List[AssetRequest]]:
+		"""
+		Returns requests for assets the scene only needs a while after
+		it has started, such as sounds of stage events. They are loaded
+		with low priority and the scene may start before they are in.
+		Don't load them directly, as that would stall the game until
+		they are. Get them through ``get_deferred_asset`` instead.
+		"""
+		# Played once the player dies, see the GameOverScene
+		return {
+			"sound": [
+				AssetRequest(("shared/music/gameOver.ogg",)),
+				AssetRequest(("shared/music/gameOverEnd.ogg",)),
+				AssetRequest(("shared/sounds/fnf_loss_sfx.ogg",)),
+			],
+		}
+
 	def init_basic_fnf_stuff(self) -> None:
 		"""
 		Initializes the ``InGameScene``'s standard FNF components.
@@ -522,9 +569,31 @@ class InGameScene(scenes.MusicBeatScene):
 		target = self.focus_targets[focus_target]
 		self.main_cam.set_follow_target(target.get_focus_point(), 0.04)
 
+	def get_deferred_asset(self, asset_type_name: str, *args: t.Any) -> t.Optional[t.Any]:
+		"""
+		Returns the asset of the deferrable asset request of the given
+		asset type and args, or ``None`` if it has not been loaded yet.
+		Callers should skip whatever they need the asset for in that
+		case instead of loading it themselves.
+		"""
+		return self._deferred_assets.get((asset_type_name, args))
+
+	def _pick_up_deferred_assets(self) -> None:
+		still_pending = []
+		for asset_type_name, request in self._pending_deferred_assets:
+			is_cached, asset = self.game.assets.get_cached_asset(asset_type_name, request)
+			if is_cached:
+				self._deferred_assets[asset_type_name, request.args] = asset
+			else:
+				still_pending.append((asset_type_name, request))
+		self._pending_deferred_assets = still_pending
+
 	def update(self, dt: float) -> None:
 		super().update(dt)
 
+		if self._pending_deferred_assets:
+			self._pick_up_deferred_assets()
+
 		self.process_input(dt)
 		if self.health < 0.0 and self.state is not GameState.ENDED:
 			# Game over may have been triggered in process_input already
@@ -745,6 +814,7 @@ class InGameScene(scenes.MusicBeatScene):
 		self.inst_player.destroy()
 		# Pathetic attempt at cleaning up more cyclic references i guess
 		del self.dancers
+		del self._deferred_assets
 		del self.note_handler
 		del self.boyfriend
 		del self.girlfriend
@@ -5,13 +5,14 @@ import typing as t
 from loguru import logger
 
 import pyday_night_funkin.constants as CNST
-from pyday_night_funkin.core.asset_system import load_image
+from pyday_night_funkin.core.asset_system import AssetRequestPriority, load_image
 from pyday_night_funkin.core.scene import BaseScene, SceneKernel
 from pyday_night_funkin.core.pnf_text import PNFText, TextAlignment
 from pyday_night_funkin.core.utils import lerp
 from pyday_night_funkin.enums import Control
 
 if t.TYPE_CHECKING:
+	from pyday_night_funkin.core.asset_system import LoadingProcedure
 	from pyday_night_funkin.main_game import Game
 
 
@@ -21,8 +22,61 @@ class LoadingKernel(SceneKernel):
 		scene_type: t.Type["LoadingScene"],
 		game: "Game",
 		target_kernel: SceneKernel,
+		back_scene: t.Optional[t.Type[BaseScene]] = None,
 	) -> None:
-		super().__init__(scene_type, game, target_kernel)
+		super().__init__(scene_type, game, target_kernel, back_scene)
+
+
+class Prefetcher:
+	"""
+	Speculatively loads the assets of a scene kernel a menu scene
+	is likely to switch to, once its selection has rested on it for a
+	short while.
+	"""
+
+	def __init__(self, scene: BaseScene, delay: float = 0.35) -> None:
+		self._scene = scene
+		self._delay = delay
+		"""
+		How long a target has to stay unchanged until loading for it
+		starts. Keeps the loader from thrashing while scrolling.
+		"""
+
+		self._target: t.Optional[t.Callable[[], SceneKernel]] = None
+		self._procedure: t.Optional["LoadingProcedure"] = None
+
+	def set_target(self, target: t.Optional[t.Callable[[], SceneKernel]]) -> None:
+		"""
+		Sets the function creating the kernel of the scene that is now
+		likely to be switched to, cancelling prefetching for the old
+		one. ``None`` clears the target.
+		"""
+		self.cancel()
+		self._target = target
+		if target is not None:
+			self._scene.clock.schedule_once(self._start, self._delay)
+
+	def _start(self, _) -> None:
+		if self._target is None:
+			return
+
+		game = self._scene.game
+		kernel = self._target()
+		loading_request = kernel.get_loading_hints(game)
+		if game.assets.requires_loading_process(loading_request):
+			self._procedure = game.assets.start_speculative_load(
+				loading_request, kernel.get_loading_plan_key()
+			)
+
+	def cancel(self) -> None:
+		"""
+		Stops prefetching. Already loaded assets stay in the cache.
+		"""
+		self._scene.clock.unschedule(self._start)
+		self._target = None
+		if self._procedure is not None:
+			self._procedure.cancel()
+			self._procedure = None
 
 
 class LoadingScene(BaseScene):
@@ -30,6 +84,7 @@ class LoadingScene(BaseScene):
 		self,
 		kernel: SceneKernel,
 		target_kernel: SceneKernel,
+		back_scene: t.Optional[t.Type[BaseScene]] = None,
 	) -> None:
 		super().__init__(kernel)
 
@@ -39,6 +94,11 @@ class LoadingScene(BaseScene):
 		self.lyr_fg2 = self.create_layer()
 
 		self.target_kernel = target_kernel
+		self.back_scene = back_scene
+		"""
+		Scene to return to when the player backs out of loading. If
+		``None``, loading can't be backed out of.
+		"""
 
 		self.main_camera.clear_color = (0.792, 1.0, 0.302, 1.0)
 
@@ -70,22 +130,45 @@ class LoadingScene(BaseScene):
 		self._start_time = perf_counter()
 
 		loading_request = self.target_kernel.get_loading_hints(self.game)
-		self.loading_tracker = self.game.assets.start_threaded_load(loading_request)
+		self.loading_tracker = self.game.assets.start_threaded_load(
+			loading_request, self.target_kernel.get_loading_plan_key()
+		)
 
 	@classmethod
-	def get_kernel(cls, game: "Game", target_kernel: SceneKernel) -> LoadingKernel:
-		return LoadingKernel(cls, game, target_kernel)
+	def get_kernel(
+		cls,
+		game: "Game",
+		target_kernel: SceneKernel,
+		back_scene: t.Optional[t.Type[BaseScene]] = None,
+	) -> LoadingKernel:
+		return LoadingKernel(cls, game, target_kernel, back_scene)
 
 	@classmethod
-	def load_or_set(cls, game: "Game", target_kernel: SceneKernel) -> None:
+	def load_or_set(
+		cls,
+		game: "Game",
+		target_kernel: SceneKernel,
+		back_scene: t.Optional[t.Type[BaseScene]] = None,
+	) -> None:
 		if game.assets.requires_loading_process(target_kernel.get_loading_hints(game)):
-			game.set_scene(cls.get_kernel(game, target_kernel))
+			game.set_scene(cls.get_kernel(game, target_kernel, back_scene))
 		else:
 			game.set_scene(target_kernel)
 
 	def update(self, dt: float) -> None:
 		super().update(dt)
 
+		if (
+			self.back_scene is not None and not self._started_exiting and
+			self.game.key_handler.just_pressed(Control.BACK)
+		):
+			# Loaded assets stay cached and the ones still loading are picked up when
+			# the level is selected again.
+			self._started_exiting = True
+			self.loading_tracker.cancel()
+			self.game.set_scene(self.back_scene)
+			return
+
 		self.bg_image.set_scale_and_repos(
 			lerp(CNST.GAME_WIDTH * 0.88, self.bg_image.width, 0.9) /
 			self.bg_image.get_current_frame_dimensions()[0]
@@ -111,7 +194,14 @@ class LoadingScene(BaseScene):
 		bar_width = progress * (CNST.GAME_WIDTH - 20)
 		self.loading_bar.scale_x = lerp(self.loading_bar.scale_x, bar_width, 1.0 - 0.5**(dt * 10.0))
 
-		if self.loading_tracker.is_done() and not self._started_exiting:
+		# Assets of a lower priority than HIGH are not needed to create the scene and keep
+		# loading in the background once it's running.
+		if self.loading_tracker.is_done(AssetRequestPriority.HIGH) and not self._started_exiting:
 			logger.trace(f"Loading finished in {perf_counter() - self._start_time:>.4f}s")
 			self._started_exiting = True
 			self.game.set_scene(self.target_kernel)
+
+	def destroy(self) -> None:
+		if not self._started_exiting and not self.loading_tracker.is_done():
+			self.loading_tracker.cancel()
+		super().destroy()
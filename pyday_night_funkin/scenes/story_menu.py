@@ -180,6 +180,8 @@ class StoryMenuScene(scenes.MusicBeatScene):
 			color = to_rgba_tuple(0xFFFFFFB3),
 		)
 
+		self._prefetcher = scenes.loading.Prefetcher(self)
+
 		self.week_menu = Menu(
 			self.game.key_handler, len(self._weeks), self._on_week_select, self._on_confirm
 		)
@@ -191,6 +193,7 @@ class StoryMenuScene(scenes.MusicBeatScene):
 			fwd_control = Control.RIGHT,
 			bkwd_control = Control.LEFT,
 		)
+		self._prefetch_selection()
 
 	def _on_week_select(self, index: int, state: bool) -> None:
 		if not state:
@@ -214,6 +217,8 @@ class StoryMenuScene(scenes.MusicBeatScene):
 			new_char_sm_data = self.game.character_registry[new_char_id].get_story_menu_data()
 			week_char_display_sprite.display_new_char(new_char_id, new_char_sm_data)
 
+		self._prefetch_selection()
+
 	def _on_diff_select(self, index: int, state: bool) -> None:
 		if not state:
 			return
@@ -228,6 +233,8 @@ class StoryMenuScene(scenes.MusicBeatScene):
 			0.07,
 		)
 
+		self._prefetch_selection()
+
 	def _on_confirm(self, index: int, state: bool) -> None:
 		if not state:
 			return
@@ -243,21 +250,33 @@ class StoryMenuScene(scenes.MusicBeatScene):
 			on_complete =   lambda _, w=self._weeks[index]: self._set_ingame_scene(w),
 		)
 
-	def _set_ingame_scene(self, week: "WeekData") -> None:
+	def _get_week_kernel(self, week: WeekData) -> SceneKernel:
 		level = week.levels[0]
+		return level.stage_type.get_kernel(
+			self.game,
+			level_data = level,
+			difficulty = Difficulty(self.diff_menu.selection_index),
+			follow_scene = StoryMenuScene,
+			remaining_week = week.levels[1:],
+		)
+
+	def _prefetch_selection(self) -> None:
+		# Menus call their select callback on creation, in which case one of them is not there yet
+		if not hasattr(self, "week_menu") or not hasattr(self, "diff_menu"):
+			return
+
+		week = self._weeks[self.week_menu.selection_index]
+		self._prefetcher.set_target(lambda: self._get_week_kernel(week))
+
+	def _set_ingame_scene(self, week: "WeekData") -> None:
+		# Whatever it got done is in the cache and whatever it's still loading will be picked
+		# up by the loading scene, which takes care of the rest.
+		self._prefetcher.cancel()
+		target_kernel = self._get_week_kernel(week)
 
 		self.game.assets.advance_age()
 
-		scenes.LoadingScene.load_or_set(
-			self.game,
-			level.stage_type.get_kernel(
-				self.game,
-				level_data = level,
-				difficulty = Difficulty(self.diff_menu.selection_index),
-				follow_scene = StoryMenuScene,
-				remaining_week = week.levels[1:],
-			),
-		)
+		scenes.LoadingScene.load_or_set(self.game, target_kernel, scenes.StoryMenuScene)
 
 	def update(self, dt: float) -> None:
 		super().update(dt)
@@ -274,3 +293,7 @@ class StoryMenuScene(scenes.MusicBeatScene):
 
 		self.diff_arrow_left.animation.play("press" if kh[Control.LEFT] else "idle")
 		self.diff_arrow_right.animation.play("press" if kh[Control.RIGHT] else "idle")
+
+	def destroy(self) -> None:
+		self._prefetcher.cancel()
+		super().destroy()
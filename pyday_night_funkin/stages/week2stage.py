@@ -1,14 +1,18 @@
 
 
 from random import choice, randint
+import typing as t
 
 from pyglet.math import Vec2
 
-from pyday_night_funkin.core.asset_system import load_frames, load_sound
+from pyday_night_funkin.core.asset_system import AssetRequest, load_frames
 from pyday_night_funkin.scenes.in_game import Anchor, AnchorAlignment as Al, InGameSceneKernel
 from pyday_night_funkin.stages.common import BaseGameBaseStage
 
 
+_LIGHTNING_SOUNDS = ("shared/sounds/thunder_1.ogg", "shared/sounds/thunder_2.ogg")
+
+
 class Week2Stage(BaseGameBaseStage):
 	def __init__(self, kernel: InGameSceneKernel, *args, **kwargs) -> None:
 		super().__init__(
@@ -21,10 +25,6 @@ class Week2Stage(BaseGameBaseStage):
 		)
 
 		self._next_lightning_thresh = 0
-		self._lightning_sounds = (
-			load_sound("shared/sounds/thunder_1.ogg"),
-			load_sound("shared/sounds/thunder_2.ogg"),
-		)
 
 		self.background = self.create_object(self.lyr_background, x=-200, y=-100)
 		self.background.frames = load_frames("week2/images/halloween_bg.xml")
@@ -35,6 +35,12 @@ class Week2Stage(BaseGameBaseStage):
 		)
 		self.background.animation.play("idle")
 
+	@classmethod
+	def get_deferrable_asset_requests(cls) -> t.Dict[str, t.List[AssetRequest]]:
+		requests = super().get_deferrable_asset_requests()
+		requests.setdefault("sound", []).extend(AssetRequest((p,)) for p in _LIGHTNING_SOUNDS)
+		return requests
+
 	def init_basic_fnf_stuff(self) -> None:
 		super().init_basic_fnf_stuff()
 		# NOTE: This isolates behavior for them into this stage only with an id comp.
@@ -47,7 +53,9 @@ class Week2Stage(BaseGameBaseStage):
 
 		if randint(0, 9) == 0 and self.cur_beat > self._next_lightning_thresh:
 			# LIGHTNING BOLT, LIGHTNING BOLT!
-			self.sfx_ring.play(choice(self._lightning_sounds))
+			# Strikes silently if the thunder is still loading
+			if (sound := self.get_deferred_asset("sound", choice(_LIGHTNING_SOUNDS))) is not None:
+				self.sfx_ring.play(sound)
 			self.background.animation.play("lightning")
 
 			self.boyfriend.animation.play("scared", True)
@@ -5,7 +5,7 @@ import typing as t
 from pyglet.math import Vec2
 
 from pyday_night_funkin.constants import GAME_WIDTH
-from pyday_night_funkin.core.asset_system import load_image, load_sound
+from pyday_night_funkin.core.asset_system import AssetRequest, load_image
 from pyday_night_funkin.stages.common import BaseGameBaseStage
 from pyday_night_funkin.scenes.in_game import Anchor, AnchorAlignment as Al, InGameSceneKernel
 
@@ -13,6 +13,9 @@ if t.TYPE_CHECKING:
 	from pyday_night_funkin.core.pnf_sprite import PNFSprite
 
 
+_TRAIN_SOUND = "shared/sounds/train_passes.ogg"
+
+
 class Week3Stage(BaseGameBaseStage):
 	def __init__(self, kernel: InGameSceneKernel, *args, **kwargs) -> None:
 		super().__init__(
@@ -27,7 +30,6 @@ class Week3Stage(BaseGameBaseStage):
 
 		self.city_lights: t.List[PNFSprite] = []
 		self._active_city_light_idx: int = 0
-		self.train_sound = load_sound("shared/sounds/train_passes.ogg")
 		self.train_inbound = False
 		self.train_moving = False
 		self.train_cars_remaining = 8
@@ -91,6 +93,12 @@ class Week3Stage(BaseGameBaseStage):
 			if self.train_timer >= 1/24:
 				self._update_train()
 
+	@classmethod
+	def get_deferrable_asset_requests(cls) -> t.Dict[str, t.List[AssetRequest]]:
+		requests = super().get_deferrable_asset_requests()
+		requests.setdefault("sound", []).append(AssetRequest((_TRAIN_SOUND,)))
+		return requests
+
 	def _update_train(self) -> None:
 		self.train_timer = .0
 		if not self.train_moving:
@@ -131,10 +139,13 @@ class Week3Stage(BaseGameBaseStage):
 		self.train_cooldown += 1
 		# cooldown > 8 by original game but make it juust a bit less frequent
 		if self.cur_beat % 8 == 4 and randint(0, 99) < 30 and self.train_cooldown > 10:
+			# The train is timed to its sound, so it can't pass before that is loaded
+			if (sound := self.get_deferred_asset("sound", _TRAIN_SOUND)) is None:
+				return
 			self.train_cooldown = randint(-4, 0)
 			self.train_inbound = True
 			# if not self.train_sound_player.playing:
-			self.train_sound_player.set(self.train_sound)
+			self.train_sound_player.set(sound)
 
 	def destroy(self) -> None:
 		super().destroy()
@@ -1,9 +1,10 @@
 
 from random import choice, randint
+import typing as t
 
 from pyglet.math import Vec2
 
-from pyday_night_funkin.core.asset_system import load_frames, load_image, load_sound
+from pyday_night_funkin.core.asset_system import AssetRequest, load_frames, load_image
 from pyday_night_funkin.core.pnf_sprite import PNFSprite
 from pyday_night_funkin.scenes.in_game import (
 	Anchor, AnchorAlignment as Al, DancerInfo, InGameSceneKernel
@@ -11,6 +12,9 @@ from pyday_night_funkin.scenes.in_game import (
 from pyday_night_funkin.stages.common import BaseGameBaseStage
 
 
+_CAR_SOUNDS = tuple(f"shared/sounds/carPass{i}.ogg" for i in range(2))
+
+
 class Henchman(PNFSprite):
 	def __init__(self, *args, **kwargs) -> None:
 		super().__init__(*args, **kwargs)
@@ -50,7 +54,6 @@ class Week4Stage(BaseGameBaseStage):
 		self.lyr_limo = self.create_layer(after=self.lyr_girlfriend)
 
 		self._allow_passing_car = False
-		self._car_sounds = [load_sound(f"shared/sounds/carPass{i}.ogg") for i in range(2)]
 
 		sky = self.create_object(
 			self.lyr_background,
@@ -85,6 +88,12 @@ class Week4Stage(BaseGameBaseStage):
 
 		self._reset_car()
 
+	@classmethod
+	def get_deferrable_asset_requests(cls) -> t.Dict[str, t.List[AssetRequest]]:
+		requests = super().get_deferrable_asset_requests()
+		requests.setdefault("sound", []).extend(AssetRequest((p,)) for p in _CAR_SOUNDS)
+		return requests
+
 	def init_basic_fnf_stuff(self) -> None:
 		super().init_basic_fnf_stuff()
 		self.focus_targets[1].additional_offset = Vec2(-300, 0)
@@ -102,7 +111,9 @@ class Week4Stage(BaseGameBaseStage):
 
 	def _move_car(self) -> None:
 		self._allow_passing_car = False
-		self.sfx_ring.play(choice(self._car_sounds), 1.0)
+		# Passes silently if the sound is still loading
+		if (sound := self.get_deferred_asset("sound", choice(_CAR_SOUNDS))) is not None:
+			self.sfx_ring.play(sound, 1.0)
 		# The car starts at -12600 and the camera is typically pinning some point between
 		# 200-800-ish.
 		# The car pass sounds have their whoosh at 1.25 or 1.45; already quite some difference.
@@ -1,7 +1,11 @@
 
+import typing as t
+
 from pyglet.math import Vec2
 
-from pyday_night_funkin.core.asset_system import load_frames, load_image, load_sound
+from pyday_night_funkin.core.asset_system import (
+	AssetRequest, load_frames, load_image, load_sound
+)
 from pyday_night_funkin.core.pnf_sprite import PNFSprite
 from pyday_night_funkin.core.tween_effects.eases import in_out_quad
 from pyday_night_funkin.scenes.in_game import (
@@ -10,6 +14,9 @@ from pyday_night_funkin.scenes.in_game import (
 from pyday_night_funkin.stages.common import BaseGameBaseStage
 
 
+_LIGHTS_OFF_SOUND = "shared/sounds/Lights_Shut_off.ogg"
+
+
 class Week5Stage(BaseGameBaseStage):
 	def __init__(self, kernel: InGameSceneKernel, *args, **kwargs) -> None:
 		super().__init__(
@@ -88,12 +95,17 @@ class EggnogStage(Week5Stage):
 
 		self.lyr_obscure = self.create_layer()
 
-		self._lights_off_sound = load_sound("shared/sounds/Lights_Shut_off.ogg")
+	@classmethod
+	def get_deferrable_asset_requests(cls) -> t.Dict[str, t.List[AssetRequest]]:
+		requests = super().get_deferrable_asset_requests()
+		requests.setdefault("sound", []).append(AssetRequest((_LIGHTS_OFF_SOUND,)))
+		return requests
 
 	def on_song_end(self) -> None:
 		if self.in_story_mode:
 			self.main_cam.visible = self.hud_cam.visible = False
-			self.game.sfx_ring.play(self._lights_off_sound)
+			if (sound := self.get_deferred_asset("sound", _LIGHTS_OFF_SOUND)) is not None:
+				self.game.sfx_ring.play(sound)
 
 		super().on_song_end()
 
@@ -45,13 +45,81 @@ def main():
 		),
 	)
 
+	argparser.add_argument(
+		"--asset-workers",
+		"-w",
+		type = int,
+		default = 0,
+		help = (
+			"Amount of worker processes to decode images and parse data files in. "
+			"Takes load off the game loop while loading, at the cost of memory and "
+			"a slower startup. 0 (the default) decodes on the loader threads."
+		),
+	)
+
+	argparser.add_argument(
+		"--eviction-policy",
+		"-e",
+		choices = ("burden", "lru", "lfu", "gdsf", "arc"),
+		default = "burden",
+		help = "Policy deciding which cached assets to unload first once memory runs low.",
+	)
+
+	argparser.add_argument(
+		"--asset-trace",
+		default = None,
+		help = (
+			"Writes every asset cache access into the given file. The trace can be replayed "
+			"through all eviction policies with "
+			"`python -m pyday_night_funkin.core.eviction_policies <file>`."
+		),
+	)
+
+	argparser.add_argument(
+		"--memory-accounting",
+		action = "store_true",
+		help = (
+			"Measures the memory each asset allocates while loading and logs how it "
+			"compares to the asset system's estimates on exit. Slows loading down."
+		),
+	)
+
+	argparser.add_argument(
+		"--hot-reload",
+		action = "store_true",
+		help = (
+			"Watches the files of loaded assets and reloads them when they change on disk. "
+			"Meant for modding and development."
+		),
+	)
+
+	argparser.add_argument(
+		"--warm-up-budget",
+		type = int,
+		default = 0,
+		help = (
+			"Memory in MiB that the assets used most in previous sessions may take up when "
+			"they are loaded in the background on launch. 0 (the default) disables the "
+			"warm-up; 128 is a reasonable budget."
+		),
+	)
+
 	result = argparser.parse_args()
 
 	import pyglet
 	pyglet.options["debug_gl"] = result.no_gl_errcheck
 
 	from pyday_night_funkin.main_game import Game
-	Game(2 - result.less_debug, result.vsync).run()
+	Game(
+		2 - result.less_debug,
+		result.vsync,
+		result.asset_workers,
+		result.eviction_policy,
+		result.asset_trace,
+		result.memory_accounting,
+		result.hot_reload,
+		result.warm_up_budget * 2**20,
+	).run()
 
 
 if __name__ == "__main__":